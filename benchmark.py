@@ -0,0 +1,707 @@
+import argparse
+import bisect
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+from ffpyplayer.player import MediaPlayer
+from PIL import Image, ImageTk
+import tkinter as tk
+
+# ========================== Configuration ==========================
+
+RESOLUTIONS = {
+    "144p": (256, 144),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+# Quality each resolution switches to during the switch-latency measurement
+SWITCH_TARGETS = {"144p": "720p", "720p": "1080p", "1080p": "720p"}
+
+VARIANTS = ("original", "new", "full_implementation", "final", "reuse", "single_demux", "trail", "viedo")
+
+# Variants played by engine.QualitySwitchDecorator; the rest are the standalone legacy scripts
+ENGINE_VARIANTS = ("reuse", "single_demux")
+
+
+# ========================== Synthetic Clips ==========================
+
+def generate_clip(path, size, frames, fps=30):
+    """Write a moving-gradient clip with a frame counter so every frame has real detail"""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open VideoWriter for {path}")
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    frame = np.empty((height, width, 3), np.uint8)
+    for i in range(frames):
+        frame[..., 0] = (x + i * 4) % 256
+        frame[..., 1] = (y + i * 2) % 256
+        frame[..., 2] = (x[None, :] + y + i) % 256
+        cv2.putText(frame, f"{i:05d}", (width // 20, height // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    height / 200, (255, 255, 255), max(1, height // 100))
+        writer.write(frame)
+    writer.release()
+
+
+def ensure_clips(workdir, resolutions, frames):
+    os.makedirs(workdir, exist_ok=True)
+    clips = {}
+    for name in resolutions:
+        path = os.path.join(workdir, f"synthetic_{name}_{frames}f.mp4")
+        if not os.path.exists(path):
+            print(f"🎞️ Generating {path}", file=sys.stderr)
+            generate_clip(path, RESOLUTIONS[name], frames)
+        clips[name] = path
+    return clips
+
+
+# ========================== Instrumentation ==========================
+
+class StageRecorder:
+    """Times the calls a player makes per frame, and when each frame reaches the screen.
+
+    With ``keep_samples=False`` (soak runs) it only counts frames, so its own
+    lists don't grow with the run and show up as RSS.
+    """
+
+    def __init__(self, keep_samples=True):
+        self.keep_samples = keep_samples
+        self.samples = {}
+        self.frame_times = []
+        self.opened_at = []  # when each VideoCapture was created
+        self.frames = 0
+        self.last_frame_at = None
+
+    def timed(self, stage, function):
+        if not self.keep_samples:
+            return function
+        samples = self.samples.setdefault(stage, [])
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+        return call
+
+    def frame_hook(self, function):
+        """Wrap whatever puts a frame on screen (canvas.create_image, FrameSink.present)"""
+        def call(*args, **kwargs):
+            result = function(*args, **kwargs)
+            self.last_frame_at = time.perf_counter()
+            self.frames += 1
+            if self.keep_samples:
+                self.frame_times.append(self.last_frame_at)
+            return result
+        return call
+
+    def first_frame_after(self, moment):
+        index = bisect.bisect_left(self.frame_times, moment)
+        return self.frame_times[index] if index < len(self.frame_times) else None
+
+    def frame_intervals(self):
+        times = self.frame_times
+        return [b - a for a, b in zip(times, times[1:])]
+
+    def stage_summaries(self):
+        return {stage: _summary(samples) for stage, samples in self.samples.items() if samples}
+
+
+class _Patched:
+    """A module (or object) with some attributes replaced; everything else comes from the original"""
+
+    def __init__(self, module, **overrides):
+        self.__dict__.update(overrides)
+        self._module = module
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+class _TimedCapture(_Patched):
+    def __init__(self, cap, recorder):
+        super().__init__(cap, read=recorder.timed("read", cap.read))
+
+
+class _TimedMediaPlayer(_Patched):
+    def __init__(self, player, recorder):
+        super().__init__(player, get_frame=recorder.timed("audio", player.get_frame))
+
+
+class _NoDisplay:
+    """Stands in for a legacy player's Tk root, canvas and labels when there is no display"""
+
+    def update(self): pass
+
+    def config(self, **options): pass
+
+    def create_image(self, *args, **options):
+        return 1
+
+    def after(self, delay_ms, callback=None, *args):
+        if callback is None:
+            time.sleep(delay_ms / 1000)
+
+
+def _open_display():
+    """Hidden Tk root with an 800x500 canvas, or (None, None) when there is no display"""
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None, None
+    root.withdraw()
+    canvas = tk.Canvas(root, width=800, height=500)
+    return root, canvas
+
+
+def _instrument(module, recorder, display):
+    """Route a legacy module's OpenCV, ffpyplayer, PIL and Tk calls through ``recorder``.
+
+    The module's own update_frame runs unchanged; only the names it looks up
+    are swapped. Without a display PhotoImage creation is skipped, so there
+    are no photo samples.
+    """
+    def video_capture(*args):
+        if recorder.keep_samples:
+            recorder.opened_at.append(time.perf_counter())
+        return _TimedCapture(cv2.VideoCapture(*args), recorder)
+
+    module.cv2 = _Patched(cv2, VideoCapture=video_capture,
+                          cvtColor=recorder.timed("convert", cv2.cvtColor),
+                          resize=recorder.timed("resize", cv2.resize),
+                          imencode=recorder.timed("encode", cv2.imencode))
+    module.MediaPlayer = lambda *args, **kwargs: _TimedMediaPlayer(MediaPlayer(*args, **kwargs), recorder)
+    module.Image = _Patched(Image, fromarray=recorder.timed("image", Image.fromarray))
+    if display:
+        module.ImageTk = _Patched(ImageTk, PhotoImage=recorder.timed("photo", ImageTk.PhotoImage))
+        module.tk = _Patched(tk, PhotoImage=recorder.timed("photo", tk.PhotoImage))
+    else:
+        module.ImageTk = _Patched(ImageTk, PhotoImage=lambda image=None, **options: image)
+        module.tk = _Patched(tk, PhotoImage=lambda **options: None)
+
+
+# ========================== Measurements ==========================
+
+def _summary(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _seek_targets(path, seeks, seed=0):
+    cap = cv2.VideoCapture(path)
+    duration = (cap.get(cv2.CAP_PROP_FRAME_COUNT) or 1) / (cap.get(cv2.CAP_PROP_FPS) or 30)
+    cap.release()
+    rng = random.Random(seed)
+    return [rng.uniform(0, duration * 0.9) for _ in range(seeks)]
+
+
+def _playback_result(recorder, frames, wall, cpu, display, stages):
+    return {
+        "frames": frames,
+        "display": display,
+        "decode_fps": frames / wall if wall else 0.0,
+        "cpu_percent": 100.0 * cpu / wall if wall else 0.0,
+        # Comparable between free-running and real-time paced variants
+        "cpu_ms_per_frame": 1000.0 * cpu / frames if frames else 0.0,
+        "frame_interval": _summary(recorder.frame_intervals()),
+        "stages": stages,
+    }
+
+
+# ---------- engine variants ----------
+
+def _engine_options(variant, realtime=False):
+    if variant == "single_demux":
+        # One MediaPlayer decodes both tracks and hands out frames on its own clock, so only in real time
+        return {"realtime": True, "audio": True, "single_demux": True}
+    return {"realtime": realtime, "audio": False}
+
+
+def _engine_stages(engine):
+    stages = {}
+    for name, stage in engine.metrics.snapshot()["stages"].items():
+        if stage["count"]:
+            stages[name] = {"mean_ms": stage["sum"] / stage["count"] * 1000, "p50_ms": stage["p50"] * 1000,
+                            "p95_ms": stage["p95"] * 1000, "p99_ms": stage["p99"] * 1000}
+    return stages
+
+
+def _engine_sink(recorder):
+    """(Tk root or None, sink): a TkCanvasSink on a hidden root when there is a display, else a NullSink"""
+    from engine import NullSink
+
+    root, canvas = _open_display()
+    if root is not None:
+        from tk_sinks import TkCanvasSink
+
+        sink = TkCanvasSink(canvas)
+        redraw = recorder.timed("redraw", root.update)
+
+        def present(frame, pts, _present=sink.present):
+            # The Tk app's main loop redraws the canvas between render ticks
+            shown = _present(frame, pts)
+            redraw()
+            return shown
+    else:
+        sink = NullSink()
+        present = sink.present
+    sink.present = recorder.frame_hook(present)
+    return root, sink
+
+
+def run_engine(variant, path, target_path, seeks):
+    """Play, switch and seek through engine.QualitySwitchDecorator exactly as the Tk app drives it"""
+    import headless
+    from seek_index import SeekIndex
+
+    recorder = StageRecorder()
+    root, sink = _engine_sink(recorder)
+    levels = {"Medium Quality": path, "High Quality": target_path}
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    engine = headless.play(levels, sink, build_seek_index=False, **_engine_options(variant))
+    wall = (recorder.last_frame_at or time.perf_counter()) - wall_start
+    cpu = time.process_time() - cpu_start
+    stages = _engine_stages(engine)
+    stages.update(recorder.stage_summaries())
+    result = _playback_result(recorder, recorder.frames, wall, cpu, root is not None, stages)
+    result["sync"] = engine.sync_stats()
+
+    # Seeks from a stopped player, through the coalescing seek worker and the seek index, polled on
+    # the app's 10 ms timer
+    engine.seek_indexes[path] = SeekIndex.load_or_build(path)
+    loop = engine.root
+    loop.realtime = True
+    samples = []
+    for target in _seek_targets(path, seeks):
+        shown = recorder.frames
+        start = time.perf_counter()
+        engine.seek(target)
+        loop.run(until=lambda: recorder.frames > shown or time.perf_counter() - start > 10)
+        if recorder.frames > shown:
+            samples.append(recorder.last_frame_at - start)
+    result["seek"] = _summary(samples)
+    result["switch"] = measure_engine_switch(variant, levels)
+    if root is not None:
+        root.destroy()
+    return result
+
+
+def measure_engine_switch(variant, levels, position=1.0, timeout=10.0):
+    """Switch to "High Quality" ``position`` seconds into real-time playback.
+
+    ``blocking_ms`` is how long switch_quality() holds the loop; ``latency_ms``
+    runs until the decoder is on the new rendition and a frame is presented
+    (frames already buffered from the old one still play out first).
+    """
+    import headless
+    from engine import NullSink
+
+    recorder = StageRecorder()
+    sink = NullSink()
+    sink.present = recorder.frame_hook(sink.present)
+    result = {}
+
+    def on_play(engine):
+        def switch():
+            start = time.perf_counter()
+            engine.switch_quality("High Quality")
+            result["blocking_ms"] = (time.perf_counter() - start) * 1000
+            watch(start, None)
+
+        def watch(start, shown):
+            if shown is None and engine.current_quality == "High Quality":
+                shown = recorder.frames
+            if shown is not None and recorder.frames > shown:
+                result["latency_ms"] = (recorder.last_frame_at - start) * 1000
+                result["glitch_frames"] = engine.last_switch.get("glitch_frames")
+                engine.stop_video()
+            elif time.perf_counter() - start > timeout:
+                engine.stop_video()
+            else:
+                engine.root.after(1, watch, start, shown)
+
+        engine.root.after(int(position * 1000), switch)
+
+    headless.play(levels, sink, build_seek_index=False, on_play=on_play, **_engine_options(variant, realtime=True))
+    return result if "latency_ms" in result else None
+
+
+# ---------- legacy variants ----------
+
+def _legacy_player(module, levels, root, canvas, label):
+    if hasattr(module, "QualitySwitchDecorator"):
+        return module.QualitySwitchDecorator(module.BasicVideoPlayer(levels["Medium Quality"]), levels, canvas, root)
+    # trail/viedo build their whole window in __init__ around hardcoded Windows paths (trail also loads
+    # its subtitles there), so set up only the state play() and update_frame use
+    player = module.VideoPlayer.__new__(module.VideoPlayer)
+    player.__dict__.update(root=root, canvas=canvas, subtitle_label=label, quality_levels=levels,
+                           current_quality="Medium Quality", video_path=levels["Medium Quality"], subtitles=[],
+                           cap=None, player=None, paused=False, current_time=0, resume_event=threading.Event())
+    player.resume_event.set()
+    return player
+
+
+def _pump(root, condition, timeout):
+    """Wait for ``condition()``. The legacy loops call into Tk from their own thread, which only
+    works while the main thread runs Tk's event loop, as it does in the apps."""
+    deadline = time.perf_counter() + timeout
+    if isinstance(root, _NoDisplay):
+        while not condition() and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        return condition()
+
+    def check():
+        if condition() or time.perf_counter() >= deadline:
+            root.quit()
+        else:
+            root.after(1, check)
+
+    root.after(1, check)
+    root.mainloop()
+    return condition()
+
+
+def _pump_first_frame(root, recorder, start, timeout=10):
+    """When the first frame from the capture opened after ``start`` was drawn, or None.
+
+    full_implementation.py hands out pooled captures without opening one, so
+    then it's simply the first frame after ``start``.
+    """
+    def frame():
+        opened = [t for t in recorder.opened_at if t >= start]
+        return recorder.first_frame_after(opened[-1] if opened else start)
+
+    _pump(root, lambda: frame() is not None, timeout)
+    return frame()
+
+
+def _legacy_stopped(player):
+    return player.cap is None or not player.cap.isOpened()
+
+
+def _legacy_stop(player, root):
+    if hasattr(player, "stop_video"):
+        player.stop_video()
+    # Let the old update_frame thread notice before the next play()
+    _pump(root, lambda: False, 0.2)
+
+
+def _legacy_session(variant, levels, recorder):
+    """(player, root, display) for a legacy script, instrumented through ``recorder``"""
+    import importlib
+
+    module = importlib.import_module(variant)
+    root, canvas = _open_display()
+    display = root is not None
+    if display:
+        label = tk.Label(root)
+    else:
+        root = canvas = label = _NoDisplay()
+    _instrument(module, recorder, display)
+    root.update = recorder.timed("redraw", root.update)
+    canvas.create_image = recorder.frame_hook(recorder.timed("canvas", canvas.create_image))
+    return _legacy_player(module, levels, root, canvas, label), root, display
+
+
+def _play_legacy(player, root, recorder, frames):
+    """Play from the start until ``frames`` more frames are drawn or the player stops by itself"""
+    shown = recorder.frames
+    player.play()
+    _pump(root, lambda: recorder.frames >= shown + frames or _legacy_stopped(player), frames / 5 + 30)
+
+
+def run_legacy(variant, path, target_path, frames, seeks):
+    """Play, switch and seek through a legacy script's own player class and update_frame thread"""
+    recorder = StageRecorder()
+    levels = {"Medium Quality": path, "High Quality": target_path}
+    player, root, display = _legacy_session(variant, levels, recorder)
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    _play_legacy(player, root, recorder, frames)
+    wall = (recorder.last_frame_at or time.perf_counter()) - wall_start
+    cpu = time.process_time() - cpu_start
+    played = recorder.frames
+    result = _playback_result(recorder, played, wall, cpu, display, recorder.stage_summaries())
+    _legacy_stop(player, root)
+
+    if not hasattr(player, "stop_video"):
+        # viedo.py can neither seek nor really switch quality
+        result["seek"] = result["switch"] = None
+    else:
+        # Quality switch one second in: their switch_quality stops and reopens everything
+        player.play()
+        shown = recorder.frames
+        _pump(root, lambda: recorder.frames >= shown + 30 or _legacy_stopped(player), 10)
+        start = time.perf_counter()
+        player.switch_quality("High Quality")
+        blocking = time.perf_counter() - start
+        shown_at = _pump_first_frame(root, recorder, start)
+        result["switch"] = {"blocking_ms": blocking * 1000,
+                            "latency_ms": (shown_at - start) * 1000} if shown_at else None
+        _legacy_stop(player, root)
+        player.current_quality = "Medium Quality"
+
+        # Their only way to seek: play(resume_time), which reopens the file and sets CAP_PROP_POS_MSEC
+        samples = []
+        for target in _seek_targets(path, seeks):
+            start = time.perf_counter()
+            player.play(target)
+            shown_at = _pump_first_frame(root, recorder, start)
+            if shown_at:
+                samples.append(shown_at - start)
+            _legacy_stop(player, root)
+        result["seek"] = _summary(samples)
+
+    if display:
+        root.destroy()
+    return result
+
+
+# ---------- soak ----------
+
+def current_rss_mb():
+    """Resident set size right now; outside Linux only the peak is available"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def run_soak(variant, path, frames, minutes, interval=10.0):
+    """Play ``path`` over and over for ``minutes``, sampling memory every ``interval`` seconds.
+
+    Each sample has the RSS, the memory traced by tracemalloc (Python objects
+    and NumPy/OpenCV arrays) and ``transient_mb``: how far traced memory rose
+    above that level during the interval. Arrays allocated per frame and
+    freed again show up there even when RSS stays flat.
+    """
+    import tracemalloc
+
+    recorder = StageRecorder(keep_samples=False)
+    if variant in ENGINE_VARIANTS:
+        import headless
+
+        root, sink = _engine_sink(recorder)
+
+        def play_once():
+            headless.play({"Medium Quality": path}, sink, build_seek_index=False, **_engine_options(variant))
+    else:
+        player, root, _ = _legacy_session(variant, {"Medium Quality": path}, recorder)
+
+        def play_once():
+            # Run to the end of the clip so update_frame stops the player on its own thread; stopping
+            # it from here releases the capture under a running read(), which original.py survives
+            # for a few hundred loops and then segfaults
+            player.play()
+            if _pump(root, lambda: _legacy_stopped(player), frames / 5 + 30):
+                _pump(root, lambda: False, 0.2)
+            else:
+                _legacy_stop(player, root)
+
+    megabyte = 1024 * 1024
+    samples = []
+    stop = threading.Event()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    def sample():
+        while not stop.wait(interval):
+            traced, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            samples.append({"elapsed_s": time.perf_counter() - start, "frames": recorder.frames,
+                            "rss_mb": current_rss_mb(), "traced_mb": traced / megabyte,
+                            "transient_mb": (peak - traced) / megabyte})
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    while time.perf_counter() - start < minutes * 60:
+        play_once()
+    stop.set()
+    sampler.join()
+    tracemalloc.stop()
+    if root is not None and not isinstance(root, _NoDisplay):
+        root.destroy()
+
+    elapsed = time.perf_counter() - start
+    # The first minute is warm-up: decoders, pools and caches reach their steady size
+    settled = [s for s in samples if s["elapsed_s"] >= 60] or samples
+    transient = sorted(s["transient_mb"] for s in samples)
+    return {
+        "soak_minutes": elapsed / 60,
+        "frames": recorder.frames,
+        "fps": recorder.frames / elapsed if elapsed else 0.0,
+        "rss_start_mb": settled[0]["rss_mb"] if settled else None,
+        "rss_end_mb": samples[-1]["rss_mb"] if samples else None,
+        "rss_max_mb": max((s["rss_mb"] for s in samples), default=None),
+        "rss_growth_mb_per_hour": ((settled[-1]["rss_mb"] - settled[0]["rss_mb"]) * 3600
+                                   / (settled[-1]["elapsed_s"] - settled[0]["elapsed_s"])
+                                   if len(settled) > 1 else None),
+        "transient_mb_p50": transient[len(transient) // 2] if transient else None,
+        "transient_mb_max": transient[-1] if transient else None,
+        "samples": samples,
+    }
+
+
+def measure_startup(runs=5, script="reuse.py"):
+    """Seconds from launching the Tk app to its window being drawn, and to the engine being ready"""
+    from startup import launch
+
+    samples = {}
+    for _ in range(runs):
+        marks, _ = launch(os.path.join(os.path.dirname(os.path.abspath(__file__)), script))
+        for name, seconds in marks.items():
+            samples.setdefault(name, []).append(seconds)
+    return {"runs": runs, "marks": {name: _summary(values) for name, values in samples.items()}}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(variant, resolution, path, target_path, frames, seeks, soak=0.0):
+    result = {"variant": variant, "resolution": resolution}
+    if soak:
+        result.update(run_soak(variant, path, frames, soak))
+    elif variant in ENGINE_VARIANTS:
+        result.update(run_engine(variant, path, target_path, seeks))
+    else:
+        result.update(run_legacy(variant, path, target_path, frames, seeks))
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+# ========================== Driver ==========================
+
+def run_suite(variants, resolutions, frames, workdir, seeks=10, soak=0.0):
+    clips = ensure_clips(workdir, set(resolutions) | {SWITCH_TARGETS[r] for r in resolutions}, frames)
+    results = []
+    for variant in variants:
+        for resolution in resolutions:
+            # One process per run so CPU time and peak RSS aren't shared between variants
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", variant, resolution,
+                   clips[resolution], clips[SWITCH_TARGETS[resolution]], "--frames", str(frames),
+                   "--seeks", str(seeks), "--soak", str(soak)]
+            print(f"⏱️ {variant} @ {resolution}", file=sys.stderr)
+            proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+            if proc.returncode != 0:
+                results.append({"variant": variant, "resolution": resolution, "error": proc.stderr.strip()[-2000:]})
+                continue
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "frames": frames,
+        "soak_minutes": soak,
+        "results": results,
+    }
+
+
+def find_regressions(report, baseline, tolerance):
+    """Runs whose decode fps dropped, or switch/seek latency (soak: peak RSS) grew, by more than ``tolerance``"""
+    previous = {(r["variant"], r["resolution"]): r for r in baseline.get("results", []) if "error" not in r}
+    regressions = []
+    old_startup = (baseline.get("startup") or {}).get("marks", {})
+    for name, summary in (report.get("startup") or {}).get("marks", {}).items():
+        old = old_startup.get(name)
+        if old and summary["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append(f"startup: time to {name} {old['p50_ms']:.2f} -> {summary['p50_ms']:.2f} ms")
+    for result in report["results"]:
+        old = previous.get((result["variant"], result["resolution"]))
+        if old is None or "error" in result:
+            continue
+        if "soak_minutes" in result or "soak_minutes" in old:
+            if "rss_max_mb" in result and "rss_max_mb" in old and old["rss_max_mb"]:
+                checks = [("rss_max_mb", result["rss_max_mb"], old["rss_max_mb"], True)]
+            else:
+                checks = []
+        else:
+            checks = [("decode_fps", result["decode_fps"], old["decode_fps"], False)]
+        # viedo.py can't seek or switch, and a run may time out on either
+        if result.get("seek") and old.get("seek"):
+            checks.append(("seek.p95_ms", result["seek"]["p95_ms"], old["seek"]["p95_ms"], True))
+        if result.get("switch") and old.get("switch"):
+            checks.append(("switch.blocking_ms", result["switch"]["blocking_ms"], old["switch"]["blocking_ms"], True))
+        for metric, new_value, old_value, lower_is_better in checks:
+            limit = old_value * (1 + tolerance) if lower_is_better else old_value * (1 - tolerance)
+            if (new_value > limit) if lower_is_better else (new_value < limit):
+                regressions.append(f"{result['variant']} @ {result['resolution']}: {metric} {old_value:.2f} -> {new_value:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every player variant on synthetic clips")
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seeks", type=int, default=10, help="Random seeks timed per run")
+    parser.add_argument("--soak", type=float, default=0.0, metavar="MINUTES",
+                        help="Instead, loop playback this long and sample RSS and traced memory (no seeks/switches)")
+    parser.add_argument("--workdir", default="benchclips")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--startup-runs", type=int, default=0,
+                        help="Also launch the Tk app this many times and time its window and readiness")
+    parser.add_argument("--worker", nargs=4, metavar=("VARIANT", "RESOLUTION", "PATH", "SWITCH_PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker, args.frames, args.seeks, args.soak)))
+        return 0
+
+    report = run_suite(args.variants.split(","), args.resolutions.split(","), args.frames, args.workdir, args.seeks, args.soak)
+    if args.startup_runs:
+        try:
+            report["startup"] = measure_startup(args.startup_runs)
+        except RuntimeError as e:
+            report["startup"] = {"error": str(e)}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1699 @@
+import cv2
+import numpy as np
+from ffpyplayer.player import MediaPlayer
+import threading
+from abc import ABC, abstractmethod
+from shared_frames import ProcessFrameSource
+from seek_index import SeekIndex
+from segments import SegmentedCapture
+from http_source import HttpConnectionPool, RemoteSegmentSource
+from prefetch_cache import CachedSegmentSource
+from media_capture import MediaPlayerCapture
+from subtitle_overlay import SubtitleOverlay
+from subtitle_store import SubtitleStore
+from thumbnails import ThumbnailSprites
+from metrics import PlaybackMetrics
+import time
+import os
+import math
+import heapq
+import itertools
+
+# ========================== State Pattern ==========================
+
+class PlayerState(ABC):
+    @abstractmethod
+    def play(self, context, resume_time=0): pass
+
+    @abstractmethod
+    def pause(self, context): pass
+
+    @abstractmethod
+    def resume(self, context): pass
+
+
+class PlayingState(PlayerState):
+    def play(self, context, resume_time=0): pass
+    def pause(self, context):
+        context._pause_internal()
+        context.set_state(PausedState())
+    def resume(self, context): pass
+
+
+class PausedState(PlayerState):
+    def play(self, context, resume_time=0):
+        context._play_internal(resume_time)
+        context.set_state(PlayingState())
+    def pause(self, context): pass
+    def resume(self, context):
+        context._resume_internal()
+        context.set_state(PlayingState())
+
+
+class StoppedState(PlayerState):
+    def play(self, context, resume_time=0):
+        context._play_internal(resume_time)
+        context.set_state(PlayingState())
+    def pause(self, context): pass
+    def resume(self, context): pass
+
+
+# ========================== Frame Pipeline ==========================
+
+class FrameRingBuffer:
+    """Bounded ring of ready-to-display frames between the decoder thread and the Tk loop.
+
+    The producer blocks once ``high_watermark`` frames are queued. After an
+    underrun (and at start-up) the consumer holds off until ``low_watermark``
+    frames are available again, so a single slow decode doesn't turn into
+    one stutter per frame.
+    """
+
+    def __init__(self, depth=8, high_watermark=None, low_watermark=None):
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.depth = depth
+        self.high_watermark = min(high_watermark or depth, depth)
+        self.low_watermark = min(low_watermark or max(1, depth // 4), self.high_watermark)
+        self._slots = [None] * depth
+        self._head = 0
+        self._count = 0
+        self._closed = False
+        self._rebuffering = True
+        self._cond = threading.Condition()
+        self.generation = 0  # bumped by clear(); frames decoded before a seek carry the old value
+
+        self.underruns = 0
+        self.frames_in = 0
+        self.frames_out = 0
+        self.peak_level = 0
+
+    def put(self, item, generation=None):
+        """Queue a frame, blocking while the buffer is at its high watermark.
+
+        Returns False if the buffer was closed, meaning the producer should stop.
+        A frame from before the last clear() (``generation`` is stale) is dropped.
+        """
+        with self._cond:
+            while self._count >= self.high_watermark and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return False
+            if generation is not None and generation != self.generation:
+                return True
+            self._slots[(self._head + self._count) % self.depth] = item
+            self._count += 1
+            self.frames_in += 1
+            self.peak_level = max(self.peak_level, self._count)
+            self._cond.notify_all()
+            return True
+
+    def _ready(self):
+        # Caller holds self._cond
+        if self._count == 0:
+            if not self._closed and not self._rebuffering:
+                self.underruns += 1
+                self._rebuffering = True
+            return False
+        if self._rebuffering and self._count < self.low_watermark and not self._closed:
+            return False
+        self._rebuffering = False
+        return True
+
+    def peek(self):
+        """Oldest frame without removing it, or None if nothing is ready"""
+        with self._cond:
+            return self._slots[self._head] if self._ready() else None
+
+    def get(self):
+        """Pop the oldest frame without blocking, or None if nothing is ready"""
+        with self._cond:
+            if not self._ready():
+                return None
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.depth
+            self._count -= 1
+            self.frames_out += 1
+            self._cond.notify()
+            return item
+
+    def wait(self, timeout=None):
+        """Block until peek() would return a frame or the stream has ended"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._closed or self._count >= (self.low_watermark if self._rebuffering else 1), timeout)
+
+    def clear(self):
+        with self._cond:
+            self._slots = [None] * self.depth
+            self._head = 0
+            self._count = 0
+            self._rebuffering = True
+            self.generation += 1
+            self._cond.notify_all()
+
+    def close(self):
+        """Mark end of stream; wakes a blocked producer"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def level(self):
+        with self._cond:
+            return self._count
+
+    @property
+    def drained(self):
+        with self._cond:
+            return self._closed and self._count == 0
+
+    def stats(self):
+        with self._cond:
+            return {
+                "depth": self.depth,
+                "level": self._count,
+                "high_watermark": self.high_watermark,
+                "low_watermark": self.low_watermark,
+                "underruns": self.underruns,
+                "frames_in": self.frames_in,
+                "frames_out": self.frames_out,
+                "peak_level": self.peak_level,
+                "rebuffering": self._rebuffering,
+            }
+
+
+# ========================== A/V Sync ==========================
+
+class AVClock:
+    """Master playback clock driven by the audio position of a ``MediaPlayer``.
+
+    ``now()`` re-anchors whenever ``get_pts()`` reports a new audio position and
+    extrapolates with ``perf_counter`` in between, so video can be scheduled
+    more finely than audio callbacks arrive and keeps running if the audio
+    track ends first. Without a player it is a plain wall clock.
+
+    ``now()`` belongs to the thread that drives playback. Other threads (the
+    decoder's late-frame checks, the metrics exporter) read ``position()``,
+    which never polls the player or moves the anchor. Frames are dropped on
+    both sides, so ``drop()`` counts them under a lock.
+    """
+
+    def __init__(self, player=None, start_pts=0.0, sync_threshold=0.010, drop_threshold=0.080):
+        self.player = player
+        self.sync_threshold = sync_threshold
+        self.drop_threshold = drop_threshold
+        # (pts, perf_counter time) swapped as one tuple, so position() never sees half an update
+        self._anchor = (start_pts, time.perf_counter())
+        self._last_audio_pts = None
+        self._paused = False
+        self._settling = False
+
+        self._counter_lock = threading.Lock()
+        self.drift = 0.0
+        self.max_drift = 0.0
+        self.presented = 0
+        self.dropped = 0
+        self.dropped_undecoded = 0
+        self.duplicated = 0
+
+    def now(self):
+        anchor_pts, anchor_time = self._anchor
+        if self._paused:
+            return anchor_pts
+        audio_pts = None
+        if self.player is not None:
+            try:
+                audio_pts = self.player.get_pts()
+            except Exception:
+                audio_pts = None
+        if audio_pts and math.isfinite(audio_pts) and audio_pts != self._last_audio_pts:
+            self._last_audio_pts = audio_pts
+            if self._settling:
+                # Right after a seek the player may still report the old position
+                extrapolated = anchor_pts + time.perf_counter() - anchor_time
+                if abs(audio_pts - extrapolated) > 0.5:
+                    return extrapolated
+                self._settling = False
+            self._anchor = (audio_pts, time.perf_counter())
+            return audio_pts
+        return anchor_pts + time.perf_counter() - anchor_time
+
+    def position(self):
+        """Extrapolated clock without touching the player or the anchor; safe to call from any thread"""
+        anchor_pts, anchor_time = self._anchor
+        return anchor_pts if self._paused else anchor_pts + time.perf_counter() - anchor_time
+
+    def pause(self):
+        if not self._paused:
+            self._anchor = (self.now(), time.perf_counter())
+            self._paused = True
+
+    def resume(self):
+        if self._paused:
+            self._anchor = (self._anchor[0], time.perf_counter())
+            self._paused = False
+
+    def reset(self, pts):
+        """Jump to ``pts`` after a seek; audio positions from before the seek are ignored"""
+        self._anchor = (pts, time.perf_counter())
+        self._settling = self.player is not None
+
+    def is_late(self, pts, now=None):
+        return pts < (self.now() if now is None else now) - self.drop_threshold
+
+    def drop(self, undecoded=False):
+        """Count a frame skipped for being late; called from the decoder and the render loop"""
+        with self._counter_lock:
+            self.dropped += 1
+            if undecoded:
+                self.dropped_undecoded += 1
+
+    def record_presented(self, pts, now):
+        self.presented += 1
+        self.drift = pts - now
+        self.max_drift = max(self.max_drift, abs(self.drift))
+
+    def stats(self):
+        """Counters for the HUD and the metrics exporter; read-only, so any thread may call it"""
+        return {
+            "clock": self.position(),
+            "drift": self.drift,
+            "max_drift": self.max_drift,
+            "presented": self.presented,
+            "dropped": self.dropped,
+            "dropped_undecoded": self.dropped_undecoded,
+            "duplicated": self.duplicated,
+        }
+
+
+class FreeRunClock(AVClock):
+    """Clock for as-fast-as-possible playback.
+
+    It stands still at the last presented frame, so no frame is ever late and
+    the next one is due as soon as the loop gets to it.
+    """
+
+    def __init__(self, start_pts=0.0):
+        # No frame is early either: an infinite sync threshold presents each one on the next tick
+        super().__init__(None, start_pts, sync_threshold=float("inf"))
+
+    def now(self):
+        return self._anchor[0]
+
+    def position(self):
+        return self._anchor[0]
+
+    def record_presented(self, pts, now):
+        super().record_presented(pts, now)
+        self._anchor = (pts, time.perf_counter())
+
+
+# ========================== Seamless Switching ==========================
+
+class StandbyDecoder:
+    """Opens and seeks a rendition in the background while the current one keeps playing.
+
+    Once ``ready`` is set, the decoder thread calls ``frame_for`` to advance the
+    standby capture to the frame that continues the current stream, and swaps
+    captures at that frame.
+    """
+
+    def __init__(self, quality, video_path, target_time, seek_index=None):
+        self.quality = quality
+        self.video_path = video_path
+        self.target_time = target_time
+        self.seek_index = seek_index
+        self.cap = None
+        self.pts = None
+        self.failed = False
+        self.ready = threading.Event()
+        self.requested_at = time.perf_counter()
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._warm_up, daemon=True)
+        self.thread.start()
+
+    def _warm_up(self):
+        cap = cv2.VideoCapture(self.video_path)
+        if cap.isOpened() and self.target_time > 0:
+            if self.seek_index:
+                self.seek_index.seek(cap, self.target_time)
+            else:
+                cap.set(cv2.CAP_PROP_POS_MSEC, self.target_time * 1000)
+        ok = cap.isOpened() and cap.grab()
+        with self._lock:
+            if self._cancelled or not ok:
+                cap.release()
+                self.failed = True
+            else:
+                self.cap = cap
+                self.pts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            self.ready.set()
+
+    def frame_for(self, next_pts, tolerance):
+        """Decoded frame whose timestamp is within ``tolerance`` of ``next_pts``.
+
+        Returns None while the standby is still ahead of the current stream; sets
+        ``failed`` if the rendition ends before reaching it.
+        """
+        while self.pts < next_pts - tolerance:
+            if not self.cap.grab():
+                self.failed = True
+                return None
+            self.pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if self.pts > next_pts + tolerance:
+            return None
+        ret, frame = self.cap.retrieve()
+        if not ret:
+            self.failed = True
+            return None
+        return frame
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+            self.failed = True
+
+
+# ========================== Adaptive Bitrate ==========================
+
+class AdaptiveBitrateController:
+    """Picks a rendition from decode cost, buffer health, drop rate and read throughput.
+
+    ``ladder`` lists quality names from lowest to highest. Stepping down is
+    quick when playback is visibly struggling; stepping up needs the current
+    rendition to have been comfortable for ``up_hold`` seconds and the next
+    rung's predicted cost (scaled by file size) to fit the frame budget. After
+    any switch both directions wait ``min_dwell`` seconds so it can't oscillate.
+    """
+
+    def __init__(self, ladder, sizes=None, interval=0.5, min_dwell=4.0, up_hold=10.0,
+                 down_load=0.85, up_load=0.55, down_drop_rate=0.05, up_drop_rate=0.01,
+                 down_buffer=0.25, up_buffer=0.75, min_throughput_margin=1.2, smoothing=0.1):
+        self.ladder = list(ladder)
+        self.sizes = sizes or {}
+        self.interval = interval
+        self.min_dwell = min_dwell
+        self.up_hold = up_hold
+        self.down_load = down_load
+        self.up_load = up_load
+        self.down_drop_rate = down_drop_rate
+        self.up_drop_rate = up_drop_rate
+        self.down_buffer = down_buffer
+        self.up_buffer = up_buffer
+        self.min_throughput_margin = min_throughput_margin
+        self.smoothing = smoothing
+
+        self.decode_time = None  # EWMA seconds per frame (read + prepare)
+        self.read_throughput = None  # EWMA bytes/second while reading
+        self.last_switch_at = time.perf_counter()
+        self.comfortable_since = None
+        self._last_counts = (0, 0)
+        self._last_evaluation = 0.0
+        self.last_decision = {}
+
+    def _ewma(self, current, sample):
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def observe_frame(self, decode_time, read_time, frame_bytes):
+        """Called by the decoder thread for every frame it prepares"""
+        self.decode_time = self._ewma(self.decode_time, decode_time)
+        if read_time > 0 and frame_bytes:
+            self.read_throughput = self._ewma(self.read_throughput, frame_bytes / read_time)
+
+    def on_switched(self):
+        self.decode_time = None
+        self.read_throughput = None
+        self.comfortable_since = None
+        self.last_switch_at = time.perf_counter()
+
+    def evaluate(self, current, frame_interval, buffer_fill, presented, dropped, frame_bytes=None):
+        """Quality to switch to, or None to stay on ``current``.
+
+        ``presented``/``dropped`` are the clock's running totals; the drop rate is
+        taken over the frames since the previous evaluation.
+        """
+        now = time.perf_counter()
+        if now - self._last_evaluation < self.interval or self.decode_time is None:
+            return None
+        self._last_evaluation = now
+
+        last_presented, last_dropped = self._last_counts
+        self._last_counts = (presented, dropped)
+        window = (presented - last_presented) + (dropped - last_dropped)
+        drop_rate = (dropped - last_dropped) / window if window else 0.0
+        load = self.decode_time / frame_interval
+        margin = None
+        if self.read_throughput and frame_bytes:
+            margin = self.read_throughput / (frame_bytes / frame_interval)
+
+        self.last_decision = {"load": load, "drop_rate": drop_rate, "buffer_fill": buffer_fill, "throughput_margin": margin}
+        if current not in self.ladder or now - self.last_switch_at < self.min_dwell:
+            return None
+        rung = self.ladder.index(current)
+
+        struggling = (load > self.down_load or drop_rate > self.down_drop_rate
+                      or (margin is not None and margin < self.min_throughput_margin)
+                      or (buffer_fill < self.down_buffer and load > self.up_load))
+        if struggling:
+            self.comfortable_since = None
+            return self.ladder[rung - 1] if rung > 0 else None
+
+        if rung + 1 >= len(self.ladder):
+            return None
+        cost_ratio = 1.0
+        if self.sizes.get(current) and self.sizes.get(self.ladder[rung + 1]):
+            cost_ratio = self.sizes[self.ladder[rung + 1]] / self.sizes[current]
+        comfortable = (load * cost_ratio < self.up_load and drop_rate <= self.up_drop_rate
+                       and buffer_fill >= self.up_buffer
+                       and (margin is None or margin / cost_ratio >= 2 * self.min_throughput_margin))
+        if not comfortable:
+            self.comfortable_since = None
+            return None
+        if self.comfortable_since is None:
+            self.comfortable_since = now
+        if now - self.comfortable_since >= self.up_hold:
+            return self.ladder[rung + 1]
+        return None
+
+
+# ========================== Sinks ==========================
+
+class FrameSink(ABC):
+    """Receives presented frames: BGR ``uint8`` arrays already scaled to the render size.
+
+    ``present`` runs on the engine's loop and must copy what it needs; the
+    array is reused for a later frame. It returns False once the sink can't
+    show frames any more (e.g. its window was closed), which ends playback.
+    """
+    metrics = PlaybackMetrics()  # replaced by the engine's own when the sink is attached
+
+    @abstractmethod
+    def present(self, frame, pts): pass
+
+    def set_viewport(self, viewport): pass
+
+    def overlay(self, text): pass  # HUD text, or None to hide it
+
+    def close(self): pass
+
+
+class SubtitleSink(ABC):
+    @abstractmethod
+    def show(self, text, time_s): pass
+
+
+class NullSink(FrameSink, SubtitleSink):
+    """Discards everything, counting frames for throughput runs"""
+
+    def __init__(self):
+        self.frames = 0
+        self.last_pts = None
+
+    def present(self, frame, pts):
+        self.frames += 1
+        self.last_pts = pts
+        return True
+
+    def show(self, text, time_s): pass
+
+
+class FileFrameSink(FrameSink):
+    """Writes presented frames to a video file, or to numbered images if ``path`` has a ``%d`` pattern"""
+
+    def __init__(self, path, fps=30, fourcc="mp4v"):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.writer = None
+        self.size = None
+        self.frames = 0
+
+    def present(self, frame, pts):
+        if "%" in self.path:
+            cv2.imwrite(self.path % self.frames, frame)
+        else:
+            if self.writer is None:
+                self.size = (frame.shape[1], frame.shape[0])
+                self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.size)
+            if (frame.shape[1], frame.shape[0]) != self.size:
+                # A container can't change resolution mid-stream
+                frame = cv2.resize(frame, self.size)
+            self.writer.write(frame)
+        self.frames += 1
+        return True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class FileSubtitleSink(SubtitleSink):
+    """Appends every subtitle change as a tab-separated ``seconds text`` line"""
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def show(self, text, time_s):
+        text = " ".join(text.splitlines())
+        self.file.write(f"{time_s:.3f}\t{text}\n")
+
+    def close(self):
+        self.file.close()
+
+
+class CallbackSink(FrameSink, SubtitleSink):
+    """Forwards frames and subtitle changes to plain callables"""
+
+    def __init__(self, on_frame=None, on_subtitle=None):
+        self.on_frame = on_frame
+        self.on_subtitle = on_subtitle
+
+    def present(self, frame, pts):
+        if self.on_frame:
+            return self.on_frame(frame, pts) is not False
+        return True
+
+    def show(self, text, time_s):
+        if self.on_subtitle:
+            self.on_subtitle(text, time_s)
+
+
+class HeadlessLoop:
+    """Stand-in for the Tk root's ``after``/``after_cancel`` when there is no display.
+
+    With ``realtime=False`` a timer fires as soon as every earlier one has, so
+    playback runs as fast as decoding allows.
+    """
+
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+        self._timers = []  # heap of (due, job, callback, args)
+        self._cancelled = set()
+        self._jobs = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+
+    def after(self, delay_ms, callback, *args):
+        with self._lock:
+            job = next(self._jobs)
+            heapq.heappush(self._timers, (time.perf_counter() + delay_ms / 1000, job, callback, args))
+        self._wake.set()
+        return job
+
+    def after_cancel(self, job):
+        with self._lock:
+            self._cancelled.add(job)
+
+    def quit(self):
+        self._running = False
+        self._wake.set()
+
+    def run(self, until=None):
+        """Fire timers until quit() is called or ``until()`` returns True"""
+        self._running = True
+        while self._running and not (until and until()):
+            with self._lock:
+                timer = self._timers[0] if self._timers else None
+            if timer is None:
+                self._wake.wait(0.05)
+                self._wake.clear()
+                continue
+            delay = timer[0] - time.perf_counter()
+            if self.realtime and delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            with self._lock:
+                due, job, callback, args = heapq.heappop(self._timers)
+                if job in self._cancelled:
+                    self._cancelled.discard(job)
+                    continue
+            callback(*args)
+
+
+# ========================== Decorator Pattern Core ==========================
+
+class IVideoPlayer(ABC):
+    @abstractmethod
+    def play(self, resume_time=0): pass
+    @abstractmethod
+    def pause(self): pass
+    @abstractmethod
+    def resume(self): pass
+    @abstractmethod
+    def stop_video(self): pass
+
+
+class BasicVideoPlayer(IVideoPlayer):
+    def __init__(self, video_path):
+        self.video_path = video_path
+        self.cap = None
+        self.player = None
+        self.paused = False
+
+    def play(self, resume_time=0):
+        self.stop_video()
+        self.cap = cv2.VideoCapture(self.video_path)
+        self.player = MediaPlayer(self.video_path)
+        if resume_time > 0:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, resume_time * 1000)
+        self.paused = False
+
+    def pause(self):
+        if self.player:
+            self.player.set_pause(True)
+            self.paused = True
+
+    def resume(self):
+        if self.player:
+            self.player.set_pause(False)
+            self.paused = False
+
+    def stop_video(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+        if self.player:
+            try:
+                self.player.close_player()
+            except Exception:
+                pass
+            self.player = None
+
+
+class VideoPlayerDecorator(IVideoPlayer):
+    def __init__(self, player: IVideoPlayer):
+        self._player = player
+    def play(self, resume_time=0): self._player.play(resume_time)
+    def pause(self): self._player.pause()
+    def resume(self): self._player.resume()
+    def stop_video(self): self._player.stop_video()
+
+
+# ========================== Feature Decorators ==========================
+
+class SubtitleDecorator(VideoPlayerDecorator):
+    def __init__(self, player, subtitles, subtitle_sink=None, overlay=False, language=None):
+        super().__init__(player)
+        self.subtitle_sink = subtitle_sink
+        # A single subtitle file or a SubtitleStore of several languages; tracks load in the background
+        self.store = subtitles if isinstance(subtitles, SubtitleStore) else SubtitleStore({"default": subtitles})
+        self.language = language or self.store.languages[0]
+        self.store.request(self.language)
+        # Burned into frames by the decoder instead of (or as well as) going to the sink
+        self.overlay = SubtitleOverlay() if overlay else None
+        self._shown_text = None
+
+    @property
+    def track(self):
+        """Current SubtitleTrack, or None while it is still loading"""
+        return self.store.loaded(self.language)
+
+    def switch_language(self, language):
+        """Show another track from now on; instant once the store has loaded it"""
+        if language not in self.store.sources:
+            print(f"⚠️ No {language} subtitles")
+            return
+        self.language = language
+        self.store.request(language)
+        self._shown_text = None
+
+    def display_subtitles(self, current_time):
+        track = self.track
+        if self.subtitle_sink is None or track is None:
+            return
+        text = track.lookup(int(current_time * 1000))
+        if text != self._shown_text:
+            self.subtitle_sink.show(text, current_time)
+            self._shown_text = text
+
+
+class QualitySwitchDecorator(VideoPlayerDecorator):
+    def __init__(self, player, quality_levels, frame_sink, root, subtitle_decorator=None,
+                 buffer_depth=8, high_watermark=None, low_watermark=None, switch_mode="seamless",
+                 frame_workers=0, build_seek_index=True, manifest_path=None, segment_cache_dir="segment_cache",
+                 build_thumbnails=True, cap_to_viewport=False, metrics_dir=None, metrics_interval=5.0,
+                 audio=True, realtime=True, initial_quality="Medium Quality", single_demux=False):
+        super().__init__(player)
+        self.quality_levels = quality_levels
+        self.current_quality = initial_quality if initial_quality in quality_levels else next(iter(quality_levels))
+        self.video_path = self.quality_levels[self.current_quality]
+        self.frame_sink = frame_sink
+        self.root = root  # anything with Tk's after()/after_cancel(): the Tk root or a HeadlessLoop
+        self.audio = audio  # False: no MediaPlayer, video runs on the wall clock
+        self.realtime = realtime  # False: present frames as fast as they decode (no audio)
+        self.subtitle_decorator = subtitle_decorator
+
+        self.cap = None
+        self.player = None
+        self.paused = False
+        self.current_time = 0
+        self.viewport = (800, 500)  # area the sink shows video in; frames are fitted into it
+        self.render_size = self.viewport  # size frames are currently scaled to
+        self._scaling_cache = {}  # (source width, height) -> (render size, interpolation)
+        self._viewport_job = None
+        self._frame_pool = []
+        self.play_thread = None
+        self.stop_event = threading.Event()
+        self.state = StoppedState()
+        self.lock = threading.Lock()  # to ensure thread-safe switching
+        self.resume_event = threading.Event()  # cleared while paused; the decoder blocks on it
+        self.resume_event.set()
+
+        self.buffer_depth = buffer_depth
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.frame_buffer = None
+        self.frame_interval_ms = 33
+        self._render_job = None
+        self._tick_due = 0.0  # perf_counter time the pending render tick was scheduled for
+        self.clock = None
+
+        # Stage timings are only collected while the HUD is shown or metrics are exported
+        self.metrics = PlaybackMetrics(self._metric_values, enabled=bool(metrics_dir))
+        self.metrics_dir = metrics_dir
+        if metrics_dir:
+            self.metrics.start_export(metrics_dir, metrics_interval)
+        frame_sink.metrics = self.metrics
+        self.hud_visible = False
+        self._hud_job = None
+
+        self.switch_mode = switch_mode  # "seamless" (standby decoder) or "restart"
+        self._standby = None
+        self._decode_pts = 0
+        self.last_switch = {}
+
+        self.abr = None  # AdaptiveBitrateController while quality is "auto"
+        self._frame_bytes = None  # average encoded bytes per frame of the current rendition
+        self._duration = 0  # seconds, read from the capture when it opens so the UI never calls cap.get()
+
+        self.frame_workers = frame_workers  # >0 decodes and resizes in that many worker processes
+        self.frame_source = None
+
+        # One MediaPlayer demuxes and decodes both audio and video; it paces frames itself, so only in realtime
+        self.single_demux = single_demux and realtime and not frame_workers and not manifest_path
+        if single_demux and not self.single_demux:
+            print("⚠️ Single-demux playback needs realtime local files without frame workers, using OpenCV")
+
+        self.manifest_path = manifest_path  # play packaged segments instead of whole files (local path or URL)
+        self.http_pool = HttpConnectionPool()
+        self.segment_cache_dir = segment_cache_dir
+        self.segment_cache = None  # CachedSegmentSource, kept across plays so re-watching stays local
+        self.seek_indexes = {}  # video path -> SeekIndex, filled in by a background thread
+        if build_seek_index and not manifest_path:
+            threading.Thread(target=self._load_seek_indexes, daemon=True).start()
+        self.thumbnails = None  # ThumbnailSprites of the lowest rendition, once generated
+
+        # Don't decode more pixels than the viewport can show; manual choices are capped too
+        self.cap_to_viewport = cap_to_viewport
+        self.preferred_quality = self.current_quality  # last quality chosen by hand
+        self.rendition_sizes = {}  # quality -> (width, height)
+        if cap_to_viewport and not manifest_path:
+            threading.Thread(target=self._probe_rendition_sizes, daemon=True).start()
+
+        # Seeking: requests coalesce into one slot that a single worker thread drains
+        self._seek_cond = threading.Condition()
+        self._seek_request = None  # (time_s, exact) not yet picked up by the worker
+        self._seek_generation = 0  # bumped per request; a running seek aborts once it is stale
+        self._seek_result = None  # (kind, frame, pts, generation) for the Tk loop to show
+        self._seek_busy = False
+        self._seek_thread = None
+        self._seek_poll_job = None
+        self._scrub_cap = None  # capture used for previews, kept open between drags
+        self._scrub_path = None
+        self._scrub_paused = False  # playback was paused by a drag and resumes on release
+        self.start_time = 0.0  # where play() starts from; a seek while stopped moves it
+        if build_thumbnails:
+            threading.Thread(target=self._load_thumbnails, daemon=True).start()
+
+    def set_state(self, state: PlayerState):
+        self.state = state
+
+    def _load_seek_indexes(self):
+        """Load (or build once and cache) the seek index of every rendition"""
+        for path in self.quality_levels.values():
+            if not os.path.exists(path):
+                continue
+            try:
+                self.seek_indexes[path] = SeekIndex.load_or_build(path)
+            except Exception as e:
+                print(f"⚠️ Could not index {path}: {e}")
+
+    def _load_thumbnails(self):
+        """Load (or generate once and cache) seek-preview sprites from the lowest rendition"""
+        path = self.quality_levels.get("Low Quality") or next(iter(self.quality_levels.values()))
+        if not os.path.exists(path):
+            return
+        try:
+            self.thumbnails = ThumbnailSprites.load_or_build(path)
+        except Exception as e:
+            print(f"⚠️ Could not generate thumbnails for {path}: {e}")
+
+    def thumbnail_at(self, time_s):
+        """Preview image for ``time_s`` cut from the sprite sheets, or None until they exist"""
+        return self.thumbnails.image_at(time_s) if self.thumbnails else None
+
+    def _seek(self, cap, video_path, time_s):
+        """Frame-accurate seek through the rendition's index, or OpenCV's own seek until it is ready"""
+        index = self.seek_indexes.get(video_path)
+        if index:
+            return index.seek(cap, time_s)
+        cap.set(cv2.CAP_PROP_POS_MSEC, time_s * 1000)
+        return time_s
+
+    # ---------- viewport ----------
+
+    def set_viewport(self, width, height):
+        """Area available for video; call from the engine's loop (in the app, on <Configure>)"""
+        viewport = (max(1, width), max(1, height))
+        if viewport == self.viewport:
+            return
+        self.viewport = viewport
+        self._scaling_cache = {}
+        self.frame_sink.set_viewport(viewport)
+        if self.cap_to_viewport:
+            # Resizing the window fires dozens of events; only act once it settles
+            if self._viewport_job is not None:
+                self.root.after_cancel(self._viewport_job)
+            self._viewport_job = self.root.after(300, self._apply_viewport_cap)
+
+    def _scaling(self, width, height):
+        """Size that fits a ``width`` x ``height`` frame into the viewport undistorted, and how to scale it"""
+        key = (width, height)
+        scaling = self._scaling_cache.get(key)
+        if scaling is None:
+            view_width, view_height = self.viewport
+            scale = min(view_width / width, view_height / height)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            if scale < 1:
+                interpolation = cv2.INTER_AREA  # averages source pixels instead of aliasing
+            elif scale <= 2:
+                interpolation = cv2.INTER_LINEAR
+            else:
+                interpolation = cv2.INTER_CUBIC  # large upscales (144p) come out soft rather than blocky
+            scaling = self._scaling_cache[key] = (size, interpolation)
+        return scaling
+
+    def _fit(self, frame):
+        size, interpolation = self._scaling(frame.shape[1], frame.shape[0])
+        return cv2.resize(frame, size, interpolation=interpolation)
+
+    def _probe_rendition_sizes(self):
+        for quality, path in self.quality_levels.items():
+            cap = cv2.VideoCapture(path)
+            if cap.isOpened():
+                self.rendition_sizes[quality] = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                                 int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            cap.release()
+
+    def _viewport_quality(self):
+        """Smallest rendition that still fills the viewport in at least one dimension"""
+        if not self.rendition_sizes:
+            return None
+        view_width, view_height = self.viewport
+        for quality in self.quality_levels:
+            size = self.rendition_sizes.get(quality)
+            if size and (size[0] >= view_width or size[1] >= view_height):
+                return quality
+        return list(self.quality_levels)[-1]
+
+    def _capped(self, quality):
+        """``quality`` limited to what the viewport needs, when capping is enabled"""
+        ceiling = self._viewport_quality() if self.cap_to_viewport else None
+        if ceiling is None or quality not in self.quality_levels:
+            return quality
+        return min(quality, ceiling, key=list(self.quality_levels).index)
+
+    def _apply_viewport_cap(self):
+        self._viewport_job = None
+        if not self.cap or not self.cap.isOpened():
+            return
+        # The ABR controller climbs back up by itself; otherwise return to the hand-picked quality
+        target = self._capped(self.current_quality if self.abr is not None else self.preferred_quality)
+        if target != self.current_quality:
+            print(f"🖥️ Viewport {self.viewport[0]}x{self.viewport[1]}: switching to {target}")
+            self.switch_quality(target, auto=True)
+
+    def duration(self):
+        """Length of the current video in seconds, or 0 if unknown"""
+        index = self.seek_indexes.get(self.video_path)
+        if index and index.pts_ms:
+            return index.pts_ms[-1] / 1000
+        return self._duration
+
+    # ---------- seeking ----------
+
+    def seek(self, time_s, exact=True):
+        """Seek to ``time_s``; call from the Tk loop.
+
+        Only the newest request is carried out, and a newer one aborts a seek
+        still in progress, so a fast drag costs at most one seek at a time.
+        ``exact=False`` (while dragging) shows the keyframe at or before the
+        target; ``exact=True`` (on release) moves playback to the exact frame.
+        """
+        if not exact and not self._scrub_paused and isinstance(self.state, PlayingState):
+            # Hold playback while scrubbing so the decoder doesn't compete with the previews
+            self.state.pause(self)
+            self._scrub_paused = True
+        if exact and isinstance(self.state, StoppedState):
+            # Nothing is playing to move; Play starts here instead
+            self.start_time = max(0.0, time_s)
+        with self._seek_cond:
+            self._seek_request = (max(0.0, time_s), exact)
+            self._seek_generation += 1
+            self._seek_cond.notify()
+        if self._seek_thread is None:
+            self._seek_thread = threading.Thread(target=self._seek_worker, daemon=True)
+            self._seek_thread.start()
+        if self._seek_poll_job is None:
+            self._seek_poll_job = self.root.after(10, self._poll_seek)
+
+    def _seek_stale(self, generation):
+        return generation != self._seek_generation
+
+    def _seek_worker(self):
+        while True:
+            with self._seek_cond:
+                while self._seek_request is None:
+                    self._seek_cond.wait()
+                (time_s, exact), generation = self._seek_request, self._seek_generation
+                self._seek_request = None
+                self._seek_busy = True
+            try:
+                if exact:
+                    result = self._seek_exact(time_s, generation)
+                else:
+                    result = self._seek_preview(time_s, generation)
+            except Exception as e:
+                print(f"⚠️ Seek to {time_s:.2f}s failed: {e}")
+                result = None
+            with self._seek_cond:
+                if result is not None:
+                    self._seek_result = result + (generation,)
+                self._seek_busy = False
+
+    def _scrub_capture(self, video_path):
+        if self._scrub_path != video_path:
+            if self._scrub_cap is not None:
+                self._scrub_cap.release()
+            self._scrub_cap = cv2.VideoCapture(video_path)
+            self._scrub_path = video_path
+        return self._scrub_cap
+
+    def _seek_preview(self, time_s, generation):
+        """Decode just the keyframe at or before ``time_s`` (or crop a thumbnail) for display while dragging"""
+        index = self.seek_indexes.get(self.video_path)
+        if index is None or not index.pts_ms:
+            image = self.thumbnail_at(time_s)
+            if image is not None:
+                frame = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+                return "preview", self._burn_subtitles(self._fit(frame), time_s), time_s
+            if self.manifest_path:
+                return None
+        cap = self._scrub_capture(self.video_path)
+        if index and index.pts_ms:
+            keyframe = index.keyframe_before(index.frame_at(time_s))
+            cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            pts = index.pts_ms[keyframe] / 1000
+        else:
+            cap.set(cv2.CAP_PROP_POS_MSEC, time_s * 1000)
+            pts = time_s
+        ok, frame = cap.read()
+        if not ok or self._seek_stale(generation):
+            return None
+        return "preview", self._burn_subtitles(self._fit(frame), pts), pts
+
+    def _seek_exact(self, time_s, generation):
+        """Move playback to the frame shown at ``time_s``; gives up as soon as a newer request arrives"""
+        if self.frame_source is not None:
+            # Worker processes own their decoders; restart them at the target instead
+            return "restart", None, time_s
+        if self.single_demux and self.cap is not None:
+            # ffmpeg seeks audio and video together to the exact frame; the demux loop shows it when due
+            with self.lock:
+                self.frame_buffer.clear()
+                self.cap.set(cv2.CAP_PROP_POS_MSEC, time_s * 1000)
+                self._decode_pts = time_s
+                if self.clock:
+                    self.clock.reset(time_s)
+            return "exact", None, time_s
+
+        with self.lock:
+            cap = self.cap
+            stopped = cap is None
+            if stopped:
+                if self.manifest_path:
+                    return None
+                cap = self._scrub_capture(self.video_path)
+            index = self.seek_indexes.get(self.video_path)
+            if index and index.pts_ms:
+                frame_number = index.frame_at(time_s)
+                keyframe = index.keyframe_before(frame_number)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+                for _ in range(frame_number - keyframe):
+                    if self._seek_stale(generation):
+                        return None
+                    cap.grab()
+                pts = index.pts_ms[frame_number] / 1000
+            else:
+                cap.set(cv2.CAP_PROP_POS_MSEC, time_s * 1000)
+                pts = time_s
+            if self._seek_stale(generation):
+                return None
+            # The target frame goes straight to the screen; the decoder carries on after it
+            ok, frame = cap.read()
+            if stopped:
+                return ("exact", self._burn_subtitles(self._fit(frame), pts), pts) if ok else None
+
+            if self._standby:
+                self._standby.cancel()
+                self._standby = None
+            self.frame_buffer.clear()
+            self._decode_pts = pts
+            if self.player:
+                self.player.seek(pts, relative=False)
+            if self.clock:
+                self.clock.reset(pts)
+            return "exact", self._burn_subtitles(self._fit(frame), pts) if ok else None, pts
+
+    def _poll_seek(self):
+        """Tk loop side of seeking: show the latest result and resume playback after a drag"""
+        self._seek_poll_job = None
+        with self._seek_cond:
+            result, self._seek_result = self._seek_result, None
+            pending = self._seek_busy or self._seek_request is not None
+            current = self._seek_generation
+
+        if result is not None:
+            kind, frame, pts, generation = result
+            if kind == "restart":
+                # A pause the user chose (rather than the drag) outlives the restart
+                keep_paused = isinstance(self.state, PausedState) and not self._scrub_paused
+                self._scrub_paused = False
+                self.stop_video()
+                self.play(pts)
+                if keep_paused:
+                    self.pause()
+            elif generation == current or kind == "exact":
+                if frame is not None:
+                    self.frame_sink.present(frame, pts)
+                self.current_time = pts
+                if self.subtitle_decorator:
+                    self.subtitle_decorator.display_subtitles(pts)
+            if kind == "exact" and generation == current and self._scrub_paused:
+                self._scrub_paused = False
+                self.state.resume(self)
+
+        if pending:
+            self._seek_poll_job = self.root.after(10, self._poll_seek)
+
+    def buffer_stats(self):
+        """Snapshot of the frame ring buffer (empty dict when nothing is playing)"""
+        return self.frame_buffer.stats() if self.frame_buffer else {}
+
+    def cache_stats(self):
+        """Hit/miss/prefetch counters of the segment cache (remote manifests only)"""
+        return self.segment_cache.stats() if self.segment_cache else {}
+
+    def sync_stats(self):
+        """Drift, drop and duplicate counters of the A/V clock"""
+        return self.clock.stats() if self.clock else {}
+
+    def _metric_values(self):
+        clock, buffer = self.sync_stats(), self.buffer_stats()
+        counters = {
+            "frames_presented": clock.get("presented", 0),
+            "frames_dropped": clock.get("dropped", 0),
+            "frames_dropped_undecoded": clock.get("dropped_undecoded", 0),
+            "frames_duplicated": clock.get("duplicated", 0),
+            "buffer_underruns": buffer.get("underruns", 0),
+        }
+        gauges = {
+            "buffer_level": buffer.get("level", 0),
+            "buffer_peak_level": buffer.get("peak_level", 0),
+            "av_drift_seconds": clock.get("drift", 0.0),
+        }
+        return counters, gauges
+
+    def toggle_hud(self):
+        """Show or hide the stage timing overlay; timing runs only while it is needed"""
+        self.hud_visible = not self.hud_visible
+        if self.hud_visible:
+            self.metrics.enabled = True
+            self._update_hud()
+        else:
+            self.metrics.enabled = bool(self.metrics_dir)
+            if self._hud_job is not None:
+                self.root.after_cancel(self._hud_job)
+                self._hud_job = None
+            self.frame_sink.overlay(None)
+
+    def _update_hud(self):
+        self.frame_sink.overlay(f"{self.current_quality}\n{self.metrics.hud_text()}")
+        self._hud_job = self.root.after(500, self._update_hud)
+
+    def set_auto_quality(self, enabled=True):
+        """Let the ABR controller pick renditions; any manual switch turns it off again"""
+        if not enabled:
+            self.abr = None
+            return
+        if self.single_demux:
+            # The controller reads decode headroom off the buffer fill, which single-demux never builds up
+            print("⚠️ Automatic quality needs read-ahead decoding, not available with single-demux playback")
+            return
+        if self.abr is None:
+            sizes = {q: os.path.getsize(p) for q, p in self.quality_levels.items() if os.path.exists(p)}
+            self.abr = AdaptiveBitrateController(self.quality_levels.keys(), sizes)
+            print("🤖 Automatic quality enabled")
+
+    def switch_subtitles(self, language):
+        """Change subtitle language mid-playback; call from the engine's loop"""
+        if self.subtitle_decorator is None:
+            return
+        self.subtitle_decorator.switch_language(language)
+        # Frames already burned in keep the old track until the ring buffer turns over
+        self.subtitle_decorator.display_subtitles(self.current_time)
+
+    def switch_quality(self, quality, auto=False):
+        """Switch video quality smoothly during playback"""
+        if quality == "auto":
+            self.set_auto_quality(True)
+            return
+        if quality not in self.quality_levels:
+            print(f"⚠️ No {quality} rendition available")
+            return
+        if not auto and self.abr is not None:
+            print("✋ Manual quality selected, automatic quality disabled")
+            self.abr = None
+        if not auto:
+            self.preferred_quality = quality
+            capped = self._capped(quality)
+            if capped != quality:
+                print(f"🖥️ {quality} is more than the viewport needs, using {capped}")
+                if capped == self.current_quality:
+                    return
+                quality = capped
+
+        if not self.cap or not self.cap.isOpened():
+            return
+
+        if self.manifest_path:
+            # Segment mode: the next segment is simply fetched from the other rendition
+            print(f"🔄 Switching to {quality} at the next segment boundary")
+            self.cap.request_rendition(quality)
+            return
+
+        # Worker processes own their decoders, and a single-demux player has no separate video decoder,
+        # so neither has a standby to warm up
+        if self.switch_mode == "seamless" and self.frame_source is None and not self.single_demux:
+            self._switch_seamless(quality)
+            return
+
+        with self.lock:
+            self.current_quality = quality
+            self.video_path = self.quality_levels[self.current_quality]
+
+            print(f"🔄 Switching to {self.current_quality} at {self.current_time:.2f}s")
+
+        # Stops the decoder thread and render timer, then releases the old rendition
+        decoder = self.play_thread
+        self.stop_video()
+
+        # play() clears stop_event, so the old decoder must be gone first; stop_video() only waits 0.5s
+        if decoder is not None and decoder is not threading.current_thread():
+            decoder.join(timeout=2.0)
+            if decoder.is_alive():
+                print("⚠️ Previous decoder thread is still running, restarting anyway")
+
+        # Restart playback from the last presented frame
+        self.play(self.current_time)
+
+    def _switch_seamless(self, quality):
+        """Warm up the target rendition in the background; the decoder swaps to it on its own"""
+        with self.lock:
+            if self._standby:
+                self._standby.cancel()
+                self._standby = None
+            if quality == self.current_quality:
+                return
+            print(f"🔄 Preparing {quality} at {self._decode_pts:.2f}s")
+            path = self.quality_levels[quality]
+            self._standby = StandbyDecoder(quality, path, self._decode_pts, self.seek_indexes.get(path))
+
+    def _take_standby_frame(self, pts, frame_interval):
+        """Swap to a ready standby decoder if it has the frame after ``pts``; caller holds self.lock"""
+        standby = self._standby
+        if standby is None or not standby.ready.is_set():
+            return None
+        next_pts = pts + frame_interval if pts is not None else standby.pts
+        frame = None if standby.failed else standby.frame_for(next_pts, frame_interval / 2)
+        if frame is None:
+            if standby.failed:
+                print(f"⚠️ Could not switch to {standby.quality}, staying on {self.current_quality}")
+                standby.cancel()
+                self._standby = None
+            return None
+
+        # The old audio player keeps running: every rendition carries the same soundtrack
+        self.cap.release()
+        self.cap = standby.cap
+        self._standby = None
+        self.last_switch = {
+            "from": self.current_quality,
+            "to": standby.quality,
+            "latency": time.perf_counter() - standby.requested_at,
+            "pts_error": standby.pts - next_pts,
+            "glitch_frames": abs(standby.pts - next_pts) / frame_interval,
+        }
+        self.current_quality = standby.quality
+        self.video_path = standby.video_path
+        self._frame_bytes = self._estimate_frame_bytes(self.cap, self.video_path)
+        self._duration = self._capture_duration(self.cap)
+        if self.abr:
+            self.abr.on_switched()
+        print(f"✅ Switched to {self.current_quality} at {standby.pts:.2f}s")
+        return frame
+
+    def _on_segment_rendition(self, quality):
+        """SegmentedCapture crossed a boundary into a newly requested rendition"""
+        self.last_switch = {"from": self.current_quality, "to": quality, "latency": 0.0, "glitch_frames": 0.0}
+        self.current_quality = quality
+        self._frame_bytes = self._estimate_frame_bytes(self.cap, self.video_path)
+        if self.abr:
+            self.abr.on_switched()
+        print(f"✅ Switched to {quality} at {self._decode_pts:.2f}s")
+
+    @staticmethod
+    def _capture_duration(cap):
+        if isinstance(cap, SegmentedCapture):
+            return cap.manifest["duration"]
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        return cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+
+    @staticmethod
+    def _estimate_frame_bytes(cap, video_path):
+        if isinstance(cap, SegmentedCapture):
+            rendition = cap.manifest["renditions"][cap.quality]
+            return rendition["bandwidth"] / 8 / rendition["fps"]
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if not frame_count or not os.path.exists(video_path):
+            return None
+        return os.path.getsize(video_path) / frame_count
+
+    def _evaluate_abr(self):
+        """Ask the ABR controller for a rendition; runs on the Tk loop"""
+        if self.abr is None or self._standby is not None or self.frame_buffer is None:
+            return
+        stats = self.frame_buffer.stats()
+        target = self.abr.evaluate(self.current_quality, self.frame_interval_ms / 1000,
+                                   stats["level"] / stats["high_watermark"],
+                                   self.clock.presented, self.clock.dropped, self._frame_bytes)
+        if target and self._capped(target) != self.current_quality:
+            target = self._capped(target)
+            print(f"🤖 Auto quality: {self.current_quality} -> {target} {self.abr.last_decision}")
+            self.switch_quality(target, auto=True)
+
+    def play(self, resume_time=None):
+        if resume_time is None:
+            resume_time, self.start_time = self.start_time, 0.0
+        self.state.play(self, resume_time)
+
+    def pause(self):
+        # Pausing mid-drag means the release must not resume playback
+        self._scrub_paused = False
+        self.state.pause(self)
+
+    def resume(self):
+        self._scrub_paused = False
+        self.state.resume(self)
+
+    def _play_internal(self, resume_time=0):
+        with self.lock:
+            self.stop_event.clear()
+            if self.cap_to_viewport and not self.manifest_path:
+                self.current_quality = self._capped(self.current_quality)
+                self.video_path = self.quality_levels[self.current_quality]
+            if self.manifest_path:
+                source = None
+                if self.manifest_path.startswith(("http://", "https://")):
+                    if self.segment_cache is None:
+                        origin = RemoteSegmentSource(self.manifest_path, self.http_pool)
+                        self.segment_cache = CachedSegmentSource(origin, self.segment_cache_dir)
+                    source = self.segment_cache
+                self.cap = SegmentedCapture(self.manifest_path, self.current_quality, source)
+                self.cap.on_rendition_change = self._on_segment_rendition
+                self.rendition_sizes = {quality: (rendition["width"], rendition["height"])
+                                        for quality, rendition in self.cap.manifest["renditions"].items()}
+                audio_path = self.cap.audio_path
+            elif self.single_demux:
+                self.cap = MediaPlayerCapture(self.video_path, resume_time, audio=self.audio)
+                audio_path = None
+            else:
+                self.cap = cv2.VideoCapture(self.video_path)
+                audio_path = self.video_path
+            self._decode_pts = resume_time
+            # Start audio at the same position as video so the audio clock is meaningful
+            if self.single_demux:
+                self.player = self.cap.player if self.audio else None
+            elif self.audio:
+                self.player = MediaPlayer(audio_path, ff_opts={'ss': resume_time} if resume_time > 0 else {})
+            self.paused = False
+            self.resume_event.set()
+
+            if resume_time > 0 and not self.single_demux:
+                self._seek(self.cap, self.video_path, resume_time)
+
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+            self.frame_interval_ms = max(1, int(1000 / fps))
+            self._frame_bytes = self._estimate_frame_bytes(self.cap, self.video_path)
+            self._duration = self._capture_duration(self.cap)
+            self.clock = AVClock(self.player, start_pts=resume_time) if self.realtime else FreeRunClock(resume_time)
+            source_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            if all(source_size):
+                self.render_size = self._scaling(*source_size)[0]
+            # Queued frames plus the one being presented plus the one being written
+            width, height = self.render_size
+            self._frame_pool = [np.empty((height, width, 3), np.uint8) for _ in range(self.buffer_depth + 2)]
+            # Single-demux frames arrive when they are due, so there is nothing to gain from prebuffering
+            low_watermark = 1 if self.single_demux else self.low_watermark
+            self.frame_buffer = FrameRingBuffer(self.buffer_depth, self.high_watermark, low_watermark)
+
+            if self.single_demux:
+                producer, args = self._demux_loop, (self.frame_buffer, self.cap)
+            elif self.frame_workers and not self.manifest_path:
+                # self.cap stays open for metadata only; the workers do the decoding
+                # With the seek index, worker chunks start on keyframes instead of seeking mid-GOP
+                self.frame_source = ProcessFrameSource(self.video_path, self.render_size, resume_time,
+                                                       workers=self.frame_workers, min_slots=self.buffer_depth + 3,
+                                                       seek_index=self.seek_indexes.get(self.video_path))
+                producer, args = self._collect_loop, (self.frame_buffer, self.frame_source)
+            else:
+                producer, args = self._decode_loop, (self.frame_buffer,)
+
+        self.play_thread = threading.Thread(target=producer, args=args, daemon=True)
+        self.play_thread.start()
+        self._schedule_render(self.frame_interval_ms)
+
+    def _decode_loop(self, frame_buffer):
+        """Producer: read, convert and resize frames into the ring buffer"""
+        clock = self.clock
+        frame_interval = self.frame_interval_ms / 1000
+        frame_pool = self._frame_pool
+        metrics = self.metrics
+        pool_index = 0
+        pts = None
+        read_buffer = None  # the last decoded frame; read() decodes into it again instead of allocating
+        generation = frame_buffer.generation
+        while not self.stop_event.is_set():
+            # Sleep without polling while paused; resume()/stop_video() wake us up
+            self.resume_event.wait()
+            if self.stop_event.is_set():
+                break
+
+            with self.lock:
+                if not self.cap or not self.cap.isOpened():
+                    break
+                if frame_buffer.generation != generation:
+                    # A seek moved the capture; the last pts no longer says anything about lateness
+                    generation = frame_buffer.generation
+                    pts = None
+                player = self.player
+                standby_frame = self._take_standby_frame(pts, frame_interval)
+                if standby_frame is not None:
+                    ret, frame = True, standby_frame
+                    pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                elif pts is not None and clock.is_late(pts + frame_interval, clock.position()):
+                    # Too far behind the clock to ever be shown: demux without decoding
+                    with metrics.stage("read"):
+                        ret = self.cap.grab()
+                    pts = self._decode_pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                    if ret:
+                        clock.drop(undecoded=True)
+                        continue
+                    break
+                else:
+                    read_start = time.perf_counter()
+                    ret, frame = self.cap.read(read_buffer)
+                    read_time = time.perf_counter() - read_start
+                    metrics.observe("read", read_time)
+                    pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                self._decode_pts = pts
+
+            if not ret:
+                break
+            # Nothing keeps the decoded frame past the resize below, so the next read can overwrite it
+            # (a new rendition's size makes OpenCV allocate once and we keep that array instead)
+            read_buffer = frame
+
+            if player is not None:
+                with metrics.stage("audio"):
+                    audio_frame, val = player.get_frame()
+                if val == 'eof':
+                    break
+
+            # Resize straight into a preallocated slot; BGR->RGB happens in PIL's raw decoder
+            size, interpolation = self._scaling(frame.shape[1], frame.shape[0])
+            if frame_pool[0].shape[1::-1] != size:
+                # Viewport or rendition changed; queued frames keep their old arrays
+                frame_pool = self._frame_pool = [np.empty((size[1], size[0], 3), np.uint8) for _ in frame_pool]
+                self.render_size = size
+            slot = frame_pool[pool_index]
+            pool_index = (pool_index + 1) % len(frame_pool)
+            with metrics.stage("resize"):
+                cv2.resize(frame, size, dst=slot, interpolation=interpolation)
+            self._burn_subtitles(slot, pts)
+            abr = self.abr
+            if abr is not None and standby_frame is None:
+                abr.observe_frame(time.perf_counter() - read_start, read_time, self._frame_bytes)
+            if not frame_buffer.put((slot, pts), generation):
+                break
+
+        frame_buffer.close()
+
+    def _demux_loop(self, frame_buffer, source):
+        """Producer in single-demux mode: resize the pictures the audio MediaPlayer decodes into the ring buffer"""
+        frame_pool = self._frame_pool
+        metrics = self.metrics
+        pool_index = 0
+        while not self.stop_event.is_set():
+            self.resume_event.wait()
+            if self.stop_event.is_set():
+                break
+
+            generation = frame_buffer.generation
+            # Blocks until the player's clock reaches the frame; the wait counts as read time
+            with metrics.stage("read"):
+                ret, frame = source.read(self.stop_event, self.resume_event)
+            if not ret:
+                break
+            pts = self._decode_pts = source.pts
+
+            size, interpolation = self._scaling(frame.shape[1], frame.shape[0])
+            if frame_pool[0].shape[1::-1] != size:
+                frame_pool = self._frame_pool = [np.empty((size[1], size[0], 3), np.uint8) for _ in frame_pool]
+                self.render_size = size
+            slot = frame_pool[pool_index]
+            pool_index = (pool_index + 1) % len(frame_pool)
+            with metrics.stage("resize"):
+                cv2.resize(frame, size, dst=slot, interpolation=interpolation)
+            self._burn_subtitles(slot, pts)
+            if not frame_buffer.put((slot, pts), generation):
+                break
+
+        frame_buffer.close()
+
+    def _burn_subtitles(self, frame, pts):
+        """Blend overlay-mode subtitles onto a prepared frame (decoder or seek thread)"""
+        overlay = self.subtitle_decorator.overlay if self.subtitle_decorator else None
+        if overlay is not None:
+            with self.metrics.stage("overlay"):
+                overlay.composite(frame, pts, self.subtitle_decorator.track)
+        return frame
+
+    def _collect_loop(self, frame_buffer, source):
+        """Producer when frame_workers > 0: pass shared-memory frames from the worker pool to the ring buffer"""
+        clock = self.clock
+        while not self.stop_event.is_set():
+            self.resume_event.wait()
+            if self.stop_event.is_set():
+                break
+
+            item = source.next_frame()
+            player = self.player
+            if item is None:
+                break
+            view, pts = item
+            self._decode_pts = pts
+            # Everything older than the ring buffer plus the frame on screen can be overwritten
+            source.release_before(source.next_index - self.buffer_depth - 2)
+
+            if player is not None:
+                with self.metrics.stage("audio"):
+                    audio_frame, val = player.get_frame()
+                if val == 'eof':
+                    break
+            if clock.is_late(pts, clock.position()):
+                clock.drop()
+                continue
+            self._burn_subtitles(view, pts)
+            if not frame_buffer.put((view, pts)):
+                break
+
+        frame_buffer.close()
+
+    def _render_tick(self):
+        """Consumer: runs on the Tk main loop and presents frames when the clock reaches their PTS"""
+        self._render_job = None
+        metrics = self.metrics
+        # How late Tk ran this tick: time the event loop spent on other work, including redraws
+        metrics.observe("tk", max(0.0, time.perf_counter() - self._tick_due))
+        frame_buffer = self.frame_buffer
+        clock = self.clock
+        if frame_buffer is None or self.stop_event.is_set():
+            return
+
+        if self.paused:
+            # No timer while paused; _resume_internal() restarts the render loop
+            return
+
+        now = clock.now()
+        item = frame_buffer.peek()
+        if item is None and not self.realtime:
+            # Nothing is ever late when free-running: wait for the decoder instead of counting a duplicate
+            frame_buffer.wait(0.5)
+            item = frame_buffer.peek()
+        while item is not None and clock.is_late(item[1], now):
+            frame_buffer.get()
+            clock.drop()
+            item = frame_buffer.peek()
+
+        if item is None:
+            if frame_buffer.drained:
+                self.stop_video()
+                return
+            # Nothing ready in time: the previous frame stays up for another interval
+            clock.duplicated += 1
+            self._schedule_render(self.frame_interval_ms)
+            return
+
+        slot, pts = item
+        if pts - now > clock.sync_threshold:
+            # Early: sleep exactly until the frame is due
+            self._schedule_render(int((pts - now) * 1000))
+            return
+
+        frame_buffer.get()
+        if not self.frame_sink.present(slot, pts):
+            # The sink is gone (e.g. the window was closed)
+            return
+        clock.record_presented(pts, now)
+        self._evaluate_abr()
+        self.current_time = pts
+        if self.subtitle_decorator:
+            with metrics.stage("subtitle"):
+                self.subtitle_decorator.display_subtitles(self.current_time)
+
+        next_item = frame_buffer.peek() if frame_buffer.level else None
+        if next_item is not None:
+            delay_ms = int((next_item[1] - clock.now()) * 1000)
+        else:
+            delay_ms = self.frame_interval_ms
+        self._schedule_render(max(1, delay_ms))
+
+    def _schedule_render(self, delay_ms):
+        self._tick_due = time.perf_counter() + delay_ms / 1000
+        self._render_job = self.root.after(delay_ms, self._render_tick)
+
+    def _pause_internal(self):
+        if self.cap:
+            player = self.cap.player if self.single_demux else self.player
+            if player:
+                player.set_pause(True)
+            self.paused = True
+            self.resume_event.clear()
+            if self.clock:
+                self.clock.pause()
+
+    def _resume_internal(self):
+        if self.cap:
+            player = self.cap.player if self.single_demux else self.player
+            if player:
+                player.set_pause(False)
+            self.paused = False
+            self.resume_event.set()
+            if self.clock:
+                self.clock.resume()
+            if self._render_job is None:
+                self._schedule_render(0)
+
+    def stop_video(self):
+        self.stop_event.set()
+        self.resume_event.set()
+        if self.frame_buffer:
+            self.frame_buffer.close()
+        if self._render_job is not None:
+            try:
+                self.root.after_cancel(self._render_job)
+            except Exception:
+                # The Tk root may already be destroyed
+                pass
+            self._render_job = None
+        if self.play_thread and self.play_thread.is_alive() and self.play_thread is not threading.current_thread():
+            self.play_thread.join(timeout=0.5)
+        if self.frame_source:
+            # Drop the queued shared-memory views before the segment is unmapped
+            self.frame_buffer.clear()
+            self.frame_source.close()
+            self.frame_source = None
+
+        with self.lock:
+            if self._standby:
+                self._standby.cancel()
+                self._standby = None
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+            self._duration = 0
+            if self.player and self.single_demux:
+                self.player = None  # closed with its MediaPlayerCapture
+            if self.player:
+                try:
+                    self.player.close_player()
+                except Exception:
+                    pass
+                self.player = None
+            self.set_state(StoppedState())
+
+
+# ========================== Mediator Pattern ==========================
+
+class ControlMediator:
+    def __init__(self, video_player):
+        self.video_player = video_player
+
+    def handle_action(self, action, **kwargs):
+        if action == "play":
+            self.video_player.play()
+        elif action == "pause":
+            self.video_player.pause()
+        elif action == "resume":
+            self.video_player.resume()
+        elif action == "toggle_hud":
+            self.video_player.toggle_hud()
+        elif action == "seek":
+            # preview=True while the seek bar is dragged, False once it is released
+            self.video_player.seek(kwargs.get("time", 0), exact=not kwargs.get("preview", False))
+        elif action == "switch_subtitles":
+            self.video_player.switch_subtitles(kwargs.get("language"))
+        elif action == "switch_quality":
+            # "auto" hands quality to the ABR controller; a named quality overrides it
+            quality = kwargs.get("quality")
+            self.video_player.switch_quality(quality)
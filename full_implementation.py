@@ -5,39 +5,234 @@ from ttkthemes import ThemedTk
 from ttkthemes import ThemedStyle
 from ffpyplayer.player import MediaPlayer
 import threading
+import time
+from collections import OrderedDict
 import pysubs2
 from PIL import Image, ImageTk
 from abc import ABC, abstractmethod
 
 # ========================== Flyweight Pattern ==========================
 
+class _PoolEntry:
+    def __init__(self, kind, path, handle):
+        self.kind = kind
+        self.path = path
+        self.handle = handle
+        self.in_use = True
+        self.retired = False  # reset while checked out: closed when it comes back
+        self.last_used = time.monotonic()
+
+
 class MediaFactory:
-    _video_caps = {}
-    _media_players = {}
+    """Pool of open VideoCapture/MediaPlayer handles keyed by path.
+
+    A handle belongs to one caller at a time: checking one out takes an idle
+    handle for that path if there is one, otherwise a fresh one is opened.
+    Returning a handle rewinds it and keeps it open, so reopening a recently
+    used rendition is a list lookup. At most ``max_open`` handles stay open:
+    idle ones are evicted least recently used first, and any left idle for
+    ``idle_timeout`` seconds are closed by a background reaper.
+    """
+    max_open = 6
+    idle_timeout = 120.0
+
+    _lock = threading.RLock()
+    _pool = OrderedDict()  # id(handle) -> _PoolEntry, least recently used first
+    _reaper = None
+    hits = 0
+    misses = 0
+    evictions = 0
+
+    @classmethod
+    def configure(cls, max_open=None, idle_timeout=None):
+        with cls._lock:
+            if max_open is not None:
+                cls.max_open = max_open
+            if idle_timeout is not None:
+                cls.idle_timeout = idle_timeout
+            victims = cls._evict(0)
+        cls._close_entries(victims)
 
     @staticmethod
     def get_video_capture(path):
-        if path not in MediaFactory._video_caps:
-            MediaFactory._video_caps[path] = cv2.VideoCapture(path)
-        return MediaFactory._video_caps[path]
+        return MediaFactory._acquire("video", path)
 
     @staticmethod
     def get_media_player(path):
-        if path not in MediaFactory._media_players:
-            MediaFactory._media_players[path] = MediaPlayer(path)
-        return MediaFactory._media_players[path]
+        return MediaFactory._acquire("audio", path)
+
+    @staticmethod
+    def release_video_capture(cap):
+        MediaFactory._release(cap)
+
+    @staticmethod
+    def release_media_player(player):
+        MediaFactory._release(player)
+
+    @classmethod
+    def discard(cls, handle):
+        """Forget a checked-out handle a worker may still be reading; it closes when its last reference goes"""
+        with cls._lock:
+            cls._pool.pop(id(handle), None)
 
     @staticmethod
     def reset_video_capture(path):
-        if path in MediaFactory._video_caps:
-            MediaFactory._video_caps[path].release()
-            del MediaFactory._video_caps[path]
+        """Close the captures for ``path``: idle ones now, checked-out ones when they are returned"""
+        MediaFactory._drop(lambda entry: entry.kind == "video" and entry.path == path)
 
     @staticmethod
     def reset_media_player(path):
-        if path in MediaFactory._media_players:
-            MediaFactory._media_players[path].close_player()
-            del MediaFactory._media_players[path]
+        """Close the players for ``path``: idle ones now, checked-out ones when they are returned"""
+        MediaFactory._drop(lambda entry: entry.kind == "audio" and entry.path == path)
+
+    @classmethod
+    def close_all(cls):
+        cls._drop(lambda entry: True)
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            return {
+                "open": len(cls._pool),
+                "in_use": sum(1 for entry in cls._pool.values() if entry.in_use),
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "evictions": cls.evictions,
+            }
+
+    # ---------- internals ----------
+
+    @staticmethod
+    def _open(kind, path):
+        if kind == "video":
+            return cv2.VideoCapture(path)
+        return MediaPlayer(path)
+
+    @staticmethod
+    def _rewind(kind, handle):
+        """Put a returned handle back at a known position: the start, paused"""
+        if kind == "video":
+            handle.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        else:
+            handle.set_pause(True)
+            handle.seek(0, relative=False)
+
+    @classmethod
+    def _acquire(cls, kind, path):
+        stale = []
+        with cls._lock:
+            # Most recently returned first: it is the likeliest to still be warm
+            for key, entry in reversed(list(cls._pool.items())):
+                if entry.in_use or entry.kind != kind or entry.path != path:
+                    continue
+                if kind == "video" and not entry.handle.isOpened():
+                    stale.append(cls._pool.pop(key))
+                    continue
+                entry.in_use = True
+                entry.last_used = time.monotonic()
+                cls._pool.move_to_end(key)
+                cls.hits += 1
+                break
+            else:
+                entry = None
+                cls.misses += 1
+        cls._close_entries(stale)
+        if entry is not None:
+            return entry.handle
+
+        # Opening a file can take a while; don't hold up everyone else's checkouts meanwhile
+        handle = cls._open(kind, path)
+        with cls._lock:
+            cls._pool[id(handle)] = _PoolEntry(kind, path, handle)
+            victims = cls._evict(0)
+            cls._start_reaper()
+        cls._close_entries(victims)
+        return handle
+
+    @classmethod
+    def _release(cls, handle):
+        with cls._lock:
+            entry = cls._pool.get(id(handle))
+            if entry is None or not entry.in_use:
+                return
+            if entry.retired:
+                del cls._pool[id(handle)]
+        if entry.retired:
+            cls._close_entries([entry])
+            return
+        try:
+            # Still checked out, so no one else can be using it while it rewinds
+            cls._rewind(entry.kind, handle)
+        except Exception:
+            with cls._lock:
+                cls._pool.pop(id(handle), None)
+            cls._close_entries([entry])
+            return
+        with cls._lock:
+            if entry.retired:
+                # Reset while it was rewinding
+                cls._pool.pop(id(handle), None)
+                victims = [entry]
+            else:
+                entry.in_use = False
+                entry.last_used = time.monotonic()
+                victims = cls._evict(0)
+        cls._close_entries(victims)
+
+    @classmethod
+    def _evict(cls, idle_for):
+        """Unlink idle handles: LRU ones over max_open, and any idle longer than ``idle_for`` if set.
+
+        Caller holds the lock; returns the entries for ``_close_entries`` to close after releasing it.
+        """
+        now = time.monotonic()
+        victims = []
+        for key, entry in list(cls._pool.items()):
+            if entry.in_use:
+                continue
+            if len(cls._pool) > cls.max_open or (idle_for and now - entry.last_used > idle_for):
+                victims.append(cls._pool.pop(key))
+                cls.evictions += 1
+        return victims
+
+    @classmethod
+    def _drop(cls, matches):
+        idle = []
+        with cls._lock:
+            for key, entry in list(cls._pool.items()):
+                if not matches(entry):
+                    continue
+                if entry.in_use:
+                    # Its owner may be reading it right now; close it once it comes back
+                    entry.retired = True
+                else:
+                    idle.append(cls._pool.pop(key))
+        cls._close_entries(idle)
+
+    @staticmethod
+    def _close_entries(entries):
+        for entry in entries:
+            try:
+                if entry.kind == "video":
+                    entry.handle.release()
+                else:
+                    entry.handle.close_player()
+            except Exception:
+                pass
+
+    @classmethod
+    def _start_reaper(cls):
+        if cls._reaper is None:
+            cls._reaper = threading.Thread(target=cls._reap_idle, daemon=True)
+            cls._reaper.start()
+
+    @classmethod
+    def _reap_idle(cls):
+        while True:
+            time.sleep(max(1.0, cls.idle_timeout / 4))
+            with cls._lock:
+                victims = cls._evict(cls.idle_timeout)
+            cls._close_entries(victims)
 
 # ========================== Decorator Pattern Core ==========================
 
@@ -136,6 +331,9 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
         self.subtitle_decorator = subtitle_decorator
         self.current_time = 0
         self.thread = None
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.stop_event = threading.Event()
 
     def switch_quality(self, quality):
         if self.cap:
@@ -146,26 +344,33 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
         self.play(self.current_time)
 
     def play(self, resume_time=0):
+        # Pressing Play again restarts; never let two threads share one decoder
+        self.stop_video()
         self.video_path = self.quality_levels[self.current_quality]
-        MediaFactory.reset_video_capture(self.video_path)
-        MediaFactory.reset_media_player(self.video_path)
-        self.cap = MediaFactory.get_video_capture(self.video_path)
-        self.player = MediaFactory.get_media_player(self.video_path)
+        # Pooled handles come back rewound and paused; reuse them instead of reopening
+        cap = self.cap = MediaFactory.get_video_capture(self.video_path)
+        player = self.player = MediaFactory.get_media_player(self.video_path)
         self.paused = False
+        self.resume_event.set()
+        # A fresh event per playback, so a thread that outlived stop_video() never picks up again
+        stop_event = self.stop_event = threading.Event()
 
         if resume_time > 0:
-            self.cap.set(cv2.CAP_PROP_POS_MSEC, resume_time * 1000)
+            cap.set(cv2.CAP_PROP_POS_MSEC, resume_time * 1000)
+            player.seek(resume_time, relative=False)
+        player.set_pause(False)
 
         def update_frame():
             retry_count = 0
             max_retries = 10
 
-            while self.cap.isOpened():
+            while not stop_event.is_set() and cap.isOpened():
                 if self.paused:
-                    self.root.after(10)
+                    # Block until resume()/stop_video() instead of spinning
+                    self.resume_event.wait()
                     continue
 
-                ret, frame = self.cap.read()
+                ret, frame = cap.read()
 
                 if not ret:
                     retry_count += 1
@@ -182,11 +387,11 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
                 self.photo = ImageTk.PhotoImage(image=Image.fromarray(frame))
                 self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
 
-                audio_frame, val = self.player.get_frame()
+                audio_frame, val = player.get_frame()
                 if val != "eof" and audio_frame:
-                    self.player.get_frame()
+                    player.get_frame()
 
-                self.current_time = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                self.current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
 
                 if self.subtitle_decorator:
                     self.subtitle_decorator.display_subtitles(self.current_time)
@@ -194,7 +399,8 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
                 self.root.update()
                 self.root.after(15)
 
-            self.stop_video()
+            if not stop_event.is_set():
+                self.stop_video()
 
         self.thread = threading.Thread(target=update_frame, daemon=True)
         self.thread.start()
@@ -203,18 +409,34 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
         if self.player:
             self.player.set_pause(True)
             self.paused = True
+            self.resume_event.clear()
 
     def resume(self):
         if self.player:
             self.player.set_pause(False)
             self.paused = False
+            self.resume_event.set()
 
     def stop_video(self):
+        self.stop_event.set()
+        self.resume_event.set()
+        still_reading = False
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=0.5)
+            # Tk may hold the thread up; don't rewind handles it could still be reading
+            still_reading = self.thread.is_alive()
+        # Hand the handles back to the pool instead of closing them
         if self.cap:
-            MediaFactory.reset_video_capture(self.video_path)
+            if still_reading:
+                MediaFactory.discard(self.cap)
+            else:
+                MediaFactory.release_video_capture(self.cap)
             self.cap = None
         if self.player:
-            MediaFactory.reset_media_player(self.video_path)
+            if still_reading:
+                MediaFactory.discard(self.player)
+            else:
+                MediaFactory.release_media_player(self.player)
             self.player = None
 
 # ========================== GUI Setup ==========================
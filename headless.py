@@ -0,0 +1,106 @@
+import argparse
+import json
+import sys
+import time
+
+import cv2
+
+from engine import (BasicVideoPlayer, FileFrameSink, FileSubtitleSink, HeadlessLoop, NullSink,
+                    QualitySwitchDecorator, StoppedState, SubtitleDecorator)
+
+# ========================== Headless Playback ==========================
+
+
+def play(quality_levels, frame_sink, subtitle_sink=None, subtitle_path=None, realtime=False, audio=None,
+         viewport=(800, 500), start=0.0, burn_subtitles=False, on_play=None, **engine_options):
+    """Play to the end without a display; returns the engine once it has stopped.
+
+    As fast as possible by default (no audio, frames are never dropped);
+    ``realtime=True`` paces frames on the audio clock like the Tk app does.
+    ``on_play(engine)`` runs once playback has started, e.g. to schedule a
+    quality switch on ``engine.root``.
+    """
+    loop = HeadlessLoop(realtime=realtime)
+    base_player = BasicVideoPlayer(next(iter(quality_levels.values())))
+    subtitle_decorator = None
+    if subtitle_path:
+        subtitle_decorator = SubtitleDecorator(base_player, subtitle_path, subtitle_sink or NullSink(),
+                                               overlay=burn_subtitles)
+        # Free-running output would otherwise start without subtitles while the track loads
+        subtitle_decorator.store.get(subtitle_decorator.language)
+    engine_options.setdefault("build_seek_index", start > 0)
+    engine_options.setdefault("build_thumbnails", False)
+    engine = QualitySwitchDecorator(subtitle_decorator or base_player, quality_levels, frame_sink, loop,
+                                    subtitle_decorator, audio=realtime if audio is None else audio,
+                                    realtime=realtime, **engine_options)
+    engine.set_viewport(*viewport)
+    # Stage timings feed the summary; next to decoding they cost next to nothing
+    engine.metrics.enabled = True
+    engine.play(start)
+    if isinstance(frame_sink, FileFrameSink) and engine.cap is not None:
+        frame_sink.fps = engine.cap.get(cv2.CAP_PROP_FPS) or frame_sink.fps
+    if on_play:
+        on_play(engine)
+    loop.run(until=lambda: isinstance(engine.state, StoppedState))
+    engine.stop_video()
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a video without a display (CI, servers, throughput tests)")
+    parser.add_argument("video", nargs="?", help="Single rendition to play (or use --rendition / --manifest)")
+    parser.add_argument("--rendition", action="append", metavar="QUALITY=PATH",
+                        help='e.g. "Low Quality=videofolder/Natural_144p.mp4" (repeatable, lowest first)')
+    parser.add_argument("--quality", default="Medium Quality", help="Rendition to start with")
+    parser.add_argument("--manifest", help="Packaged manifest (path or URL) to play segment by segment")
+    parser.add_argument("--subtitles")
+    parser.add_argument("--realtime", action="store_true", help="Pace frames like the player instead of free-running")
+    parser.add_argument("--no-audio", action="store_true", help="With --realtime, pace on the wall clock")
+    parser.add_argument("--output", help="Write frames to this video file or image pattern (e.g. frames/%%05d.png)")
+    parser.add_argument("--subtitle-output", help="Write subtitle changes to this file")
+    parser.add_argument("--burn-subtitles", action="store_true", help="Render --subtitles into the output frames")
+    parser.add_argument("--size", default="800x500", help="Viewport frames are fitted into")
+    parser.add_argument("--start", type=float, default=0.0)
+    parser.add_argument("--frame-workers", type=int, default=0)
+    parser.add_argument("--single-demux", action="store_true",
+                        help="With --realtime, decode audio and video with one MediaPlayer")
+    parser.add_argument("--metrics-dir")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    quality_levels = dict(item.split("=", 1) for item in args.rendition or [])
+    if args.video:
+        quality_levels.setdefault(args.quality, args.video)
+    if not quality_levels:
+        parser.error("give a video or at least one --rendition")
+    width, height = (int(n) for n in args.size.lower().split("x"))
+
+    frame_sink = FileFrameSink(args.output) if args.output else NullSink()
+    subtitle_sink = FileSubtitleSink(args.subtitle_output) if args.subtitle_output else NullSink()
+    started = time.perf_counter()
+    try:
+        engine = play(quality_levels, frame_sink, subtitle_sink, args.subtitles, realtime=args.realtime,
+                      audio=args.realtime and not args.no_audio, viewport=(width, height), start=args.start,
+                      burn_subtitles=args.burn_subtitles,
+                      initial_quality=args.quality, manifest_path=args.manifest, frame_workers=args.frame_workers,
+                      metrics_dir=args.metrics_dir, single_demux=args.single_demux)
+    finally:
+        frame_sink.close()
+        if isinstance(subtitle_sink, FileSubtitleSink):
+            subtitle_sink.close()
+    elapsed = time.perf_counter() - started
+
+    summary = {"elapsed": elapsed, "sync": engine.sync_stats(), "buffer": engine.buffer_stats(),
+               "stages": engine.metrics.snapshot()["stages"]}
+    presented = summary["sync"].get("presented", 0)
+    summary["fps"] = presented / elapsed if elapsed else 0.0
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"🏁 {presented} frames in {elapsed:.2f}s ({summary['fps']:.1f} fps), "
+              f"{summary['sync'].get('dropped', 0)} dropped, {summary['buffer'].get('underruns', 0)} underruns")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
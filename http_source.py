@@ -0,0 +1,163 @@
+import http.client
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urljoin, urlsplit
+
+# ========================== HTTP Connection Pool ==========================
+
+
+class HttpConnectionPool:
+    """Persistent HTTP/1.1 connections per host, reused across requests.
+
+    A connection goes back to the idle list only after its response has been
+    read completely. A request on a connection the server has already closed
+    (or that drops mid-body) is retried once on a fresh one; a body streamed
+    to a sink is rewound first, so a retry never appends to a partial one.
+    """
+
+    def __init__(self, max_idle_per_host=4, timeout=10.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def _connection(self, scheme, netloc):
+        with self._lock:
+            idle = self._idle[(scheme, netloc)]
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.opened += 1
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    def _give_back(self, scheme, netloc, conn):
+        with self._lock:
+            idle = self._idle[(scheme, netloc)]
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, url, headers=None, sink=None, chunk_size=1 << 20):
+        """GET ``url``; returns (status, headers, body), or writes the body to ``sink`` and returns None as body"""
+        parts = urlsplit(url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        sink_start = sink.tell() if sink is not None else None
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", target, headers=headers or {})
+                response = conn.getresponse()
+                if sink is None:
+                    body = response.read()
+                else:
+                    body = None
+                    while True:
+                        chunk = response.read(chunk_size)
+                        if not chunk:
+                            break
+                        sink.write(chunk)
+                    if response.length:
+                        # read(n) just returns short when the server goes away mid-body
+                        raise http.client.IncompleteRead(b"", response.length)
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.BadStatusLine,
+                    http.client.IncompleteRead):
+                conn.close()
+                if attempt:
+                    raise
+                if sink is not None:
+                    # Throw away whatever the dropped connection already delivered
+                    sink.seek(sink_start)
+                    sink.truncate()
+                continue
+            if response.will_close:
+                conn.close()
+            else:
+                self._give_back(parts.scheme, parts.netloc, conn)
+            return response.status, dict(response.getheaders()), body
+
+    def fetch_range(self, url, start, end):
+        status, _, body = self.request(url, {"Range": f"bytes={start}-{end}"})
+        if status not in (200, 206):
+            raise IOError(f"GET {url} returned {status}")
+        # A server without range support sends the whole file
+        return body if status == 206 else body[start:end + 1]
+
+    def download(self, url, dest_path):
+        try:
+            with open(dest_path, "wb") as f:
+                status, _, _ = self.request(url, sink=f)
+        except BaseException:
+            # Never leave a partial file behind where a complete segment is expected
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            raise
+        if status != 200:
+            os.remove(dest_path)
+            raise IOError(f"GET {url} returned {status}")
+        return dest_path
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                while idle:
+                    idle.pop().close()
+
+
+# ========================== Remote Segment Source ==========================
+
+
+class RemoteSegmentSource:
+    """Reads a packaged manifest and its segments from a ``StreamServer`` (or any HTTP server).
+
+    OpenCV can't read from our connection pool directly, so ``open_segment``
+    downloads a segment over a pooled connection into a scratch directory and
+    returns the local path for ``SegmentedCapture`` to open. Unless
+    ``scratch_dir`` is given, that is a temporary directory created on first
+    use and removed by ``close()``.
+    """
+
+    def __init__(self, manifest_url, pool=None, scratch_dir=None):
+        self.manifest_url = manifest_url
+        self.pool = pool or HttpConnectionPool()
+        self._scratch_dir = scratch_dir
+        self._temp_dir = None
+        status, _, body = self.pool.request(manifest_url)
+        if status != 200:
+            raise IOError(f"GET {manifest_url} returned {status}")
+        self.manifest = json.loads(body)
+
+    def resolve(self, uri):
+        return urljoin(self.manifest_url, uri)
+
+    def fetch(self, uri):
+        status, _, body = self.pool.request(self.resolve(uri))
+        if status != 200:
+            raise IOError(f"GET {self.resolve(uri)} returned {status}")
+        return body
+
+    @property
+    def scratch_dir(self):
+        if self._scratch_dir is None:
+            # Only needed when nothing caches in front of us
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="segments_")
+            self._scratch_dir = self._temp_dir.name
+        return self._scratch_dir
+
+    def open_segment(self, uri):
+        local_path = os.path.join(self.scratch_dir, uri.replace("/", "_"))
+        if not os.path.exists(local_path):
+            self.pool.download(self.resolve(uri), local_path)
+        return local_path
+
+    def close(self):
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+            self._scratch_dir = None
@@ -0,0 +1,218 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from seek_index import SeekIndex
+
+# ========================== Rendition Ladder ==========================
+
+DEFAULT_LADDER = (("Low Quality", 144, 30), ("Medium Quality", 720, 23), ("High Quality", 1080, 20))
+
+
+def load_quality_levels(path):
+    """The ``quality_levels`` mapping written by ``build_ladder``, with paths resolved against its directory"""
+    with open(path) as f:
+        mapping = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return {quality: os.path.join(base_dir, rendition) for quality, rendition in mapping.items()}
+
+
+def plan_chunks(master, chunk_seconds):
+    """Chunk start times (seconds) on master keyframes, at least ``chunk_seconds`` apart"""
+    index = SeekIndex.load_or_build(master)
+    starts = [0.0]
+    for frame in index.keyframes:
+        time_s = index.pts_ms[frame] / 1000
+        if time_s - starts[-1] >= chunk_seconds:
+            starts.append(time_s)
+    return starts, len(index.pts_ms)
+
+
+def _split_with_ffmpeg(master, starts, work_dir):
+    """Stream-copy the video track into keyframe-aligned chunks; no decoding involved"""
+    times = ",".join(f"{t:.6f}" for t in starts[1:])
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", master, "-map", "0:v:0", "-c", "copy",
+           "-f", "segment", "-reset_timestamps", "1", "-segment_list", os.path.join(work_dir, "chunks.txt")]
+    if times:
+        cmd += ["-segment_times", times]
+    subprocess.run(cmd + [os.path.join(work_dir, "chunk_%05d.mkv")], check=True)
+    with open(os.path.join(work_dir, "chunks.txt")) as f:
+        return [os.path.join(work_dir, line.strip()) for line in f if line.strip()]
+
+
+def _encode_chunk_ffmpeg(chunk, out_path, height, crf, keyint_seconds, preset):
+    """Worker process: scale and encode one chunk with keyframes every ``keyint_seconds`` from its start"""
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", chunk, "-an", "-vf", f"scale=-2:{height}",
+           "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-threads", "1",
+           # Same forced keyframes in every rung, and no extra ones, so renditions switch cleanly
+           "-force_key_frames", f"expr:gte(t,n_forced*{keyint_seconds})", "-sc_threshold", "0",
+           out_path]
+    subprocess.run(cmd, check=True)
+    return out_path
+
+
+def _encode_chunk_opencv(master, out_path, height, first_frame, last_frame):
+    """Worker process without ffmpeg: decode a frame range of the master and re-encode it with VideoWriter"""
+    cap = cv2.VideoCapture(master)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    width = round(cap.get(cv2.CAP_PROP_FRAME_WIDTH) * height / cap.get(cv2.CAP_PROP_FRAME_HEIGHT) / 2) * 2
+    cap.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for _ in range(first_frame, last_frame):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        writer.write(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+    writer.release()
+    cap.release()
+    return out_path
+
+
+def _stitch_ffmpeg(chunks, audio_path, out_path, work_dir):
+    list_path = out_path + ".concat.txt"
+    with open(list_path, "w") as f:
+        f.writelines(f"file '{os.path.abspath(chunk)}'\n" for chunk in chunks)
+    cmd = ["ffmpeg", "-v", "error", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+    subprocess.run(cmd + ["-c", "copy", "-movflags", "+faststart", out_path], check=True)
+    os.remove(list_path)
+
+
+def _stitch_opencv(chunks, out_path):
+    """Serial fallback: append the chunks' frames into one file (no audio)"""
+    writer = None
+    for chunk in chunks:
+        cap = cv2.VideoCapture(chunk)
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if writer is None:
+                writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), cap.get(cv2.CAP_PROP_FPS) or 30,
+                                         (frame.shape[1], frame.shape[0]))
+            writer.write(frame)
+        cap.release()
+    if writer is not None:
+        writer.release()
+
+
+def build_ladder(master, out_dir, ladder=DEFAULT_LADDER, chunk_seconds=10.0, keyint_seconds=2.0,
+                 preset="veryfast", workers=None):
+    """Encode every rung of ``ladder`` from ``master`` into ``out_dir``; returns the quality_levels.json path.
+
+    The master is cut at its own keyframes into chunks of at least
+    ``chunk_seconds``; every (rung, chunk) pair is an independent job for a
+    process pool, so a ladder encodes about as fast as the cores allow. The
+    chunks of each rung are then stitched back together without re-encoding.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(master))[0]
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+    master_height = _probe_height(master)
+    # Never upscale; keep at least the lowest rung
+    rungs = [rung for rung in ladder if rung[1] <= master_height] or [ladder[0]]
+    starts, frame_count = plan_chunks(master, chunk_seconds)
+    print(f"🪜 {master}: {len(rungs)} renditions x {len(starts)} chunks")
+
+    work_dir = tempfile.mkdtemp(prefix="ladder_", dir=out_dir)
+    workers = workers or os.cpu_count() or 2
+    try:
+        audio_path = None
+        if have_ffmpeg:
+            chunks = _split_with_ffmpeg(master, starts, work_dir)
+            audio_path = os.path.join(work_dir, "audio.m4a")
+            if subprocess.run(["ffmpeg", "-v", "error", "-y", "-i", master, "-vn", "-c:a", "aac", "-b:a", "128k",
+                               audio_path]).returncode != 0:
+                audio_path = None  # master without audio
+        else:
+            fps = _probe_fps(master)
+            bounds = [round(t * fps) for t in starts] + [frame_count]
+
+        jobs = {}
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+            for quality, height, crf in rungs:
+                for n in range(len(starts)):
+                    out_path = os.path.join(work_dir, f"{height}p_{n:05d}.mp4")
+                    if have_ffmpeg:
+                        if n >= len(chunks):
+                            break
+                        future = pool.submit(_encode_chunk_ffmpeg, chunks[n], out_path, height, crf,
+                                             keyint_seconds, preset)
+                    else:
+                        future = pool.submit(_encode_chunk_opencv, master, out_path, height, bounds[n], bounds[n + 1])
+                    jobs.setdefault(quality, []).append(future)
+            encoded = {quality: [future.result() for future in futures] for quality, futures in jobs.items()}
+
+        quality_levels = {}
+        for quality, height, _ in rungs:
+            name = f"{stem}_{height}p.mp4"
+            out_path = os.path.join(out_dir, name)
+            print(f"🧵 Stitching {quality}: {out_path}")
+            if have_ffmpeg:
+                _stitch_ffmpeg(encoded[quality], audio_path, out_path, work_dir)
+            else:
+                _stitch_opencv(encoded[quality], out_path)
+            quality_levels[quality] = name
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    mapping_path = os.path.join(out_dir, "quality_levels.json")
+    with open(mapping_path, "w") as f:
+        json.dump(quality_levels, f, indent=2)
+    return mapping_path
+
+
+def _probe_height(path):
+    cap = cv2.VideoCapture(path)
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    if not height:
+        raise IOError(f"Could not open {path}")
+    return height
+
+
+def _probe_fps(path):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+    return fps
+
+
+# ========================== CLI ==========================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encode a rendition ladder from one master file in parallel")
+    parser.add_argument("master")
+    parser.add_argument("--out-dir", default="videofolder")
+    parser.add_argument("--rung", action="append", metavar="QUALITY=HEIGHT[:CRF]",
+                        help='e.g. "Low Quality=144:30" (repeatable, lowest first)')
+    parser.add_argument("--chunk-seconds", type=float, default=10.0)
+    parser.add_argument("--keyint-seconds", type=float, default=2.0, help="Keyframe interval shared by all rungs")
+    parser.add_argument("--preset", default="veryfast")
+    parser.add_argument("--workers", type=int, help="Encoder processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    ladder = DEFAULT_LADDER
+    if args.rung:
+        ladder = []
+        for item in args.rung:
+            quality, _, spec = item.partition("=")
+            height, _, crf = spec.partition(":")
+            ladder.append((quality, int(height), int(crf or 23)))
+    mapping_path = build_ladder(args.master, args.out_dir, ladder, args.chunk_seconds, args.keyint_seconds,
+                                args.preset, args.workers)
+    print(f"📝 Wrote {mapping_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import time
+
+import cv2
+import numpy as np
+from ffpyplayer.player import MediaPlayer
+
+# ========================== Single-Demux Capture ==========================
+
+
+class MediaPlayerCapture:
+    """``cv2.VideoCapture`` look-alike whose pictures come from the ``MediaPlayer`` that also plays the audio.
+
+    The file is opened, demuxed and decoded once: ffpyplayer hands out BGR
+    frames already synchronised to its own audio clock, so ``read()`` blocks
+    until the next frame is due instead of reading ahead. ``player`` is the
+    MediaPlayer itself, for pausing and as the master clock.
+    """
+
+    SETTLE_TOLERANCE = 1.0  # seconds a frame may be away from a seek target before it counts as pre-seek
+
+    def __init__(self, video_path, start=0.0, audio=True, open_timeout=5.0):
+        self.video_path = video_path
+        ff_opts = {"out_fmt": "bgr24", "sync": "audio" if audio else "video"}
+        if start > 0:
+            ff_opts["ss"] = start
+        if not audio:
+            ff_opts["an"] = True
+        self.player = MediaPlayer(video_path, ff_opts=ff_opts)
+        self.pts = start
+        self._seek_target = start if start > 0 else None
+        self._closed = False
+
+        # Stream metadata arrives asynchronously once the demuxer has opened the file
+        deadline = time.perf_counter() + open_timeout
+        self.metadata = self.player.get_metadata()
+        while not all(self.metadata.get("src_vid_size") or (0, 0)) and time.perf_counter() < deadline:
+            time.sleep(0.01)
+            self.metadata = self.player.get_metadata()
+        self._opened = all(self.metadata.get("src_vid_size") or (0, 0))
+        num, den = self.metadata.get("frame_rate") or (0, 0)
+        self.fps = num / den if num and den else 0.0
+
+    def isOpened(self):
+        return self._opened and not self._closed
+
+    def read(self, stop=None, resume=None):
+        """Next due frame as a BGR array (a view of ffpyplayer's buffer); blocks until it is due.
+
+        Returns (False, None) at the end of the file, after ``release()``, or
+        once the optional ``stop`` event is set. ``resume`` is an event that is
+        cleared while the player is paused; read() sleeps on it instead of
+        polling, so whoever sets ``stop`` must set ``resume`` as well.
+        """
+        while not self._closed and (stop is None or not stop.is_set()):
+            if resume is not None and not resume.is_set():
+                resume.wait()
+                continue
+            frame, val = self.player.get_frame()
+            if val == "eof":
+                return False, None
+            if frame is None:
+                if resume is not None and not resume.is_set():
+                    continue  # paused while asking; wait on the event above
+                # Not due yet: val is how long until it is worth asking again
+                time.sleep(min(val, 0.01) if isinstance(val, float) and val > 0 else 0.005)
+                continue
+            image, pts = frame
+            if self._seek_target is not None:
+                if abs(pts - self._seek_target) > self.SETTLE_TOLERANCE:
+                    continue  # decoded before the seek took effect
+                self._seek_target = None
+            self.pts = pts
+            return True, self._to_array(image)
+        return False, None
+
+    @staticmethod
+    def _to_array(image):
+        width, height = image.get_size()
+        linesize = image.get_linesizes(keep_align=True)[0]
+        plane = image.to_memoryview(keep_align=True)[0]
+        # Rows may be padded to the line size; slice the padding off without copying
+        rows = np.frombuffer(plane, np.uint8, height * linesize).reshape(height, linesize)
+        return rows[:, :width * 3].reshape(height, width, 3)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.pts * 1000
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.metadata["src_vid_size"][0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.metadata["src_vid_size"][1])
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(int((self.metadata.get("duration") or 0) * self.fps))
+        return 0.0
+
+    def set(self, prop, value):
+        """Seeks by time or frame number; ffmpeg decodes up to the exact target itself"""
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            target = value / 1000
+        elif prop == cv2.CAP_PROP_POS_FRAMES and self.fps:
+            target = value / self.fps
+        else:
+            return False
+        self.player.seek(target, relative=False, accurate=True)
+        self._seek_target = self.pts = target
+        return True
+
+    def release(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.player.close_player()
+        except Exception:
+            pass
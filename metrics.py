@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+
+# ========================== Playback Metrics ==========================
+
+# Frame loop stages, in the order a frame passes through them
+STAGES = ("read", "audio", "resize", "overlay", "convert", "photo", "canvas", "subtitle", "tk")
+QUANTILES = (0.5, 0.95, 0.99)
+
+_NULL_TIMER = nullcontext()
+
+
+class RollingHistogram:
+    """The last ``window`` samples of one stage, plus lifetime count and sum"""
+
+    def __init__(self, window=600):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self):
+        if not self.samples:
+            return [0.0] * len(QUANTILES)
+        return np.quantile(np.fromiter(self.samples, float), QUANTILES).tolist()
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.add(time.perf_counter() - self.start)
+
+
+class PlaybackMetrics:
+    """Per-stage timings of the frame loop, plus counters and gauges pulled from the player.
+
+    While ``enabled`` is False, ``stage()`` hands back a shared no-op context
+    manager and ``observe()`` returns at once, so instrumented code costs one
+    attribute check per stage. ``collect`` is called at snapshot time and
+    returns ``(counters, gauges)`` dicts, so nothing is counted twice. A
+    bound method is held weakly: the player owns its metrics, and the cycle
+    would keep a stopped player's frame pool alive until the cyclic GC ran.
+    """
+
+    def __init__(self, collect=None, window=600, enabled=False):
+        self.enabled = enabled
+        self._collect = weakref.WeakMethod(collect) if hasattr(collect, "__self__") else lambda: collect
+        self.histograms = {stage: RollingHistogram(window) for stage in STAGES}
+        self.started = time.time()
+        self._export_stop = None
+        self._export_thread = None
+
+    def stage(self, name):
+        return _StageTimer(self.histograms[name]) if self.enabled else _NULL_TIMER
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            self.histograms[name].add(seconds)
+
+    def snapshot(self):
+        collect = self._collect()
+        counters, gauges = collect() if collect else ({}, {})
+        stages = {}
+        for name, histogram in self.histograms.items():
+            p50, p95, p99 = histogram.quantiles()
+            stages[name] = {"p50": p50, "p95": p95, "p99": p99, "count": histogram.count, "sum": histogram.total}
+        return {"timestamp": time.time(), "uptime": time.time() - self.started,
+                "stages": stages, "counters": counters, "gauges": gauges}
+
+    # ---------- export ----------
+
+    @staticmethod
+    def to_prometheus(snapshot, prefix="player"):
+        """Prometheus text exposition format of a snapshot"""
+        lines = [f"# HELP {prefix}_stage_seconds Time spent per frame in each stage of the frame loop",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for name, stage in snapshot["stages"].items():
+            for quantile in QUANTILES:
+                value = stage[f"p{round(quantile * 100)}"]
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{quantile}"}} {value:.9f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stage["sum"]:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+        for name, value in snapshot["counters"].items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        for name, value in snapshot["gauges"].items():
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        """Write metrics.json and metrics.prom into ``directory``, replacing the previous files atomically"""
+        snapshot = self.snapshot()
+        os.makedirs(directory, exist_ok=True)
+        for name, text in (("metrics.json", json.dumps(snapshot, indent=2)),
+                           ("metrics.prom", self.to_prometheus(snapshot))):
+            path = os.path.join(directory, name)
+            with open(path + ".tmp", "w") as f:
+                f.write(text)
+            os.replace(path + ".tmp", path)
+
+    def start_export(self, directory, interval=5.0):
+        self.stop_export()
+        stop = self._export_stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.export(directory)
+                except OSError as e:
+                    print(f"⚠️ Could not export metrics to {directory}: {e}")
+
+        self._export_thread = threading.Thread(target=run, daemon=True)
+        self._export_thread.start()
+
+    def stop_export(self):
+        if self._export_stop is not None:
+            self._export_stop.set()
+            self._export_stop = None
+
+    # ---------- HUD ----------
+
+    def hud_text(self):
+        snapshot = self.snapshot()
+        lines = ["stage       p50    p95    p99 ms"]
+        for name, stage in snapshot["stages"].items():
+            if stage["count"]:
+                lines.append(f"{name:<9}{stage['p50'] * 1000:6.2f} {stage['p95'] * 1000:6.2f} {stage['p99'] * 1000:6.2f}")
+        for name, value in {**snapshot["counters"], **snapshot["gauges"]}.items():
+            lines.append(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+        return "\n".join(lines)
@@ -0,0 +1,434 @@
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from engine import HeadlessLoop, NullSink
+
+# ========================== Mosaic Tiles ==========================
+
+
+class MosaicTile:
+    """One feed of the mosaic: a rendition ladder, the capture being decoded and its queue of scaled frames.
+
+    Only one scheduler worker decodes a tile at a time (``busy``). Frames are
+    scaled straight to the tile's size in the worker, so the UI thread only
+    copies pixels. ``degrade``/``upgrade`` step through lower renditions first,
+    then lower frame rates.
+    """
+
+    MAX_FRAME_STEP = 4
+
+    def __init__(self, name, ladder, loop=True, queue_depth=3):
+        self.name = name
+        self.ladder = ladder  # rendition paths, lowest first
+        self.loop = loop
+        self.queue_depth = queue_depth
+        self.queue = deque()  # (frame, pts) ready to show
+        self.lock = threading.Lock()
+        self.busy = False
+        self.ended = False
+
+        self.rect = (0, 0, 1, 1)  # x, y, width, height on the mosaic
+        self.sizes = [_probe_size(path) for path in ladder]
+        self.rendition = len(ladder) - 1
+        self.frame_step = 1  # decode every n-th frame
+        self.cap = None
+        self.fps = 30.0
+        self._pending_rendition = None
+        self._pts_offset = 0.0  # added to capture positions after looping
+        self.position = 0.0  # pts of the last frame taken from the capture
+        self.started = None  # perf_counter at pts 0
+
+        self.decoded = 0
+        self.presented = 0
+        self.dropped = 0
+        self.underruns = 0
+        self.window = {"presented": 0, "dropped": 0, "underruns": 0}
+
+    # ---------- rendition / rate ----------
+
+    def fitting_rendition(self):
+        """Smallest rendition that covers the tile; anything larger is scaled away anyway"""
+        width, height = self.rect[2:]
+        for index, size in enumerate(self.sizes):
+            if size and (size[0] >= width or size[1] >= height):
+                return index
+        return len(self.ladder) - 1
+
+    def degrade(self):
+        if self.rendition > 0:
+            self._pending_rendition = self.rendition - 1
+            return f"rendition {self.rendition - 1}"
+        if self.frame_step < self.MAX_FRAME_STEP:
+            self.frame_step *= 2
+            return f"1/{self.frame_step} fps"
+        return None
+
+    def upgrade(self):
+        if self.frame_step > 1:
+            self.frame_step //= 2
+            return f"1/{self.frame_step} fps"
+        if self.rendition < self.fitting_rendition():
+            self._pending_rendition = self.rendition + 1
+            return f"rendition {self.rendition + 1}"
+        return None
+
+    @property
+    def degraded(self):
+        return self.fitting_rendition() - self.rendition + int(math.log2(self.frame_step))
+
+    # ---------- decoding (scheduler workers) ----------
+
+    def wants_frame(self):
+        with self.lock:
+            return not self.ended and len(self.queue) < self.queue_depth
+
+    def lead(self, now):
+        """Seconds of video queued ahead of the tile's clock; the scheduler serves the smallest first"""
+        if self.started is None:
+            return -math.inf
+        # The UI thread pops from the other end of the queue; read the tail and the position together
+        with self.lock:
+            last_pts = self.queue[-1][1] if self.queue else self.position
+        return last_pts - (now - self.started)
+
+    def _open(self, index, position):
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = cv2.VideoCapture(self.ladder[index])
+        self.rendition = index
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        if position > 0:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, (position - self._pts_offset) * 1000)
+
+    def decode_one(self, realtime, drop_threshold=0.080):
+        """Decode (or skip) the next frame; called by exactly one worker at a time"""
+        if self.cap is None or self._pending_rendition is not None:
+            index = self.rendition if self._pending_rendition is None else self._pending_rendition
+            self._pending_rendition = None
+            self._open(index, self.position)
+            if self.started is None:
+                self.started = time.perf_counter()
+
+        for _ in range(self.frame_step - 1):
+            self.cap.grab()
+        due = time.perf_counter() - self.started
+        if realtime and self.position < due - drop_threshold and self.cap.grab():
+            # Behind the tile's clock: skip without decoding
+            self.position = self._pts_offset + self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            self.dropped += 1
+            self.window["dropped"] += 1
+            return
+        ok, frame = self.cap.read()
+        if not ok:
+            if not self.loop:
+                self.ended = True
+                return
+            self._pts_offset = self.position + 1 / self.fps
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+            if not ok:
+                self.ended = True
+                return
+        self.position = self._pts_offset + self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+
+        width, height = self.rect[2:]
+        scale = min(width / frame.shape[1], height / frame.shape[0])
+        size = (max(1, round(frame.shape[1] * scale)), max(1, round(frame.shape[0] * scale)))
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        scaled = cv2.resize(frame, size, interpolation=interpolation)
+        with self.lock:
+            self.queue.append((scaled, self.position))
+        self.decoded += 1
+
+    def take(self, now, realtime):
+        """Newest frame that is due, dropping the ones it replaces; None if nothing new is due"""
+        shown = None
+        clock = now - self.started if self.started is not None else 0.0
+        with self.lock:
+            while self.queue and (not realtime or self.queue[0][1] <= clock):
+                if shown is not None and realtime:
+                    self.dropped += 1
+                    self.window["dropped"] += 1
+                shown = self.queue.popleft()
+        if shown is None:
+            if realtime and not self.queue and self.started is not None and not self.ended:
+                self.underruns += 1
+                self.window["underruns"] += 1
+            return None
+        self.presented += 1
+        self.window["presented"] += 1
+        return shown[0]
+
+    def close(self):
+        self.ended = True
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+def _probe_size(path):
+    cap = cv2.VideoCapture(path)
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) if cap.isOpened() else None
+    cap.release()
+    return size
+
+
+# ========================== Decode Scheduler ==========================
+
+
+class DecodeScheduler:
+    """A fixed pool of decode workers shared by every tile.
+
+    Each idle worker takes the tile with the least video queued ahead of its
+    clock (earliest deadline first) that isn't already being decoded, so
+    streams are served fairly by how urgently they need a frame, not by
+    thread count. OpenCV releases the GIL while decoding and resizing, so
+    throughput grows with the number of cores.
+    """
+
+    def __init__(self, tiles, workers=None, realtime=True):
+        self.tiles = tiles
+        self.workers = workers or os.cpu_count() or 2
+        self.realtime = realtime
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._threads = [threading.Thread(target=self._work, daemon=True, name=f"decode-{n}")
+                         for n in range(self.workers)]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def wake(self):
+        """Called after frames were taken off tile queues"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+
+    def _next_tile(self):
+        # Caller holds self._cond
+        now = time.perf_counter()
+        candidates = [tile for tile in self.tiles if not tile.busy and tile.wants_frame()]
+        return min(candidates, key=lambda tile: tile.lead(now)) if candidates else None
+
+    def _work(self):
+        while True:
+            tile = None
+            try:
+                with self._cond:
+                    tile = self._next_tile()
+                    while tile is None and not self._stopped:
+                        self._cond.wait(0.05)
+                        tile = self._next_tile()
+                    if self._stopped:
+                        return
+                    tile.busy = True
+                tile.decode_one(self.realtime)
+            except Exception as e:
+                # One tile's error must not end the worker and stall every other tile
+                if tile is None:
+                    print(f"⚠️ Decode scheduler: {e}")
+                    time.sleep(0.05)
+                else:
+                    print(f"⚠️ Tile {tile.name} failed: {e}")
+                    tile.ended = True
+            finally:
+                if tile is not None:
+                    with self._cond:
+                        tile.busy = False
+                        self._cond.notify_all()
+
+
+# ========================== Mosaic Player ==========================
+
+
+class MosaicPlayer:
+    """Plays several feeds in a grid, composed into one frame for a single ``FrameSink``.
+
+    Every ``evaluate_interval`` seconds, tiles that dropped more than
+    ``max_drop_ratio`` of their frames (or ran dry more than ``max_underruns``
+    times) step down a rendition, then a frame rate. After ``recover_after``
+    seconds without trouble, the most degraded tile steps back up one notch.
+    """
+
+    def __init__(self, sources, frame_sink, root, size=(1280, 720), columns=None, workers=None, realtime=True,
+                 loop=True, tick_ms=15, evaluate_interval=2.0, max_drop_ratio=0.1, max_underruns=10,
+                 recover_after=10.0):
+        self.tiles = [MosaicTile(name, ladder, loop) for name, ladder in sources]
+        self.frame_sink = frame_sink
+        self.root = root  # Tk root or HeadlessLoop
+        self.columns = columns or math.ceil(math.sqrt(len(self.tiles)))
+        self.realtime = realtime
+        self.tick_ms = tick_ms
+        self.evaluate_interval = evaluate_interval
+        self.max_drop_ratio = max_drop_ratio
+        self.max_underruns = max_underruns
+        self.recover_after = recover_after
+        self.scheduler = DecodeScheduler(self.tiles, workers, realtime)
+        self.frame = None
+        self._job = None
+        self._last_evaluation = 0.0
+        self._healthy_since = 0.0
+        self.frames = 0
+        self.set_viewport(*size)
+
+    def set_viewport(self, width, height):
+        """Lay the tiles out in a grid over ``width`` x ``height``; queued frames keep their old size"""
+        rows = math.ceil(len(self.tiles) / self.columns)
+        tile_width, tile_height = width // self.columns, height // max(1, rows)
+        for index, tile in enumerate(self.tiles):
+            row, column = divmod(index, self.columns)
+            tile.rect = (column * tile_width, row * tile_height, tile_width, tile_height)
+        self.frame = np.zeros((height, width, 3), np.uint8)
+        self.frame_sink.set_viewport((width, height))
+
+    def start(self):
+        for tile in self.tiles:
+            tile.rendition = tile.fitting_rendition()
+        self._last_evaluation = self._healthy_since = time.perf_counter()
+        self.scheduler.start()
+        self._job = self.root.after(0, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            try:
+                self.root.after_cancel(self._job)
+            except Exception:
+                # The Tk root may already be destroyed
+                pass
+            self._job = None
+        self.scheduler.stop()
+        for tile in self.tiles:
+            tile.close()
+
+    @property
+    def finished(self):
+        return all(tile.ended and not tile.queue for tile in self.tiles)
+
+    def _tick(self):
+        self._job = None
+        now = time.perf_counter()
+        changed = False
+        for tile in self.tiles:
+            scaled = tile.take(now, self.realtime)
+            if scaled is None:
+                continue
+            x, y, width, height = tile.rect
+            frame_height, frame_width = scaled.shape[:2]
+            if frame_width > width or frame_height > height:
+                # Decoded before a resize; the next one will fit
+                continue
+            view = self.frame[y:y + height, x:x + width]
+            if frame_width != width or frame_height != height:
+                view[:] = 0
+            top, left = (height - frame_height) // 2, (width - frame_width) // 2
+            view[top:top + frame_height, left:left + frame_width] = scaled
+            changed = True
+        self.scheduler.wake()
+
+        if changed:
+            self.frames += 1
+            if not self.frame_sink.present(self.frame, now):
+                self.stop()
+                return
+        if self.realtime and now - self._last_evaluation >= self.evaluate_interval:
+            self._evaluate(now)
+        if not self.finished:
+            self._job = self.root.after(self.tick_ms, self._tick)
+
+    def _evaluate(self, now):
+        """Step struggling tiles down, and after a calm period one tile back up"""
+        self._last_evaluation = now
+        struggling = False
+        for tile in self.tiles:
+            window, tile.window = tile.window, {"presented": 0, "dropped": 0, "underruns": 0}
+            shown = window["presented"] + window["dropped"]
+            if (shown and window["dropped"] / shown > self.max_drop_ratio) or window["underruns"] > self.max_underruns:
+                change = tile.degrade()
+                struggling = True
+                if change:
+                    print(f"📉 {tile.name}: {change} ({window['dropped']}/{shown} late)")
+        if struggling:
+            self._healthy_since = now
+            return
+        if now - self._healthy_since >= self.recover_after:
+            self._healthy_since = now
+            for tile in sorted(self.tiles, key=lambda tile: tile.degraded, reverse=True):
+                change = tile.upgrade()
+                if change:
+                    print(f"📈 {tile.name}: {change}")
+                    break
+
+    def stats(self):
+        return {tile.name: {"rendition": tile.rendition, "frame_step": tile.frame_step, "decoded": tile.decoded,
+                            "presented": tile.presented, "dropped": tile.dropped, "underruns": tile.underruns}
+                for tile in self.tiles}
+
+
+# ========================== CLI ==========================
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play several videos in a grid with a shared decoder pool")
+    parser.add_argument("sources", nargs="+",
+                        help="One per tile; a comma-separated list is a rendition ladder, lowest first")
+    parser.add_argument("--columns", type=int)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--workers", type=int, help="Decode workers (default: CPU count)")
+    parser.add_argument("--no-loop", action="store_true", help="Stop each tile at the end instead of looping")
+    parser.add_argument("--headless", action="store_true", help="No window; report throughput after --duration")
+    parser.add_argument("--free-run", action="store_true", help="With --headless, decode as fast as possible")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    sources = [(os.path.basename(spec.split(",")[-1]), spec.split(",")) for spec in args.sources]
+    width, height = (int(n) for n in args.size.lower().split("x"))
+    options = dict(size=(width, height), columns=args.columns, workers=args.workers, loop=not args.no_loop)
+
+    if args.headless:
+        loop = HeadlessLoop()
+        mosaic = MosaicPlayer(sources, NullSink(), loop, realtime=not args.free_run, **options)
+        deadline = time.perf_counter() + args.duration
+        mosaic.start()
+        loop.run(until=lambda: mosaic.finished or time.perf_counter() >= deadline)
+        elapsed = args.duration - max(0.0, deadline - time.perf_counter())
+        mosaic.stop()
+        decoded = sum(tile.decoded for tile in mosaic.tiles)
+        print(f"🧱 {len(mosaic.tiles)} tiles, {mosaic.scheduler.workers} workers: "
+              f"{decoded / elapsed:.1f} frames/s decoded, {mosaic.frames / elapsed:.1f} mosaics/s")
+        for name, stats in mosaic.stats().items():
+            print(f"   {name}: {stats}")
+        return 0
+
+    import tkinter as tk
+    from tk_sinks import TkCanvasSink
+
+    root = tk.Tk()
+    root.title("🧱 Mosaic")
+    root.configure(bg="black")
+    canvas = tk.Canvas(root, width=width, height=height, bg="black", highlightthickness=0)
+    canvas.pack(fill=tk.BOTH, expand=True)
+    mosaic = MosaicPlayer(sources, TkCanvasSink(canvas), root, **options)
+    canvas.bind("<Configure>", lambda event: mosaic.set_viewport(event.width, event.height))
+    mosaic.start()
+    root.protocol("WM_DELETE_WINDOW", lambda: (mosaic.stop(), root.destroy()))
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
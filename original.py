@@ -106,6 +106,8 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
         self.photo = None
         self.subtitle_decorator = subtitle_decorator
         self.current_time = 0
+        self.resume_event = threading.Event()
+        self.resume_event.set()
 
     def switch_quality(self, quality):
         if self.cap:
@@ -120,6 +122,7 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
         self.cap = cv2.VideoCapture(self.video_path)
         self.player = MediaPlayer(self.video_path)
         self.paused = False
+        self.resume_event.set()
 
         if resume_time > 0:
             self.cap.set(cv2.CAP_PROP_POS_MSEC, resume_time * 1000)
@@ -127,6 +130,8 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
         def update_frame():
             while self.cap.isOpened():
                 if self.paused:
+                    # Block until resume()/stop_video() instead of spinning
+                    self.resume_event.wait()
                     continue
                 ret, frame = self.cap.read()
                 audio_frame, val = self.player.get_frame()
@@ -155,13 +160,16 @@ class QualitySwitchDecorator(VideoPlayerDecorator):
         if self.player:
             self.player.set_pause(True)
             self.paused = True
+            self.resume_event.clear()
 
     def resume(self):
         if self.player:
             self.player.set_pause(False)
             self.paused = False
+            self.resume_event.set()
 
     def stop_video(self):
+        self.resume_event.set()
         if self.cap:
             self.cap.release()
             self.cap = None
@@ -0,0 +1,270 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ========================== Tiered Segment Cache ==========================
+
+
+class CachedSegmentSource:
+    """Memory + disk cache with playhead-driven prefetch in front of a remote segment source.
+
+    Segments prefetched ahead of the playhead land in a memory LRU capped at
+    ``memory_bytes``. Anything evicted from memory, or opened for decoding,
+    is written to ``cache_dir``, an LRU capped at ``disk_bytes`` that survives
+    restarts. Re-watching or seeking back within cached content never goes to
+    the origin. The audio track goes through the same tiers: it streams from
+    the origin only until a background fetch has put it on disk. Disk
+    writes happen outside the lock, so memory hits never wait on them. Wraps
+    anything with ``manifest``, ``resolve`` and ``fetch(uri) -> bytes``
+    (e.g. ``http_source.RemoteSegmentSource``).
+    """
+
+    def __init__(self, origin, cache_dir, memory_bytes=64 << 20, disk_bytes=1 << 30,
+                 prefetch_seconds=20.0, prefetch_bytes=32 << 20, workers=2):
+        self.origin = origin
+        self.manifest = origin.manifest
+        self.resolve = origin.resolve
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.prefetch_seconds = prefetch_seconds
+        self.prefetch_bytes = prefetch_bytes
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # uri -> bytes
+        self._memory_size = 0
+        self._disk = OrderedDict()  # uri -> (path, size)
+        self._disk_size = 0
+        self._spilling = {}  # uri -> bytes evicted from memory and not on disk yet
+        self._in_flight = {}  # uri -> Future of an origin fetch
+        self._prefetched = set()  # uris whose bytes came from a prefetch and haven't been used yet
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.prefetch_hits = 0
+        self.prefetches = 0
+        self.origin_bytes = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_disk_index()
+
+    # ---------- disk tier ----------
+
+    def _disk_path(self, uri):
+        digest = hashlib.sha1(self.resolve(uri).encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest + os.path.splitext(uri)[1])
+
+    def _load_disk_index(self):
+        """Recover the disk tier left by previous runs, oldest first"""
+        segments = self.manifest["renditions"].values()
+        uris = [segment["uri"] for rendition in segments for segment in rendition["segments"]]
+        found = []
+        for uri in uris + [self.manifest.get("audio", "")]:
+            path = self._disk_path(uri) if uri else None
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                found.append((stat.st_mtime, uri, path, stat.st_size))
+        for _, uri, path, size in sorted(found):
+            self._disk[uri] = (path, size)
+            self._disk_size += size
+        self._remove_files(self._evict_disk())
+
+    def _store_disk(self, uri, data):
+        """Path of ``uri`` in the disk tier, writing it first if needed; call without self._lock"""
+        with self._lock:
+            if uri in self._disk:
+                self._disk.move_to_end(uri)
+                return self._disk[uri][0]
+        path = self._disk_path(uri)
+        # Per-thread name: two threads may store the same segment at once, and the last replace wins
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if uri in self._disk:
+                self._disk.move_to_end(uri)
+                return path
+            self._disk[uri] = (path, len(data))
+            self._disk_size += len(data)
+            evicted = self._evict_disk(keep=uri)
+        self._remove_files(evicted)
+        return path
+
+    def _evict_disk(self, keep=None):
+        """Drop the oldest entries over the byte cap; returns their paths for the caller to delete"""
+        evicted = []
+        for uri in list(self._disk):
+            if self._disk_size <= self.disk_bytes:
+                break
+            if uri == keep:
+                continue
+            path, size = self._disk.pop(uri)
+            self._disk_size -= size
+            self.disk_evictions += 1
+            evicted.append(path)
+        return evicted
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _flush_spills(self):
+        """Write memory evictions to disk; call without self._lock"""
+        while True:
+            with self._lock:
+                if not self._spilling:
+                    return
+                uri, data = next(iter(self._spilling.items()))
+            self._store_disk(uri, data)
+            with self._lock:
+                self._spilling.pop(uri, None)
+
+    # ---------- memory tier ----------
+
+    def _store_memory(self, uri, data):
+        # Caller holds self._lock
+        if uri in self._memory:
+            self._memory.move_to_end(uri)
+            return
+        self._memory[uri] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+            old_uri, old_data = self._memory.popitem(last=False)
+            self._memory_size -= len(old_data)
+            self.memory_evictions += 1
+            # Spill instead of dropping, so seeking back doesn't refetch it; _flush_spills() writes it
+            self._spilling[old_uri] = old_data
+
+    # ---------- origin ----------
+
+    def _fetch(self, uri, prefetch):
+        try:
+            data = self.origin.fetch(uri)
+        except Exception:
+            with self._lock:
+                self._in_flight.pop(uri, None)
+            raise
+        with self._lock:
+            self.origin_bytes += len(data)
+            if prefetch:
+                self.prefetches += 1
+                self._prefetched.add(uri)
+            self._store_memory(uri, data)
+            self._in_flight.pop(uri, None)
+        self._flush_spills()
+        return data
+
+    def _fetch_async(self, uri, prefetch):
+        # Caller holds self._lock
+        future = self._in_flight.get(uri)
+        if future is None:
+            future = self._in_flight[uri] = self._executor.submit(self._fetch, uri, prefetch)
+        return future
+
+    # ---------- source interface ----------
+
+    def open_segment(self, uri):
+        """Local path of ``uri`` for cv2.VideoCapture, from the fastest tier that has it"""
+        with self._lock:
+            if uri in self._disk:
+                self.disk_hits += 1
+                self._note_prefetch_hit(uri)
+                self._disk.move_to_end(uri)
+                return self._disk[uri][0]
+            data = self._memory.get(uri) or self._spilling.get(uri)
+            if data is not None:
+                self.memory_hits += 1
+                self._note_prefetch_hit(uri)
+                if uri in self._memory:
+                    self._memory.move_to_end(uri)
+            else:
+                waiting_on_prefetch = uri in self._in_flight
+                if not waiting_on_prefetch:
+                    self.misses += 1
+                future = self._fetch_async(uri, prefetch=False)
+
+        if data is None:
+            data = future.result()
+            if waiting_on_prefetch:
+                with self._lock:
+                    self.prefetch_hits += 1
+                    self._prefetched.discard(uri)
+        return self._store_disk(uri, data)
+
+    def audio_path(self, uri):
+        """Local copy of the audio track once it is cached; until then its URL, while a background fetch caches it.
+
+        The audio plays for the whole session, so it is never worth holding up
+        the start of playback to download it first.
+        """
+        with self._lock:
+            if uri in self._disk:
+                self.disk_hits += 1
+                self._disk.move_to_end(uri)
+                return self._disk[uri][0]
+            cached = uri in self._memory or uri in self._spilling
+            if not cached:
+                self.misses += 1
+                future = self._fetch_async(uri, prefetch=False)
+        if cached:
+            return self.open_segment(uri)
+        # Added outside the lock: a future that is already done runs the callback right here
+        future.add_done_callback(lambda done: self._store_fetched(uri, done))
+        return self.resolve(uri)
+
+    def _store_fetched(self, uri, future):
+        if not future.cancelled() and future.exception() is None:
+            self._store_disk(uri, future.result())
+
+    def _note_prefetch_hit(self, uri):
+        if uri in self._prefetched:
+            self._prefetched.discard(uri)
+            self.prefetch_hits += 1
+
+    def prefetch_after(self, quality, index):
+        """Queue the segments after ``index`` that fit in the time and byte windows"""
+        segments = self.manifest["renditions"][quality]["segments"]
+        seconds = 0.0
+        total_bytes = 0
+        with self._lock:
+            for segment in segments[index + 1:]:
+                seconds += segment["duration"]
+                total_bytes += segment.get("bytes", 0)
+                if seconds > self.prefetch_seconds or total_bytes > self.prefetch_bytes:
+                    break
+                uri = segment["uri"]
+                if uri not in self._memory and uri not in self._disk:
+                    self._fetch_async(uri, prefetch=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "prefetch_hits": self.prefetch_hits,
+                "prefetches": self.prefetches,
+                "in_flight": len(self._in_flight),
+                "origin_bytes": self.origin_bytes,
+                "memory_bytes": self._memory_size,
+                "disk_bytes": self._disk_size,
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.disk_evictions,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        close_origin = getattr(self.origin, "close", None)
+        if close_origin:
+            close_origin()
@@ -1,329 +1,237 @@
-import cv2
+import argparse
+import json
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk
-from ttkthemes import ThemedTk
-from ttkthemes import ThemedStyle
-from ffpyplayer.player import MediaPlayer
-import threading
-import pysubs2
-from PIL import Image, ImageTk
-from abc import ABC, abstractmethod
-import time
-
-# ========================== State Pattern ==========================
-
-class PlayerState(ABC):
-    @abstractmethod
-    def play(self, context, resume_time=0): pass
-
-    @abstractmethod
-    def pause(self, context): pass
-
-    @abstractmethod
-    def resume(self, context): pass
-
-
-class PlayingState(PlayerState):
-    def play(self, context, resume_time=0): pass
-    def pause(self, context):
-        context._pause_internal()
-        context.set_state(PausedState())
-    def resume(self, context): pass
-
-
-class PausedState(PlayerState):
-    def play(self, context, resume_time=0):
-        context._play_internal(resume_time)
-        context.set_state(PlayingState())
-    def pause(self, context): pass
-    def resume(self, context):
-        context._resume_internal()
-        context.set_state(PlayingState())
-
-
-class StoppedState(PlayerState):
-    def play(self, context, resume_time=0):
-        context._play_internal(resume_time)
-        context.set_state(PlayingState())
-    def pause(self, context): pass
-    def resume(self, context): pass
-
-
-# ========================== Decorator Pattern Core ==========================
-
-class IVideoPlayer(ABC):
-    @abstractmethod
-    def play(self, resume_time=0): pass
-    @abstractmethod
-    def pause(self): pass
-    @abstractmethod
-    def resume(self): pass
-    @abstractmethod
-    def stop_video(self): pass
-
-
-class BasicVideoPlayer(IVideoPlayer):
-    def __init__(self, video_path):
-        self.video_path = video_path
-        self.cap = None
-        self.player = None
-        self.paused = False
-
-    def play(self, resume_time=0):
-        self.stop_video()
-        self.cap = cv2.VideoCapture(self.video_path)
-        self.player = MediaPlayer(self.video_path)
-        if resume_time > 0:
-            self.cap.set(cv2.CAP_PROP_POS_MSEC, resume_time * 1000)
-        self.paused = False
-
-    def pause(self):
-        if self.player:
-            self.player.set_pause(True)
-            self.paused = True
-
-    def resume(self):
-        if self.player:
-            self.player.set_pause(False)
-            self.paused = False
-
-    def stop_video(self):
-        if self.cap:
-            self.cap.release()
-            self.cap = None
-        if self.player:
-            try:
-                self.player.close_player()
-            except Exception:
-                pass
-            self.player = None
-
-
-class VideoPlayerDecorator(IVideoPlayer):
-    def __init__(self, player: IVideoPlayer):
-        self._player = player
-    def play(self, resume_time=0): self._player.play(resume_time)
-    def pause(self): self._player.pause()
-    def resume(self): self._player.resume()
-    def stop_video(self): self._player.stop_video()
-
-
-# ========================== Feature Decorators ==========================
-
-class SubtitleDecorator(VideoPlayerDecorator):
-    def __init__(self, player, subtitle_path, subtitle_label):
-        super().__init__(player)
-        self.subtitle_label = subtitle_label
-        self.subtitles = pysubs2.load(subtitle_path)
-
-    def display_subtitles(self, current_time):
-        for subtitle in self.subtitles:
-            if subtitle.start / 1000 <= current_time <= subtitle.end / 1000:
-                self.subtitle_label.config(text=subtitle.text)
-                return
-        self.subtitle_label.config(text="")
-
-
-class QualitySwitchDecorator(VideoPlayerDecorator):
-    def __init__(self, player, quality_levels, canvas, root, subtitle_decorator=None):
-        super().__init__(player)
-        self.quality_levels = quality_levels
-        self.current_quality = "Medium Quality"
-        self.video_path = self.quality_levels[self.current_quality]
-        self.canvas = canvas
-        self.root = root
-        self.subtitle_decorator = subtitle_decorator
-
-        self.cap = None
-        self.player = None
-        self.paused = False
-        self.current_time = 0
-        self.photo = None
-        self.play_thread = None
-        self.stop_event = threading.Event()
-        self.state = StoppedState()
-        self.lock = threading.Lock()  # to ensure thread-safe switching
-
-    def set_state(self, state: PlayerState):
-        self.state = state
-
-    def switch_quality(self, quality):
-        """Switch video quality smoothly during playback"""
-        if not self.cap or not self.cap.isOpened():
-            return
 
-        with self.lock:
-            self.current_time = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
-            self.current_quality = quality
-            self.video_path = self.quality_levels[self.current_quality]
-
-            print(f"🔄 Switching to {self.current_quality} at {self.current_time:.2f}s")
-            self.stop_event.set()
-
-        # Wait for the playback thread to stop safely
-        if self.play_thread and self.play_thread.is_alive():
-            self.play_thread.join(timeout=0.8)
-
-        # Give ffpyplayer time to release internal threads
-        time.sleep(0.4)
-        self.stop_event.clear()
-
-        # Restart playback from same time
-        self.play(self.current_time)
-
-    def play(self, resume_time=0):
-        self.state.play(self, resume_time)
-
-    def pause(self):
-        self.state.pause(self)
-
-    def resume(self):
-        self.state.resume(self)
-
-    def _play_internal(self, resume_time=0):
-        with self.lock:
-            self.stop_event.clear()
-            self.cap = cv2.VideoCapture(self.video_path)
-            self.player = MediaPlayer(self.video_path)
-            self.paused = False
-
-            if resume_time > 0:
-                self.cap.set(cv2.CAP_PROP_POS_MSEC, resume_time * 1000)
-
-        def update_frame():
-            while not self.stop_event.is_set():
-                with self.lock:
-                    if not self.cap or not self.cap.isOpened():
-                        break
-                    if self.paused:
-                        time.sleep(0.05)
-                        continue
-                    ret, frame = self.cap.read()
-
-                if not ret:
-                    break
-
-                audio_frame, val = self.player.get_frame()
-                if val == 'eof':
-                    break
-
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame = cv2.resize(frame, (800, 500))
-                self.photo = ImageTk.PhotoImage(image=Image.fromarray(frame))
-                try:
-                    self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
-                    self.current_time = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
-                    if self.subtitle_decorator:
-                        self.subtitle_decorator.display_subtitles(self.current_time)
-                    self.root.update_idletasks()
-                    self.root.update()
-                except tk.TclError:
-                    # Happens if window is closed
-                    break
-
-            self.stop_video()
-
-        self.play_thread = threading.Thread(target=update_frame, daemon=True)
-        self.play_thread.start()
-
-    def _pause_internal(self):
-        if self.player:
-            self.player.set_pause(True)
-            self.paused = True
-
-    def _resume_internal(self):
-        if self.player:
-            self.player.set_pause(False)
-            self.paused = False
-
-    def stop_video(self):
-        with self.lock:
-            self.stop_event.set()
-            if self.cap:
-                self.cap.release()
-                self.cap = None
-            if self.player:
-                try:
-                    self.player.close_player()
-                except Exception:
-                    pass
-                self.player = None
-            if self.play_thread and self.play_thread.is_alive():
-                self.play_thread.join(timeout=0.5)
-            self.set_state(StoppedState())
-
-
-# ========================== Mediator Pattern ==========================
-
-class ControlMediator:
-    def __init__(self, video_player):
-        self.video_player = video_player
-
-    def handle_action(self, action, **kwargs):
-        if action == "play":
-            self.video_player.play()
-        elif action == "pause":
-            self.video_player.pause()
-        elif action == "resume":
-            self.video_player.resume()
-        elif action == "switch_quality":
-            quality = kwargs.get("quality")
-            self.video_player.switch_quality(quality)
+import startup
+from subtitle_store import SubtitleStore, discover_tracks
 
+# Everything slow to import is loaded by a background thread once the window is up
+WARM_UP_MODULES = ("numpy", "cv2", "ffpyplayer.player", "PIL.ImageTk", "ttkthemes", "engine", "tk_sinks")
 
 # ========================== GUI Setup ==========================
 
 class VideoPlayerApp:
-    def __init__(self, root):
+    def __init__(self, root, frame_workers=0, manifest_path=None, metrics_dir=None,
+                 quality_levels_path="videofolder/quality_levels.json", single_demux=False,
+                 subtitle_overlay=False, on_ready=None):
         self.root = root
         self.root.title("🎬 Stylish Video Player")
         self.root.geometry("900x700")
         self.root.configure(bg="#2E2E2E")
 
-        style = ThemedStyle(root)
-        style.set_theme("radiance")
-
-        self.quality_levels = {
-            "Low Quality": "videofolder/Natural_144p.mp4",
-            "Medium Quality": "videofolder/Natural_720p_.mp4",
-            "High Quality": "videofolder/Natural_1080p_original.mp4"
-        }
+        self.engine_options = {"frame_workers": frame_workers, "manifest_path": manifest_path,
+                               "metrics_dir": metrics_dir, "single_demux": single_demux}
+        self.quality_levels_path = quality_levels_path
+        self.subtitle_overlay = subtitle_overlay
+        self.on_ready = on_ready
+        # Built once the warm-up thread has imported the engine; until then controls queue their action
+        self.video_player = None
+        self.mediator = None
+        self._pending_action = None
+        self.viewport = None
 
         self.subtitle_path = "subtitles/subtitles_content.srt"
+        # Parsing starts at once on the store's own thread; other languages follow so switching is instant
+        self.subtitle_store = SubtitleStore(discover_tracks(self.subtitle_path))
+        self.subtitle_store.preload()
+        self.language_var = tk.StringVar(value=self.subtitle_store.languages[0])
 
         self.canvas = tk.Canvas(root, width=800, height=500, bg="black", highlightthickness=5, highlightbackground="#FF5733")
-        self.canvas.pack(pady=10)
+        self.canvas.pack(pady=10, fill=tk.BOTH, expand=True)
+
+        self.seek_var = tk.DoubleVar(value=0)
+        self.seeking = False
+        self.seek_bar = ttk.Scale(root, from_=0, to=1, variable=self.seek_var, length=800,
+                                  command=lambda value: self._on_seek_drag(float(value)))
+        self.seek_bar.pack()
+        self.seek_bar.bind("<ButtonPress-1>", lambda event: setattr(self, "seeking", True))
+        self.seek_bar.bind("<ButtonRelease-1>", self._on_seek_release)
+        # Hover previews are cropped from the thumbnail sprites; nothing is decoded to show them
+        self.seek_bar.bind("<Motion>", self._on_seek_hover)
+        self.seek_bar.bind("<Leave>", lambda event: self.preview_label.place_forget())
+        self.preview_label = tk.Label(root, bg="black", fg="white", font=("Arial", 9), compound=tk.TOP,
+                                      bd=2, relief=tk.SOLID)
+        self.preview_photo = None
 
         self.controls_frame = ttk.Frame(root, style="TFrame")
         self.controls_frame.pack(pady=10)
 
         self.subtitle_label = tk.Label(root, text="Subtitles will appear here...", font=("Arial", 14, "bold"),
                                        fg="white", bg="#444444", wraplength=800, pady=10, padx=10)
-        self.subtitle_label.pack(side=tk.BOTTOM, fill=tk.X)
+        if not subtitle_overlay:
+            # Overlay mode burns subtitles into the frames instead
+            self.subtitle_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+        ttk.Button(self.controls_frame, text="Low", command=lambda: self._action("switch_quality", quality="Low Quality"), style="TButton").grid(row=0, column=0, padx=10)
+        ttk.Button(self.controls_frame, text="Medium", command=lambda: self._action("switch_quality", quality="Medium Quality"), style="TButton").grid(row=0, column=1, padx=10)
+        ttk.Button(self.controls_frame, text="High", command=lambda: self._action("switch_quality", quality="High Quality"), style="TButton").grid(row=0, column=2, padx=10)
+        ttk.Button(self.controls_frame, text="Auto", command=lambda: self._action("switch_quality", quality="auto"), style="TButton").grid(row=0, column=3, padx=10)
+        ttk.Button(self.controls_frame, text="▶ Play", command=lambda: self._action("play"), style="TButton").grid(row=0, column=4, padx=10)
+        ttk.Button(self.controls_frame, text="⏸ Pause", command=lambda: self._action("pause"), style="TButton").grid(row=0, column=5, padx=10)
+        ttk.Button(self.controls_frame, text="⏯ Resume", command=lambda: self._action("resume"), style="TButton").grid(row=0, column=6, padx=10)
+        ttk.Button(self.controls_frame, text="📊 HUD", command=lambda: self._action("toggle_hud"), style="TButton").grid(row=0, column=7, padx=10)
+        self.root.bind("<F3>", lambda event: self._action("toggle_hud"))
+        if len(self.subtitle_store.languages) > 1:
+            language_box = ttk.Combobox(self.controls_frame, textvariable=self.language_var, width=8, state="readonly",
+                                        values=self.subtitle_store.languages)
+            language_box.grid(row=0, column=8, padx=10)
+            language_box.bind("<<ComboboxSelected>>", lambda event: self._action(
+                "switch_subtitles", language=self.language_var.get()))
+
+        self.canvas.bind("<Configure>", self._on_canvas_resize)
+        self._update_seek_bar()
+
+        self.warm_up = startup.WarmUp(WARM_UP_MODULES)
+        self.root.after(20, self._poll_warm_up)
+
+    # ---------- deferred start-up ----------
+
+    def _poll_warm_up(self):
+        if not self.warm_up.done.is_set():
+            self.root.after(20, self._poll_warm_up)
+            return
+        startup.mark("warm")
+        if self.warm_up.error is not None:
+            print(f"⚠️ Could not load the player: {self.warm_up.error}")
+            raise self.warm_up.error
+        self._apply_theme()
+        self._build_engine()
+        startup.mark("ready")
+        if self.on_ready:
+            self.on_ready()
+
+    def _apply_theme(self):
+        from ttkthemes import ThemedStyle
+
+        style = ThemedStyle(self.root)
+        style.set_theme("radiance")
+        # Style options belong to a theme, so they go on after it is active
+        style.configure("TButton", font=("Arial", 12, "bold"), padding=5)
+        style.map("TButton", background=[("active", "#FF5733")])
+        self.style = style
+
+    def _build_engine(self):
+        from engine import BasicVideoPlayer, ControlMediator, QualitySwitchDecorator, StoppedState, SubtitleDecorator
+        from tk_sinks import LabelSubtitleSink, TkCanvasSink
 
-        base_player = BasicVideoPlayer(self.quality_levels["Medium Quality"])
-        subtitle_decorator = SubtitleDecorator(base_player, self.subtitle_path, self.subtitle_label)
-        quality_decorator = QualitySwitchDecorator(subtitle_decorator, self.quality_levels, self.canvas, root, subtitle_decorator)
+        self.quality_levels = {
+            "Low Quality": "videofolder/Natural_144p.mp4",
+            "Medium Quality": "videofolder/Natural_720p_.mp4",
+            "High Quality": "videofolder/Natural_1080p_original.mp4"
+        }
+        if os.path.exists(self.quality_levels_path):
+            # Written by ladder.py
+            from ladder import load_quality_levels
+            self.quality_levels = load_quality_levels(self.quality_levels_path)
+
+        subtitle_sink = None if self.subtitle_overlay else LabelSubtitleSink(self.subtitle_label)
+        base_player = BasicVideoPlayer(self.quality_levels.get("Medium Quality", next(iter(self.quality_levels.values()))))
+        subtitle_decorator = SubtitleDecorator(base_player, self.subtitle_store, subtitle_sink,
+                                               overlay=self.subtitle_overlay, language=self.language_var.get())
+        quality_decorator = QualitySwitchDecorator(subtitle_decorator, self.quality_levels, TkCanvasSink(self.canvas),
+                                                   self.root, subtitle_decorator, **self.engine_options)
         self.video_player = quality_decorator
         self.video_player.set_state(StoppedState())
+        if self.viewport:
+            self.video_player.set_viewport(*self.viewport)
 
         self.mediator = ControlMediator(self.video_player)
+        if self._pending_action:
+            action, kwargs = self._pending_action
+            self._pending_action = None
+            self.mediator.handle_action(action, **kwargs)
+
+    def _action(self, action, **kwargs):
+        if self.mediator is None:
+            # Still starting up: the last choice is carried out once the engine exists
+            self._pending_action = (action, kwargs)
+            return
+        self.mediator.handle_action(action, **kwargs)
+
+    # ---------- widgets ----------
 
-        self.style = ttk.Style()
-        self.style.configure("TButton", font=("Arial", 12, "bold"), padding=5)
-        self.style.map("TButton", background=[("active", "#FF5733")])
+    def _on_canvas_resize(self, event):
+        border = 2 * int(self.canvas.cget("highlightthickness"))
+        self.viewport = (event.width - border, event.height - border)
+        if self.video_player is not None:
+            self.video_player.set_viewport(*self.viewport)
 
-        ttk.Button(self.controls_frame, text="Low", command=lambda: self.mediator.handle_action("switch_quality", quality="Low Quality"), style="TButton").grid(row=0, column=0, padx=10)
-        ttk.Button(self.controls_frame, text="Medium", command=lambda: self.mediator.handle_action("switch_quality", quality="Medium Quality"), style="TButton").grid(row=0, column=1, padx=10)
-        ttk.Button(self.controls_frame, text="High", command=lambda: self.mediator.handle_action("switch_quality", quality="High Quality"), style="TButton").grid(row=0, column=2, padx=10)
-        ttk.Button(self.controls_frame, text="▶ Play", command=lambda: self.mediator.handle_action("play"), style="TButton").grid(row=0, column=3, padx=10)
-        ttk.Button(self.controls_frame, text="⏸ Pause", command=lambda: self.mediator.handle_action("pause"), style="TButton").grid(row=0, column=4, padx=10)
-        ttk.Button(self.controls_frame, text="⏯ Resume", command=lambda: self.mediator.handle_action("resume"), style="TButton").grid(row=0, column=5, padx=10)
+    def _on_seek_drag(self, time_s):
+        if self.seeking and self.mediator is not None:
+            self.mediator.handle_action("seek", time=time_s, preview=True)
+
+    def _on_seek_release(self, event):
+        self.seeking = False
+        if self.mediator is not None:
+            self.mediator.handle_action("seek", time=self.seek_var.get())
+
+    def _on_seek_hover(self, event):
+        """Thumbnail of the time under the pointer, shown just above the seek bar"""
+        if self.video_player is None or not self.video_player.duration():
+            return
+        time_s = self.seek_bar.get(event.x, event.y)
+        image = self.video_player.thumbnail_at(time_s)
+        if image is None:
+            return  # sprites are still being generated
+        from PIL import ImageTk
+
+        if self.preview_photo is None or (self.preview_photo.width(), self.preview_photo.height()) != image.size:
+            self.preview_photo = ImageTk.PhotoImage(image)
+            self.preview_label.configure(image=self.preview_photo)
+        else:
+            self.preview_photo.paste(image)
+        minutes, seconds = divmod(int(time_s), 60)
+        self.preview_label.configure(text=f"{minutes}:{seconds:02d}")
+        x = min(max(0, event.x - image.width // 2), max(0, self.seek_bar.winfo_width() - image.width))
+        self.preview_label.place(in_=self.seek_bar, x=x, y=-4, anchor=tk.SW)
+        self.preview_label.lift()
+
+    def _update_seek_bar(self):
+        """Follow the playhead, except while the user is dragging"""
+        if self.video_player is not None:
+            duration = self.video_player.duration()
+            if duration:
+                self.seek_bar.configure(to=duration)
+            if not self.seeking:
+                self.seek_var.set(self.video_player.current_time)
+        self.root.after(250, self._update_seek_bar)
 
 
 # ========================== Main ==========================
 
-if __name__ == "__main__":
-    root = ThemedTk(theme="breeze")
-    app = VideoPlayerApp(root)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tk video player")
+    parser.add_argument("--manifest", help="Packaged manifest (path or URL) to play segment by segment")
+    parser.add_argument("--frame-workers", type=int, default=0)
+    parser.add_argument("--metrics-dir")
+    parser.add_argument("--single-demux", action="store_true", help="Decode audio and video with one MediaPlayer")
+    parser.add_argument("--subtitle-overlay", action="store_true", help="Burn subtitles into the video")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="Quit once the player is ready and print the startup marks as JSON (see startup.py)")
+    args = parser.parse_args(argv)
+
+    root = tk.Tk()
+    # The window counts as shown once Tk has mapped it and finished the idle pass that draws it
+    root.bind("<Map>", lambda event: event.widget is root and "window" not in startup.MARKS
+              and root.after_idle(startup.mark, "window"))
+
+    def ready():
+        if not args.exit_after_startup:
+            return
+        if "window" not in startup.MARKS:
+            root.after(10, ready)
+            return
+        print(json.dumps(startup.MARKS), flush=True)
+        os._exit(0)  # don't wait for background loaders; only the timings matter here
+
+    VideoPlayerApp(root, frame_workers=args.frame_workers, manifest_path=args.manifest, metrics_dir=args.metrics_dir,
+                   single_demux=args.single_demux, subtitle_overlay=args.subtitle_overlay, on_ready=ready)
     root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
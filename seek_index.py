@@ -0,0 +1,150 @@
+import bisect
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import cv2
+
+# ========================== Seek Index ==========================
+
+INDEX_VERSION = 1
+
+
+def sidecar_path(video_path):
+    return video_path + ".seekidx.json"
+
+
+class SeekIndex:
+    """Frame timestamps and keyframe positions of one video file.
+
+    Built once and cached next to the video. The cache is reused only while the
+    file's size and mtime still match. ``seek`` jumps to the keyframe at or
+    before the target and decodes forward to the exact frame, so a seek costs
+    at most one GOP of decoding on every rendition.
+    """
+
+    def __init__(self, video_path, size, mtime_ns, pts_ms, keyframes):
+        self.video_path = video_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.pts_ms = pts_ms  # presentation time of every frame, in display order
+        self.keyframes = keyframes  # frame numbers of keyframes, ascending
+
+    def __len__(self):
+        return len(self.pts_ms)
+
+    # ---------- building ----------
+
+    @classmethod
+    def build(cls, video_path):
+        stat = os.stat(video_path)
+        pts_ms, keyframes = _probe_with_ffprobe(video_path) if shutil.which("ffprobe") else (None, None)
+        if not pts_ms:
+            pts_ms, keyframes = _probe_with_opencv(video_path)
+        return cls(video_path, stat.st_size, stat.st_mtime_ns, pts_ms, keyframes)
+
+    @classmethod
+    def load(cls, video_path):
+        """Cached index for ``video_path``, or None if there is none or it is stale"""
+        try:
+            with open(sidecar_path(video_path)) as f:
+                data = json.load(f)
+            stat = os.stat(video_path)
+        except (OSError, ValueError):
+            return None
+        if (data.get("version") != INDEX_VERSION or data["size"] != stat.st_size
+                or data["mtime_ns"] != stat.st_mtime_ns):
+            return None
+        return cls(video_path, data["size"], data["mtime_ns"], data["pts_ms"], data["keyframes"])
+
+    @classmethod
+    def load_or_build(cls, video_path):
+        index = cls.load(video_path)
+        if index is None:
+            index = cls.build(video_path)
+            index.save()
+        return index
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "pts_ms": self.pts_ms,
+            "keyframes": self.keyframes,
+        }
+        tmp_path = sidecar_path(self.video_path) + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, sidecar_path(self.video_path))
+        except OSError as e:
+            # Read-only media still gets an in-memory index
+            print(f"⚠️ Could not write seek index for {self.video_path}: {e}")
+
+    # ---------- lookups ----------
+
+    def frame_at(self, time_s):
+        """Number of the frame on screen at ``time_s``"""
+        return max(0, bisect.bisect_right(self.pts_ms, time_s * 1000) - 1)
+
+    def keyframe_before(self, frame):
+        position = bisect.bisect_right(self.keyframes, frame) - 1
+        return self.keyframes[position] if position >= 0 else 0
+
+    def seek(self, cap, time_s):
+        """Position ``cap`` so the next read() returns the frame shown at ``time_s``; returns its pts"""
+        if not self.pts_ms:
+            cap.set(cv2.CAP_PROP_POS_MSEC, time_s * 1000)
+            return time_s
+        frame = self.frame_at(time_s)
+        keyframe = self.keyframe_before(frame)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+        for _ in range(frame - keyframe):
+            if not cap.grab():
+                break
+        return self.pts_ms[frame] / 1000
+
+
+def _probe_with_ffprobe(video_path):
+    """Packet timestamps and keyframe flags straight from the container, without decoding"""
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path]
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+    packets = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if pts_time and pts_time != "N/A":
+            packets.append((round(float(pts_time) * 1000, 3), "K" in flags))
+    # Packets arrive in decode order; frames are numbered in presentation order
+    packets.sort()
+    pts_ms = [pts for pts, _ in packets]
+    keyframes = [i for i, (_, key) in enumerate(packets) if key]
+    return pts_ms, keyframes or [0]
+
+
+def _probe_with_opencv(video_path):
+    """Fallback without ffprobe: timestamps from a grab() pass, keyframes unknown.
+
+    Every frame is listed as a seek point, so seeks go straight to the exact
+    frame via CAP_PROP_POS_FRAMES. They stay frame-accurate, but their cost is
+    then up to OpenCV rather than bounded by the GOP length.
+    """
+    cap = cv2.VideoCapture(video_path)
+    pts_ms = []
+    while cap.grab():
+        pts_ms.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+    cap.release()
+    return pts_ms, list(range(len(pts_ms)))
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        index = SeekIndex.load_or_build(path)
+        print(f"📇 {path}: {len(index)} frames, {len(index.keyframes)} keyframes")
@@ -0,0 +1,289 @@
+import argparse
+import bisect
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import cv2
+
+# ========================== Packaging ==========================
+
+MANIFEST_VERSION = 1
+
+
+def _slug(quality):
+    return quality.lower().replace(" quality", "").replace(" ", "_")
+
+
+def _package_with_ffmpeg(source, out_dir, segment_duration, copy):
+    """Cut ``source`` into keyframe-started segments; returns [(file, start, end)]"""
+    video_codec = ["-c:v", "copy"] if copy else [
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+        # A keyframe exactly on every boundary so all renditions cut at the same instants
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_duration})", "-sc_threshold", "0",
+    ]
+    segment_list = os.path.join(out_dir, "segments.csv")
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", source, "-map", "0:v:0", "-an", *video_codec,
+           "-f", "segment", "-segment_time", str(segment_duration), "-reset_timestamps", "1",
+           "-segment_list", segment_list, "-segment_list_type", "csv",
+           os.path.join(out_dir, "seg_%05d.mp4")]
+    subprocess.run(cmd, check=True)
+    with open(segment_list, newline="") as f:
+        rows = [(name, float(start), float(end)) for name, start, end in csv.reader(f)]
+    os.remove(segment_list)
+    return rows
+
+
+def _package_with_opencv(source, out_dir, segment_duration):
+    """Fallback without ffmpeg: re-encode with VideoWriter, starting a new file (and keyframe) every segment"""
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    frames_per_segment = max(1, round(segment_duration * fps))
+    rows = []
+    writer = None
+    index = 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if index % frames_per_segment == 0:
+            if writer:
+                writer.release()
+            name = f"seg_{index // frames_per_segment:05d}.mp4"
+            writer = cv2.VideoWriter(os.path.join(out_dir, name), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+            rows.append([name, index / fps, index / fps])
+        writer.write(frame)
+        index += 1
+        rows[-1][2] = index / fps
+    if writer:
+        writer.release()
+    cap.release()
+    return [tuple(row) for row in rows]
+
+
+def package(quality_levels, out_dir, segment_duration=4.0, copy=False):
+    """Segment every rendition into ``out_dir`` and write ``manifest.json``; returns the manifest path"""
+    os.makedirs(out_dir, exist_ok=True)
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+    manifest = {"version": MANIFEST_VERSION, "segment_duration": segment_duration, "renditions": {}}
+
+    for quality, source in quality_levels.items():
+        rendition_dir = os.path.join(out_dir, _slug(quality))
+        os.makedirs(rendition_dir, exist_ok=True)
+        print(f"📦 Packaging {quality}: {source}")
+        if have_ffmpeg:
+            rows = _package_with_ffmpeg(source, rendition_dir, segment_duration, copy)
+        else:
+            rows = _package_with_opencv(source, rendition_dir, segment_duration)
+
+        cap = cv2.VideoCapture(source)
+        width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        cap.release()
+        segments = []
+        for name, start, end in rows:
+            path = os.path.join(rendition_dir, name)
+            segments.append({
+                "uri": os.path.relpath(path, out_dir).replace(os.sep, "/"),
+                "start": start,
+                "duration": end - start,
+                "bytes": os.path.getsize(path),
+            })
+        total = sum(s["duration"] for s in segments)
+        manifest["renditions"][quality] = {
+            "width": width,
+            "height": height,
+            "fps": fps,
+            "bandwidth": int(sum(s["bytes"] for s in segments) * 8 / total) if total else 0,
+            "segments": segments,
+        }
+
+    # Audio is the same for every rendition: one continuous track keeps the A/V clock seamless
+    first_source = next(iter(quality_levels.values()))
+    audio_path = os.path.join(out_dir, "audio.m4a")
+    if have_ffmpeg and subprocess.run(["ffmpeg", "-v", "error", "-y", "-i", first_source, "-vn",
+                                       "-c:a", "aac", "-b:a", "128k", audio_path]).returncode == 0:
+        manifest["audio"] = "audio.m4a"
+    else:
+        manifest["audio"] = os.path.relpath(first_source, out_dir).replace(os.sep, "/")
+    manifest["duration"] = max(
+        (r["segments"][-1]["start"] + r["segments"][-1]["duration"] for r in manifest["renditions"].values()
+         if r["segments"]), default=0.0)
+
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+# ========================== Segment Playback ==========================
+
+def load_manifest(manifest_path):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {manifest_path}")
+    return manifest
+
+
+class SegmentedCapture:
+    """``cv2.VideoCapture`` look-alike that plays a packaged manifest segment by segment.
+
+    Only the current segment is open. ``request_rendition`` takes effect at the
+    next segment boundary, so switching quality never needs a seek. Positions
+    from ``get(CAP_PROP_POS_MSEC)`` are on the presentation timeline, not
+    relative to the segment.
+    """
+
+    def __init__(self, manifest_path, quality, source=None):
+        self.quality = quality
+        self.pending_quality = None
+        self.on_rendition_change = None  # called with the new quality at the boundary where it applies
+        if source is None:
+            base_dir = os.path.dirname(os.path.abspath(manifest_path))
+            self.manifest = load_manifest(manifest_path)
+            # Maps a manifest URI to something cv2.VideoCapture / MediaPlayer can open
+            self.resolve = self.open_segment = lambda uri: os.path.join(base_dir, uri)
+        else:
+            # Remote sources (see http_source.RemoteSegmentSource) fetch segments themselves
+            self.manifest = source.manifest
+            self.resolve = source.resolve
+            self.open_segment = source.open_segment
+        # Optional source hook: told which segment just opened so it can fetch ahead
+        self.prefetch_after = getattr(source, "prefetch_after", None)
+        # Optional source hook: where to play the audio track from, e.g. a cached local copy
+        self.audio_location = getattr(source, "audio_path", None)
+        self.segment_index = 0
+        self._cap = None
+        self._opened = True
+        self._open(0)
+
+    # ---------- manifest helpers ----------
+
+    def _segments(self, quality=None):
+        return self.manifest["renditions"][quality or self.quality]["segments"]
+
+    @property
+    def audio_path(self):
+        if self.audio_location:
+            return self.audio_location(self.manifest["audio"])
+        return self.resolve(self.manifest["audio"])
+
+    def segment_at(self, time_s):
+        starts = [segment["start"] for segment in self._segments()]
+        return max(0, bisect.bisect_right(starts, time_s) - 1)
+
+    def _open(self, index):
+        if self._cap:
+            self._cap.release()
+            self._cap = None
+        segments = self._segments()
+        if index >= len(segments):
+            return False
+        self.segment_index = index
+        self._cap = cv2.VideoCapture(self.open_segment(segments[index]["uri"]))
+        if self.prefetch_after:
+            self.prefetch_after(self.quality, index)
+        return self._cap.isOpened()
+
+    def _apply_pending(self):
+        """Make a requested rendition current before the next segment is opened"""
+        if self.pending_quality:
+            self.quality, self.pending_quality = self.pending_quality, None
+            if self.on_rendition_change:
+                self.on_rendition_change(self.quality)
+
+    def _advance(self):
+        """Open the next segment, applying a pending rendition switch at the boundary"""
+        self._apply_pending()
+        return self._open(self.segment_index + 1)
+
+    def request_rendition(self, quality):
+        if quality not in self.manifest["renditions"]:
+            raise KeyError(quality)
+        self.pending_quality = None if quality == self.quality else quality
+        if self.pending_quality and self.prefetch_after:
+            self.prefetch_after(self.pending_quality, self.segment_index)
+
+    # ---------- VideoCapture interface ----------
+
+    def isOpened(self):
+        return self._opened and self._cap is not None
+
+    def grab(self):
+        while self._cap is not None:
+            if self._cap.grab():
+                return True
+            if not self._advance():
+                return False
+        return False
+
+    def retrieve(self, image=None):
+        return self._cap.retrieve(image) if self._cap is not None else (False, None)
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            if self._cap is None:
+                return self.manifest["duration"] * 1000
+            return self._segments()[self.segment_index]["start"] * 1000 + self._cap.get(prop)
+        if prop == cv2.CAP_PROP_FPS:
+            return self.manifest["renditions"][self.quality]["fps"]
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.manifest["duration"] * self.manifest["renditions"][self.quality]["fps"]
+        return self._cap.get(prop) if self._cap is not None else 0
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_MSEC:
+            return self._cap.set(prop, value) if self._cap is not None else False
+        time_s = value / 1000
+        # A seek opens a new segment anyway, so a pending switch takes effect right away
+        self._apply_pending()
+        index = self.segment_at(time_s)
+        if not self._open(index):
+            return False
+        offset = time_s - self._segments()[index]["start"]
+        return self._cap.set(cv2.CAP_PROP_POS_MSEC, offset * 1000) if offset > 0 else True
+
+    def release(self):
+        self._opened = False
+        if self._cap:
+            self._cap.release()
+            self._cap = None
+
+
+# ========================== CLI ==========================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Package renditions into aligned segments with a manifest")
+    parser.add_argument("out_dir")
+    parser.add_argument("--rendition", action="append", metavar="QUALITY=PATH",
+                        help='e.g. "Low Quality=videofolder/Natural_144p.mp4" (repeatable, lowest first)')
+    parser.add_argument("--segment-duration", type=float, default=4.0)
+    parser.add_argument("--copy", action="store_true",
+                        help="Stream-copy instead of re-encoding; only aligned if the sources' keyframes already are")
+    args = parser.parse_args(argv)
+
+    quality_levels = dict(item.split("=", 1) for item in args.rendition or [])
+    if not quality_levels:
+        quality_levels = {
+            "Low Quality": "videofolder/Natural_144p.mp4",
+            "Medium Quality": "videofolder/Natural_720p_.mp4",
+            "High Quality": "videofolder/Natural_1080p_original.mp4",
+        }
+    print(f"📝 Wrote {package(quality_levels, args.out_dir, args.segment_duration, args.copy)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
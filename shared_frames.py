@@ -0,0 +1,185 @@
+import bisect
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# ========================== Shared-Memory Frame Ring ==========================
+
+_END = 2 ** 62
+
+
+def plan_chunks(start_frame, frame_count, chunk_frames, keyframes=None):
+    """(seek frame, first frame, end frame) of every chunk, each decoded in one sequential pass.
+
+    With the keyframes of a ``SeekIndex`` every chunk after the first starts
+    on a keyframe and spans whole GOPs (at least ``chunk_frames`` frames), so
+    a worker's seek lands exactly and costs no decoding. The first chunk
+    seeks to the keyframe before ``start_frame`` and decodes forward to it.
+    Without keyframes chunks are ``chunk_frames`` long and rely on OpenCV's
+    frame seek. The last chunk runs to the end of the file.
+    """
+    if keyframes:
+        boundaries = keyframes[bisect.bisect_right(keyframes, start_frame):]
+        position = bisect.bisect_right(keyframes, start_frame) - 1
+        first_seek = keyframes[position] if position >= 0 else 0
+    else:
+        boundaries = range(start_frame + chunk_frames, frame_count, chunk_frames)
+        first_seek = start_frame
+    starts = [start_frame]
+    for boundary in boundaries:
+        if boundary - starts[-1] >= chunk_frames:
+            starts.append(boundary)
+    ends = starts[1:] + [_END]
+    return [(first_seek if i == 0 else first, first, end) for i, (first, end) in enumerate(zip(starts, ends))]
+
+
+def _prepare_worker(video_path, shm_name, slots, shape, slot_frame, slot_pts, released, end_frame,
+                    next_chunk, cond, stop, chunks):
+    """Worker process: decode whole chunks of frames and resize them straight into the shared ring"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((slots,) + shape, np.uint8, buffer=shm.buf)
+    height, width = shape[:2]
+    cap = cv2.VideoCapture(video_path)
+    position = None
+    try:
+        while not stop.is_set():
+            with next_chunk.get_lock():
+                chunk = next_chunk.value
+                next_chunk.value += 1
+            if chunk >= len(chunks):
+                break
+            seek_frame, first, end = chunks[chunk]
+            if first >= end_frame.value:
+                break
+            if position != first:
+                # Land on a keyframe, then decode forward (only the first chunk has frames to skip)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, seek_frame)
+                for _ in range(first - seek_frame):
+                    cap.grab()
+
+            for index in range(first, end):
+                with cond:
+                    # The slot still holds a frame the UI hasn't finished with
+                    while index >= released.value + slots and not stop.is_set():
+                        cond.wait(0.5)
+                if stop.is_set():
+                    return
+                ok, frame = cap.read()
+                if not ok:
+                    with cond:
+                        end_frame.value = min(end_frame.value, index)
+                        cond.notify_all()
+                    break
+                pts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                slot = index % slots
+                cv2.resize(frame, (width, height), dst=frames[slot])
+                with cond:
+                    slot_pts[slot] = pts
+                    slot_frame[slot] = index
+                    cond.notify_all()
+                position = index + 1
+    finally:
+        cap.release()
+        del frames
+        shm.close()
+
+
+class ProcessFrameSource:
+    """Decodes and resizes one video in a pool of worker processes.
+
+    Workers take chunks of consecutive frames (see ``plan_chunks``) from a
+    shared counter, seek to the chunk and write BGR frames of ``render_size``
+    into a ``SharedMemory`` ring. Pass the rendition's ``SeekIndex`` so
+    chunks start on keyframes. Frame ``n`` always lives in slot ``n % slots``.
+    ``next_frame`` hands the UI process zero-copy NumPy views in frame order,
+    and ``release_before`` lets workers reuse the slots behind the playhead.
+    """
+
+    def __init__(self, video_path, render_size, start_time=0.0, workers=None, chunk_frames=24, slots=None,
+                 min_slots=10, seek_index=None):
+        workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open {video_path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        if seek_index is not None and seek_index.pts_ms:
+            self.start_frame = seek_index.frame_at(start_time)
+            chunks = plan_chunks(self.start_frame, len(seek_index), chunk_frames, seek_index.keyframes)
+        else:
+            self.start_frame = int(round(start_time * self.fps))
+            chunks = plan_chunks(self.start_frame, frame_count, chunk_frames)
+        self.next_index = self.start_frame
+
+        width, height = render_size
+        self.shape = (height, width, 3)
+        # Enough slots for the consumer's window plus one chunk of lookahead per worker. Chunks follow
+        # the GOP length, which is capped here; longer GOPs only cost parallelism, not correctness
+        lengths = sorted(end - first for _, first, end in chunks[:-1]) or [chunk_frames]
+        typical = min(max(lengths[len(lengths) // 2], chunk_frames), 4 * chunk_frames)
+        self.slots = slots or (min_slots + workers * typical)
+
+        ctx = mp.get_context("spawn")  # never fork a process that owns a Tk interpreter
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * height * width * 3)
+        self.frames = np.ndarray((self.slots,) + self.shape, np.uint8, buffer=self._shm.buf)
+        self._slot_frame = ctx.Array("q", [-1] * self.slots, lock=False)
+        self._slot_pts = ctx.Array("d", self.slots, lock=False)
+        self._released = ctx.Value("q", self.start_frame, lock=False)
+        self._end_frame = ctx.Value("q", _END, lock=False)
+        self._next_chunk = ctx.Value("q", 0)
+        self._cond = ctx.Condition()
+        self._stop = ctx.Event()
+
+        self.processes = [
+            ctx.Process(target=_prepare_worker, daemon=True, args=(
+                video_path, self._shm.name, self.slots, self.shape, self._slot_frame, self._slot_pts,
+                self._released, self._end_frame, self._next_chunk, self._cond, self._stop, chunks))
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def next_frame(self):
+        """(view, pts) of the next frame in order, or None at end of stream or after close().
+
+        The view aliases shared memory and stays valid until ``release_before``
+        moves past its frame number.
+        """
+        index = self.next_index
+        slot = index % self.slots
+        with self._cond:
+            while self._slot_frame[slot] != index:
+                if index >= self._end_frame.value or self._stop.is_set():
+                    return None
+                self._cond.wait(0.1)
+            pts = self._slot_pts[slot]
+        self.next_index += 1
+        return self.frames[slot], pts
+
+    def release_before(self, index):
+        """Allow workers to overwrite every frame numbered below ``index``"""
+        with self._cond:
+            if index > self._released.value:
+                self._released.value = index
+                self._cond.notify_all()
+
+    def close(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for process in self.processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        self.frames = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A view is still referenced somewhere; the segment is freed when it goes away
+            pass
+        self._shm.unlink()
@@ -0,0 +1,122 @@
+import argparse
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+# ========================== Startup Marks ==========================
+
+MARKS = {}  # name -> time.time() it was reached
+# Set by launch(): marks are echoed to stderr so they split the -X importtime output into phases
+TRACE = os.environ.get("PLAYER_STARTUP_TRACE") == "1"
+MARK_PREFIX = "startup mark: "
+
+
+def mark(name):
+    MARKS[name] = time.time()
+    if TRACE:
+        print(MARK_PREFIX + name, file=sys.stderr, flush=True)
+
+
+class WarmUp:
+    """Imports modules on a background thread so the UI thread never blocks on them.
+
+    Plain imports are thread-safe, so the UI thread can import the same
+    modules later and simply finds them loaded. Poll ``done`` from the UI
+    loop; ``error`` holds the first failed import.
+    """
+
+    def __init__(self, modules):
+        self.modules = modules
+        self.timings = {}  # module -> seconds its import took here
+        self.error = None
+        self.done = threading.Event()
+        threading.Thread(target=self._run, daemon=True, name="warm-up").start()
+
+    def _run(self):
+        try:
+            for name in self.modules:
+                started = time.perf_counter()
+                importlib.import_module(name)
+                self.timings[name] = time.perf_counter() - started
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+
+# ========================== Startup Report ==========================
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(text):
+    """(self us, cumulative us, depth, module, phase) for every line of ``-X importtime`` output.
+
+    ``phase`` is the last startup mark printed before the line, or "start".
+    """
+    rows = []
+    phase = "start"
+    for line in text.splitlines():
+        if line.startswith(MARK_PREFIX):
+            phase = line[len(MARK_PREFIX):]
+            continue
+        match = _IMPORT_LINE.match(line)
+        if match:
+            rows.append((int(match[1]), int(match[2]), (len(match[3]) - 1) // 2, match[4], phase))
+    return rows
+
+
+def launch(script, args=(), importtime=False, timeout=120):
+    """Run ``script --exit-after-startup`` in a fresh interpreter.
+
+    Returns (seconds from launch to each mark, stderr). The script prints
+    its MARKS as JSON on the last stdout line and exits once ready.
+    """
+    env = dict(os.environ, PLAYER_STARTUP_TRACE="1")
+    cmd = [sys.executable, *(["-X", "importtime"] if importtime else []), os.path.abspath(script),
+           "--exit-after-startup", *args]
+    launched = time.time()
+    # The app opens its media relative to its own directory
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=timeout,
+                          cwd=os.path.dirname(os.path.abspath(script)))
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(proc.stderr.strip()[-2000:] or f"{script} exited with {proc.returncode}")
+    marks = json.loads(lines[-1])
+    return {name: t - launched for name, t in marks.items()}, proc.stderr
+
+
+def report(script="reuse.py", top=15, args=()):
+    """Print the slowest top-level imports of each startup phase, like a summarised ``-X importtime``"""
+    marks, stderr = launch(script, args, importtime=True)
+    print("🚀 " + ", ".join(f"{name} after {seconds:.3f}s" for name, seconds in marks.items()))
+    phases = {}
+    for self_us, cumulative_us, depth, module, phase in parse_importtime(stderr):
+        if depth == 0:
+            phases.setdefault(phase, []).append((cumulative_us, self_us, module))
+    for phase, rows in phases.items():
+        total = sum(cumulative for cumulative, _, _ in rows)
+        title = "before the first mark" if phase == "start" else f"after {phase}"
+        print(f"\n📦 Imported {title}: {len(rows)} top-level modules, {total / 1000:.1f} ms")
+        print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        for cumulative, self_us, module in sorted(rows, reverse=True)[:top]:
+            print(f"{cumulative / 1000:14.1f} {self_us / 1000:8.1f}  {module}")
+    return marks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Where the player's startup time goes (-X importtime, by phase)")
+    parser.add_argument("script", nargs="?", default="reuse.py")
+    parser.add_argument("--top", type=int, default=15)
+    args, script_args = parser.parse_known_args(argv)
+    report(args.script, args.top, script_args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
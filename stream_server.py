@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import email.utils
+import mimetypes
+import os
+import sys
+from urllib.parse import unquote, urlsplit
+
+# ========================== HTTP Streaming Server ==========================
+
+MAX_HEADER_LINES = 100
+
+REASONS = {
+    200: "OK",
+    206: "Partial Content",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    416: "Range Not Satisfiable",
+}
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single ``bytes=`` range, None if absent, or "invalid" if unsatisfiable"""
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        # Multi-range responses aren't worth it for video; serve the whole file
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                return "invalid"
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return "invalid"
+    return start, min(end, size - 1)
+
+
+class StreamServer:
+    """Serves a directory of renditions/segments over HTTP/1.1 on asyncio.
+
+    Each connection stays open for as many requests as the client sends
+    (keep-alive) until it is idle for ``keepalive_timeout``. Single byte-range
+    requests get 206 responses, and file bodies go out with
+    ``loop.sendfile`` so the kernel copies them straight from the page cache.
+    """
+
+    def __init__(self, root, host="127.0.0.1", port=8000, keepalive_timeout=15.0):
+        self.root = os.path.realpath(root)
+        self.host = host
+        self.port = port
+        self.keepalive_timeout = keepalive_timeout
+        self.server = None
+        self.active_connections = 0
+        self.requests = 0
+        self.bytes_sent = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        print(f"📡 Serving {self.root} on http://{self.host}:{self.port}/")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        self.active_connections += 1
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+                if not request_line.strip():
+                    break
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send_error(writer, 400, keep_alive=False)
+                    break
+                length = headers.get("content-length")
+                if length:
+                    # Digits only: int() would also take "-1", "+5" or "1_000"
+                    if not (length.isascii() and length.isdigit()):
+                        await self._send_error(writer, 400, keep_alive=False)
+                        break
+                    await reader.readexactly(int(length))
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                self.requests += 1
+                await self._respond(method, target, headers, writer, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.active_connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _resolve(self, target):
+        path = unquote(urlsplit(target).path).lstrip("/")
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, full_path]) != self.root:
+            return None
+        return full_path
+
+    async def _send_head(self, writer, status, headers, keep_alive):
+        headers = dict(headers)
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        headers["Date"] = email.utils.formatdate(usegmt=True)
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"] + [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _send_error(self, writer, status, keep_alive, extra_headers=None):
+        body = f"{status} {REASONS[status]}\n".encode()
+        headers = {"Content-Type": "text/plain", "Content-Length": str(len(body))}
+        headers.update(extra_headers or {})
+        await self._send_head(writer, status, headers, keep_alive)
+        writer.write(body)
+        await writer.drain()
+
+    async def _respond(self, method, target, headers, writer, keep_alive):
+        if method not in ("GET", "HEAD"):
+            await self._send_error(writer, 405, keep_alive, {"Allow": "GET, HEAD"})
+            return
+        path = self._resolve(target)
+        if path is None:
+            await self._send_error(writer, 403, keep_alive)
+            return
+        if not os.path.isfile(path):
+            await self._send_error(writer, 404, keep_alive)
+            return
+
+        stat = os.stat(path)
+        size = stat.st_size
+        byte_range = parse_range(headers.get("range"), size)
+        if byte_range == "invalid":
+            await self._send_error(writer, 416, keep_alive, {"Content-Range": f"bytes */{size}"})
+            return
+
+        status, start, end = (206, *byte_range) if byte_range else (200, 0, size - 1)
+        length = max(0, end - start + 1)
+        response_headers = {
+            "Content-Type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "Content-Length": str(length),
+            "Accept-Ranges": "bytes",
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+        }
+        if status == 206:
+            response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        await self._send_head(writer, status, response_headers, keep_alive)
+
+        if method == "GET" and length:
+            with open(path, "rb") as f:
+                # Zero-copy where the transport supports it, plain read/write otherwise
+                await asyncio.get_running_loop().sendfile(writer.transport, f, start, length)
+            self.bytes_sent += length
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve renditions or packaged segments over HTTP with range support")
+    parser.add_argument("--root", default=".")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--keepalive-timeout", type=float, default=15.0)
+    args = parser.parse_args(argv)
+
+    server = StreamServer(args.root, args.host, args.port, args.keepalive_timeout)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
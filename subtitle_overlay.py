@@ -0,0 +1,224 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pysubs2
+from PIL import Image, ImageDraw, ImageFont
+
+# ========================== Subtitle Overlay ==========================
+
+_POS = re.compile(r"\\pos\(\s*([-\d.]+)\s*,\s*([-\d.]+)\s*\)")
+_ALIGN = re.compile(r"\\an([1-9])")
+# Used when a style's font isn't installed, by (bold, italic)
+FALLBACK_FONTS = {
+    (False, False): "DejaVuSans.ttf",
+    (True, False): "DejaVuSans-Bold.ttf",
+    (False, True): "DejaVuSans-Oblique.ttf",
+    (True, True): "DejaVuSans-BoldOblique.ttf",
+}
+
+
+def _rgba(color):
+    # ASS alpha is transparency: 0 is opaque
+    return color.r, color.g, color.b, 255 - color.a
+
+
+def wrap(draw, text, font, max_width, stroke_width=0):
+    """Break each line of ``text`` at spaces so it fits ``max_width`` pixels; a single longer word stays whole"""
+    lines = []
+    for line in text.split("\n"):
+        words = line.split(" ")
+        current = words[0]
+        for word in words[1:]:
+            candidate = f"{current} {word}"
+            if draw.textlength(candidate, font=font) + 2 * stroke_width <= max_width:
+                current = candidate
+            else:
+                lines.append(current)
+                current = word
+        lines.append(current)
+    return "\n".join(lines)
+
+
+def blend(frame, premultiplied, inverse_alpha, x, y):
+    """Alpha-blend a premultiplied BGR bitmap onto ``frame`` at (x, y), in place and clipped to the frame"""
+    height, width = premultiplied.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(frame.shape[1], x + width), min(frame.shape[0], y + height)
+    if x0 >= x1 or y0 >= y1:
+        return
+    source = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+    roi = frame[y0:y1, x0:x1]
+    # frame * (255 - a) + colour * a stays below 2**16, so uint16 holds it without overflow
+    blended = np.multiply(roi, inverse_alpha[source], dtype=np.uint16)
+    blended += premultiplied[source]
+    np.floor_divide(blended, 255, out=blended)
+    roi[:] = blended
+
+
+class SubtitleOverlay:
+    """Burns subtitles into frames instead of showing them in a widget.
+
+    Each cue is rasterized with PIL once per frame size and kept as a
+    premultiplied bitmap, so showing it again is one NumPy blend over its
+    bounding box. ``composite`` runs where frames are prepared (the decoder
+    thread), never on the UI thread. ASS styles (font, size, colours,
+    outline, shadow, alignment, margins) and ``\\an``/``\\pos`` overrides are
+    honoured; SRT cues use the default style.
+    """
+
+    def __init__(self, cache_size=64):
+        self.track = None  # subtitle_store.SubtitleTrack the caches belong to
+        self.play_res = (384, 288)
+        self.cache_size = cache_size
+        self._bitmaps = OrderedDict()  # (cue, frame size) -> bitmap tuple, or None for an empty cue
+        self._layouts = {}  # (active cues, frame size) -> [(premultiplied, inverse alpha, x, y)]
+        self._fonts = {}
+        # The decoder, seek and preview threads all composite: guards the track and both caches
+        self._lock = threading.Lock()
+        # Shared by the decoder and seek threads; a stale cursor only costs a bisect in track.segment()
+        self._cursor = -1
+
+    def _set_track(self, track):
+        # Caller holds self._lock
+        self._bitmaps.clear()
+        self._layouts.clear()
+        self._cursor = -1
+        play_res_y = int(track.info.get("PlayResY") or 288)
+        play_res_x = int(track.info.get("PlayResX") or play_res_y * 4 // 3)
+        self.play_res = (play_res_x, play_res_y)
+        self.track = track
+
+    def composite(self, frame, pts, track):
+        """Blend the cues of ``track`` active at ``pts`` onto ``frame`` (BGR, modified in place)"""
+        if track is None:
+            return
+        with self._lock:
+            if track is not self.track:
+                self._set_track(track)
+        segment = self._cursor = track.segment(int(pts * 1000), self._cursor)
+        if segment < 0:
+            return
+        cues = track.cues_in(segment)
+        if not cues:
+            return
+        key = (cues, (frame.shape[1], frame.shape[0]))
+        with self._lock:
+            layout = self._layouts.get(key)
+        if layout is None:
+            layout = self._layout(*key)
+            with self._lock:
+                if len(self._layouts) >= self.cache_size:
+                    self._layouts.clear()
+                self._layouts[key] = layout
+        for premultiplied, inverse_alpha, x, y in layout:
+            blend(frame, premultiplied, inverse_alpha, x, y)
+
+    # ---------- layout ----------
+
+    def _layout(self, cues, size):
+        placements = []
+        stacked = {}  # alignment -> height taken by earlier cues, so overlapping cues don't cover each other
+        for cue in cues:
+            bitmap = self._bitmap(cue, size)
+            if bitmap is None:
+                continue
+            premultiplied, inverse_alpha, x, y, alignment, positioned = bitmap
+            if not positioned:
+                offset = stacked.get(alignment, 0)
+                stacked[alignment] = offset + premultiplied.shape[0]
+                if alignment <= 3:
+                    y -= offset  # bottom rows grow upwards
+                elif alignment >= 7:
+                    y += offset
+            placements.append((premultiplied, inverse_alpha, x, y))
+        return placements
+
+    def _bitmap(self, cue, size):
+        key = (cue, size)
+        with self._lock:
+            if key in self._bitmaps:
+                self._bitmaps.move_to_end(key)
+                return self._bitmaps[key]
+            track = self.track
+        # Rasterize outside the lock; two threads missing at once just render the cue twice
+        bitmap = self._render(track, track.cue(cue), size)
+        with self._lock:
+            if track is self.track:
+                self._bitmaps[key] = bitmap
+                while len(self._bitmaps) > self.cache_size:
+                    self._bitmaps.popitem(last=False)
+        return bitmap
+
+    # ---------- rasterizing ----------
+
+    def _font(self, name, size, bold, italic):
+        key = (name, size, bold, italic)
+        font = self._fonts.get(key)
+        if font is None:
+            for candidate in (name, f"{name}.ttf", FALLBACK_FONTS[(bold, italic)], "DejaVuSans.ttf"):
+                try:
+                    font = ImageFont.truetype(candidate, size)
+                    break
+                except OSError:
+                    continue
+            else:
+                try:
+                    font = ImageFont.load_default(size)
+                except TypeError:
+                    # Pillow < 10.1: fixed-size bitmap font
+                    font = ImageFont.load_default()
+            self._fonts[key] = font
+        return font
+
+    def _render(self, track, event, size):
+        """(premultiplied BGR, inverse alpha, x, y, alignment, positioned) of one cue at frame ``size``"""
+        text = event.plaintext.strip()
+        if not text:
+            return None
+        style = track.styles.get(event.style) or pysubs2.SSAStyle()
+        width, height = size
+        scale_x, scale_y = width / self.play_res[0], height / self.play_res[1]
+        font = self._font(style.fontname, max(6, round(style.fontsize * scale_y)), bool(style.bold), bool(style.italic))
+        outline = round(style.outline * scale_y)
+        shadow = round(style.shadow * scale_y)
+        match = _ALIGN.search(event.text)
+        alignment = int(match.group(1)) if match else int(style.alignment)
+        column, row = (alignment - 1) % 3, (alignment - 1) // 3  # column 0 left, row 0 bottom
+        align = ("left", "center", "right")[column]
+
+        position = _POS.search(event.text)
+        margin_l = (event.marginl or style.marginl) * scale_x
+        margin_r = (event.marginr or style.marginr) * scale_x
+        measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+        # Long lines wrap inside the margins (the whole frame for \pos cues) instead of running off it
+        text = wrap(measure, text, font, width if position else width - margin_l - margin_r, outline)
+        left, top, right, bottom = measure.multiline_textbbox((0, 0), text, font=font, align=align,
+                                                              stroke_width=outline)
+        # Centred and right-aligned lines can have fractional offsets: grow the box to whole pixels
+        left, top, right, bottom = math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom)
+        box_w, box_h = right - left + shadow, bottom - top + shadow
+        image = Image.new("RGBA", (max(1, box_w), max(1, box_h)), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        if shadow:
+            draw.multiline_text((shadow - left, shadow - top), text, font=font, align=align,
+                                fill=_rgba(style.backcolor), stroke_width=outline, stroke_fill=_rgba(style.backcolor))
+        draw.multiline_text((-left, -top), text, font=font, align=align, fill=_rgba(style.primarycolor),
+                            stroke_width=outline, stroke_fill=_rgba(style.outlinecolor))
+
+        # Anchor point on the frame, then the bitmap's top-left corner from the alignment
+        if position:
+            anchor_x, anchor_y = float(position.group(1)) * scale_x, float(position.group(2)) * scale_y
+        else:
+            margin_v = (event.marginv or style.marginv) * scale_y
+            anchor_x = (margin_l, (width + margin_l - margin_r) / 2, width - margin_r)[column]
+            anchor_y = (height - margin_v, height / 2, margin_v)[row]
+        x = round(anchor_x - image.width * column / 2)
+        y = round(anchor_y - image.height * (2 - row) / 2)
+
+        rgba = np.asarray(image)
+        alpha = rgba[..., 3:].astype(np.uint16)
+        premultiplied = rgba[..., 2::-1] * alpha  # RGB -> BGR like the frames, widened to uint16
+        return premultiplied, 255 - alpha, x, y, alignment, bool(position)
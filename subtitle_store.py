@@ -0,0 +1,342 @@
+import argparse
+import bisect
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+# ========================== Compact Subtitle Tracks ==========================
+
+FORMAT_VERSION = 1
+_MAGIC = b"SUBC"
+# magic, version, cues, segment boundaries, active-cue entries, strings, string bytes, styles bytes
+_HEADER = struct.Struct("<4sIIIIIII")
+_OVERRIDE_TAGS = re.compile(r"\{[^}]*\}")
+
+
+def compiled_path(source, cache_dir=None):
+    """Where the precompiled form of ``source`` lives"""
+    if cache_dir:
+        return os.path.join(cache_dir, os.path.basename(source) + ".subc")
+    return source + ".subc"
+
+
+def discover_tracks(path):
+    """``path`` as the "default" track plus its siblings named ``<stem>.<language>.<ext>``"""
+    directory = os.path.dirname(path) or "."
+    stem = os.path.splitext(os.path.basename(path))[0]
+    tracks = {"default": path}
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == stem and parts[2] in ("srt", "ass", "ssa", "vtt", "sub"):
+            tracks[parts[1]] = os.path.join(directory, name)
+    return tracks
+
+
+class Cue:
+    """One subtitle event as seen by sinks and the overlay, built on demand from a track's arrays"""
+
+    __slots__ = ("start", "end", "text", "style", "marginl", "marginr", "marginv")
+
+    def __init__(self, start, end, text, style, marginl, marginr, marginv):
+        self.start, self.end, self.text, self.style = start, end, text, style
+        self.marginl, self.marginr, self.marginv = marginl, marginr, marginv
+
+    @property
+    def plaintext(self):
+        """Text without ASS override tags, with ASS line breaks as newlines"""
+        text = _OVERRIDE_TAGS.sub("", self.text)
+        return text.replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ")
+
+
+class _MappedStrings:
+    """String table of an mmapped track; each string is decoded and interned the first time it is used"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+        self._decoded = [None] * (len(offsets) - 1)
+
+    def __len__(self):
+        return len(self._decoded)
+
+    def __getitem__(self, i):
+        text = self._decoded[i]
+        if text is None:
+            text = self._decoded[i] = sys.intern(str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8"))
+        return text
+
+
+class SubtitleTrack:
+    """One subtitle track kept in flat int32 arrays instead of per-event Python objects.
+
+    Cue times, text and style ids, and margins are parallel arrays; cue texts
+    and style names are interned into one string table, so repeated lines are
+    stored once. The timeline is cut at every cue start/end into segments
+    whose active cues are constant (stored CSR-style in ``active_offsets`` /
+    ``active_cues``), so overlapping cues are shown together. Lookups walk a
+    cursor forward during normal playback and fall back to bisect on seeks.
+
+    The arrays are ``array('i')`` after parsing, or zero-copy views of an
+    mmapped ``.subc`` file (see ``save``/``load``), which costs no parsing
+    and shares pages between processes.
+    """
+
+    def __init__(self, arrays, strings, styles_text, mapping=None):
+        (self.starts, self.ends, self.text_ids, self.style_ids, self.margins,
+         self.boundaries, self.active_offsets, self.active_cues) = arrays
+        self.strings = strings
+        self.styles_text = styles_text  # [Script Info] and [V4+ Styles] as ASS text, parsed on first use
+        self._mapping = mapping
+        self._styles = None
+        self._styles_lock = threading.Lock()
+        self._cursor = -1
+        self._text_cache = (None, "")  # (segment, joined text) of the last lookup
+
+    def __len__(self):
+        return len(self.starts)
+
+    # ---------- building ----------
+
+    @classmethod
+    def from_subtitles(cls, subtitles):
+        """Compile a ``pysubs2.SSAFile``; the parsed events can be dropped afterwards"""
+        import pysubs2
+
+        events = sorted((event for event in subtitles if not event.is_comment and event.end > event.start),
+                        key=lambda event: (event.start, event.end))
+        strings, string_ids = [], {}
+
+        def intern(text):
+            i = string_ids.get(text)
+            if i is None:
+                i = string_ids[text] = len(strings)
+                strings.append(sys.intern(text))
+            return i
+
+        starts = array("i", (event.start for event in events))
+        ends = array("i", (event.end for event in events))
+        text_ids = array("i", (intern(event.text) for event in events))
+        style_ids = array("i", (intern(event.style) for event in events))
+        margins = array("i")
+        for event in events:
+            margins.extend((event.marginl, event.marginr, event.marginv))
+
+        boundaries = array("i", sorted(set(starts) | set(ends)))
+        active_offsets, active_cues = array("i", [0]), array("i")
+        active = {}
+        start_pos = 0
+        for boundary in boundaries:
+            for i in [i for i, end in active.items() if end <= boundary]:
+                del active[i]
+            while start_pos < len(events) and starts[start_pos] <= boundary:
+                active[start_pos] = ends[start_pos]
+                start_pos += 1
+            active_cues.extend(sorted(active))
+            active_offsets.append(len(active_cues))
+
+        header = pysubs2.SSAFile()
+        header.info.update(subtitles.info)
+        header.styles.update(subtitles.styles)
+        arrays = (starts, ends, text_ids, style_ids, margins, boundaries, active_offsets, active_cues)
+        return cls(arrays, strings, header.to_string("ass"))
+
+    # ---------- precompiled form ----------
+
+    def save(self, path):
+        """Write the track as ``.subc``: a header, the int32 arrays, the string table, then the styles"""
+        if sys.byteorder != "little":
+            raise OSError("the .subc format is little-endian")
+        encoded = [self.strings[i].encode("utf-8") for i in range(len(self.strings))]
+        string_offsets = array("i", [0])
+        for data in encoded:
+            string_offsets.append(string_offsets[-1] + len(data))
+        styles = self.styles_text.encode("utf-8")
+        arrays = (self.starts, self.ends, self.text_ids, self.style_ids, self.margins,
+                  self.boundaries, self.active_offsets, self.active_cues, string_offsets)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, len(self.starts), len(self.boundaries),
+                                 len(self.active_cues), len(encoded), string_offsets[-1], len(styles)))
+            for values in arrays:
+                f.write(values.tobytes())
+            f.writelines(encoded)
+            f.write(styles)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Map a ``.subc`` file; raises ValueError if it isn't one this version understands"""
+        if sys.byteorder != "little":
+            raise ValueError("the .subc format is little-endian")
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapping) < _HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        magic, version, cues, boundaries, active, strings, string_bytes, styles_bytes = _HEADER.unpack_from(mapping)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} compiled subtitle track")
+        counts = (cues, cues, cues, cues, 3 * cues, boundaries, boundaries + 1, active, strings + 1)
+        ints_end = _HEADER.size + 4 * sum(counts)
+        if len(mapping) != ints_end + string_bytes + styles_bytes:
+            raise ValueError(f"{path} is truncated")
+
+        view = memoryview(mapping)
+        ints = view[_HEADER.size:ints_end].cast("i")
+        arrays = []
+        position = 0
+        for count in counts:
+            arrays.append(ints[position:position + count])
+            position += count
+        strings_table = _MappedStrings(arrays.pop(), view[ints_end:ints_end + string_bytes])
+        styles_text = str(view[ints_end + string_bytes:], "utf-8")
+        return cls(arrays, strings_table, styles_text, mapping)
+
+    # ---------- lookups ----------
+
+    def cue(self, i):
+        margins = self.margins[3 * i:3 * i + 3]
+        return Cue(self.starts[i], self.ends[i], self.strings[self.text_ids[i]], self.strings[self.style_ids[i]],
+                   *margins)
+
+    def cues_in(self, segment):
+        """Positions of the cues active in ``segment``, as a tuple"""
+        return tuple(self.active_cues[self.active_offsets[segment]:self.active_offsets[segment + 1]])
+
+    def segment(self, time_ms, cursor=-1):
+        """Segment containing ``time_ms``, trying ``cursor`` and the one after it before bisecting"""
+        boundaries = self.boundaries
+        for candidate in (cursor, cursor + 1):
+            if -1 <= candidate < len(boundaries):
+                lower = boundaries[candidate] if candidate >= 0 else float("-inf")
+                upper = boundaries[candidate + 1] if candidate + 1 < len(boundaries) else float("inf")
+                if lower <= time_ms < upper:
+                    return candidate
+        return bisect.bisect_right(boundaries, time_ms) - 1
+
+    def lookup(self, time_ms):
+        """Text of every cue active at ``time_ms``, or "" between cues"""
+        segment = self._cursor = self.segment(time_ms, self._cursor)
+        if segment < 0:
+            return ""
+        cached_segment, text = self._text_cache
+        if cached_segment != segment:
+            text = "\n".join(self.strings[self.text_ids[i]] for i in self.cues_in(segment))
+            self._text_cache = (segment, text)
+        return text
+
+    @property
+    def styles(self):
+        return self._header().styles
+
+    @property
+    def info(self):
+        return self._header().info
+
+    def _header(self):
+        with self._styles_lock:
+            if self._styles is None:
+                import pysubs2
+
+                self._styles = pysubs2.SSAFile.from_string(self.styles_text)
+            return self._styles
+
+
+# ========================== Track Store ==========================
+
+
+class SubtitleStore:
+    """Subtitle tracks by language, loaded in a background thread the first time each is requested.
+
+    A parsed source is compiled next to itself (or into ``cache_dir``) as
+    ``.subc``; later loads map that file instead of parsing while it is newer
+    than the source. Once a track is loaded, switching to it is a dict lookup.
+    """
+
+    def __init__(self, sources, cache_dir=None, compile=True):
+        self.sources = dict(sources)  # language -> subtitle file (.srt, .ass, ... or .subc)
+        self.cache_dir = cache_dir
+        self.compile = compile
+        self._tracks = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="subtitles")
+
+    @property
+    def languages(self):
+        return list(self.sources)
+
+    def request(self, language):
+        """Future of the track for ``language``; starts loading it unless that has already happened"""
+        with self._lock:
+            future = self._futures.get(language)
+            if future is None:
+                future = self._futures[language] = self._executor.submit(self._load, language)
+            return future
+
+    def preload(self, languages=None):
+        for language in languages or self.sources:
+            self.request(language)
+
+    def get(self, language, timeout=None):
+        """Track for ``language``, waiting for it to load"""
+        return self.request(language).result(timeout)
+
+    def loaded(self, language):
+        """Track for ``language`` if it has finished loading, else None (never blocks)"""
+        return self._tracks.get(language)
+
+    def _load(self, language):
+        source = self.sources[language]
+        try:
+            track = self._load_source(source)
+        except Exception as e:
+            print(f"⚠️ Could not load {language} subtitles from {source}: {e}")
+            raise
+        self._tracks[language] = track
+        return track
+
+    def _load_source(self, source):
+        if source.endswith(".subc"):
+            return SubtitleTrack.load(source)
+        compiled = compiled_path(source, self.cache_dir)
+        try:
+            if os.path.getmtime(compiled) >= os.path.getmtime(source):
+                return SubtitleTrack.load(compiled)
+        except (OSError, ValueError):
+            pass
+
+        import pysubs2
+
+        track = SubtitleTrack.from_subtitles(pysubs2.load(source))
+        if self.compile:
+            try:
+                if self.cache_dir:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                track.save(compiled)
+            except OSError as e:
+                print(f"⚠️ Could not write {compiled}: {e}")
+        return track
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompile subtitle files to .subc for mmap loading")
+    parser.add_argument("sources", nargs="+")
+    parser.add_argument("--cache-dir")
+    args = parser.parse_args()
+    for source in args.sources:
+        import pysubs2
+
+        track = SubtitleTrack.from_subtitles(pysubs2.load(source))
+        path = compiled_path(source, args.cache_dir)
+        if args.cache_dir:
+            os.makedirs(args.cache_dir, exist_ok=True)
+        track.save(path)
+        print(f"🗜️ {source}: {len(track)} cues, {len(track.strings)} distinct strings -> {path}")
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The player modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def clip(tmp_path_factory):
+    """A short synthetic 30 fps clip, so tests don't need the videofolder"""
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+
+    path = str(tmp_path_factory.mktemp("clips") / "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (160, 90))
+    if not writer.isOpened():
+        pytest.skip("OpenCV can't write mp4 files here")
+    frame = np.empty((90, 160, 3), np.uint8)
+    for i in range(150):
+        frame[:] = (i * 5 % 256, i * 3 % 256, 128)
+        writer.write(frame)
+    writer.release()
+    return path
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+for module in ("cv2", "numpy", "ffpyplayer.player", "PIL", "pysubs2"):
+    pytest.importorskip(module)
+
+from engine import BasicVideoPlayer, HeadlessLoop, NullSink, PausedState, QualitySwitchDecorator
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            pytest.fail("timed out")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def playing(clip):
+    """A real-time engine playing ``clip`` (without audio) on a HeadlessLoop thread"""
+    loop = HeadlessLoop(realtime=True)
+    sink = NullSink()
+    engine = QualitySwitchDecorator(BasicVideoPlayer(clip), {"Medium Quality": clip}, sink, loop,
+                                    audio=False, build_seek_index=False, build_thumbnails=False)
+    thread = threading.Thread(target=loop.run, daemon=True)
+    thread.start()
+    loop.after(0, engine.play)
+    _wait_for(lambda: sink.frames >= 5)
+    yield engine, loop, sink
+    loop.after(0, engine.stop_video)
+    time.sleep(0.1)
+    loop.quit()
+    thread.join(timeout=2)
+
+
+def test_paused_player_uses_no_cpu(playing):
+    engine, loop, sink = playing
+    loop.after(0, engine.pause)
+    _wait_for(lambda: isinstance(engine.state, PausedState))
+    time.sleep(0.2)  # let the decoder fill the buffer and block
+
+    frames = sink.frames
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    time.sleep(1.0)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    assert sink.frames == frames
+    # A spinning decoder would burn a whole core here
+    assert cpu < 0.05 * wall, f"{cpu * 1000:.0f} ms of CPU in {wall:.2f}s while paused"
+
+
+def test_resume_presents_within_a_frame_interval(playing):
+    engine, loop, sink = playing
+    loop.after(0, engine.pause)
+    _wait_for(lambda: isinstance(engine.state, PausedState))
+    time.sleep(0.2)
+
+    frames = sink.frames
+    resumed = time.perf_counter()
+    loop.after(0, engine.resume)
+    _wait_for(lambda: sink.frames > frames, timeout=1.0)
+    # One frame interval, plus scheduling slack for a loaded CI machine
+    assert time.perf_counter() - resumed < engine.frame_interval_ms / 1000 + 0.05
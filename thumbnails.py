@@ -0,0 +1,181 @@
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# ========================== Thumbnail Sprite Sheets ==========================
+
+SPRITE_VERSION = 1
+
+
+def sprite_dir(video_path):
+    return video_path + ".thumbs"
+
+
+def _render_sheet(video_path, sheet, times, tile_size, columns, quality, out_dir):
+    """Worker process: grab the frames at ``times`` in one forward pass and tile them into one JPEG"""
+    tile_w, tile_h = tile_size
+    rows = -(-len(times) // columns)
+    canvas = np.zeros((rows * tile_h, columns * tile_w, 3), np.uint8)
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_MSEC, times[0] * 1000)
+    frame = None
+    grabbed = False
+    for i, target in enumerate(times):
+        # Grab (no conversion) up to the sample point, then retrieve only that frame
+        fresh = False
+        while not grabbed or cap.get(cv2.CAP_PROP_POS_MSEC) < target * 1000:
+            if not cap.grab():
+                break
+            grabbed = fresh = True
+        if fresh:
+            ok, decoded = cap.retrieve()
+            if ok:
+                frame = decoded
+        if frame is None:
+            continue
+        y, x = divmod(i, columns)
+        cv2.resize(frame, tile_size, dst=canvas[y * tile_h:(y + 1) * tile_h, x * tile_w:(x + 1) * tile_w],
+                   interpolation=cv2.INTER_AREA)
+    cap.release()
+    name = f"sheet_{sheet:04d}.jpg"
+    cv2.imwrite(os.path.join(out_dir, name), canvas, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return name
+
+
+class ThumbnailSprites:
+    """Preview thumbnails of one video, tiled into JPEG sprite sheets.
+
+    A frame is sampled every ``interval`` seconds and scaled to ``tile_size``;
+    ``columns * rows`` of them share one sheet. Sheets and ``index.json`` live
+    in ``<video>.thumbs/`` and are reused while the video's size and mtime
+    still match. Lookups only crop an already written sheet, so a hover
+    preview never touches a video decoder.
+    """
+
+    def __init__(self, video_path, data, max_loaded_sheets=4):
+        self.video_path = video_path
+        self.interval = data["interval"]
+        self.tile_size = tuple(data["tile_size"])
+        self.columns = data["columns"]
+        self.rows = data["rows"]
+        self.count = data["count"]
+        self.sheets = data["sheets"]
+        self.data = data
+        self.max_loaded_sheets = max_loaded_sheets
+        self._loaded = OrderedDict()  # sheet number -> PIL image
+        self._lock = threading.Lock()  # hover previews (Tk loop) and drag previews (seek thread) share the cache
+
+    def __len__(self):
+        return self.count
+
+    # ---------- building ----------
+
+    @classmethod
+    def build(cls, video_path, interval=2.0, tile_width=160, columns=10, rows=10, quality=75, workers=None):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+        width, height = cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        cap.release()
+        tile_size = (tile_width, max(2, round(tile_width * height / width)) if width else tile_width * 9 // 16)
+
+        times = [i * interval for i in range(max(1, int(duration // interval) + 1))]
+        per_sheet = columns * rows
+        chunks = [times[i:i + per_sheet] for i in range(0, len(times), per_sheet)]
+        out_dir = sprite_dir(video_path)
+        os.makedirs(out_dir, exist_ok=True)
+
+        workers = workers or max(1, min(len(chunks), (os.cpu_count() or 2) - 1))
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+            futures = [pool.submit(_render_sheet, video_path, n, chunk, tile_size, columns, quality, out_dir)
+                       for n, chunk in enumerate(chunks)]
+            sheets = [future.result() for future in futures]
+
+        stat = os.stat(video_path)
+        data = {
+            "version": SPRITE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "interval": interval,
+            "tile_size": list(tile_size),
+            "columns": columns,
+            "rows": rows,
+            "count": len(times),
+            "sheets": sheets,
+        }
+        return cls(video_path, data)
+
+    @classmethod
+    def load(cls, video_path):
+        """Cached sprites for ``video_path``, or None if there are none or they are stale"""
+        index_path = os.path.join(sprite_dir(video_path), "index.json")
+        try:
+            with open(index_path) as f:
+                data = json.load(f)
+            stat = os.stat(video_path)
+        except (OSError, ValueError):
+            return None
+        if (data.get("version") != SPRITE_VERSION or data["size"] != stat.st_size
+                or data["mtime_ns"] != stat.st_mtime_ns):
+            return None
+        if not all(os.path.exists(os.path.join(sprite_dir(video_path), name)) for name in data["sheets"]):
+            return None
+        return cls(video_path, data)
+
+    @classmethod
+    def load_or_build(cls, video_path, **options):
+        sprites = cls.load(video_path)
+        if sprites is None:
+            sprites = cls.build(video_path, **options)
+            sprites.save()
+        return sprites
+
+    def save(self):
+        index_path = os.path.join(sprite_dir(self.video_path), "index.json")
+        tmp_path = index_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            print(f"⚠️ Could not write thumbnail index for {self.video_path}: {e}")
+
+    # ---------- lookups ----------
+
+    def tile_at(self, time_s):
+        """(sheet file, (left, top, right, bottom)) of the thumbnail for ``time_s``"""
+        number = min(self.count - 1, max(0, int(time_s // self.interval)))
+        sheet, cell = divmod(number, self.columns * self.rows)
+        y, x = divmod(cell, self.columns)
+        tile_w, tile_h = self.tile_size
+        box = (x * tile_w, y * tile_h, (x + 1) * tile_w, (y + 1) * tile_h)
+        return os.path.join(sprite_dir(self.video_path), self.sheets[sheet]), box
+
+    def image_at(self, time_s):
+        """PIL image of the thumbnail for ``time_s``, cropped from a (cached) sprite sheet"""
+        path, box = self.tile_at(time_s)
+        with self._lock:
+            sheet = self._loaded.get(path)
+            if sheet is None:
+                sheet = self._loaded[path] = Image.open(path).convert("RGB")
+                while len(self._loaded) > self.max_loaded_sheets:
+                    self._loaded.popitem(last=False)
+            else:
+                self._loaded.move_to_end(path)
+            return sheet.crop(box)
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        sprites = ThumbnailSprites.load_or_build(path)
+        print(f"🖼️ {path}: {len(sprites)} thumbnails in {len(sprites.sheets)} sheets")
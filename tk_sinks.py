@@ -0,0 +1,74 @@
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+from engine import FrameSink, SubtitleSink
+
+# ========================== Tk Sinks ==========================
+
+class TkCanvasSink(FrameSink):
+    """Shows frames on a Tk canvas: one PhotoImage updated in place, centred and letterboxed"""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.viewport = (int(canvas.cget("width")), int(canvas.cget("height")))
+        self.photo = None  # one PhotoImage, updated in place every frame
+        self.canvas_image = None  # the single canvas item showing self.photo
+        self._frame_image = None  # PIL image the decoded bytes are loaded into
+        self._hud_item = None
+
+    def present(self, frame, pts):
+        """Copy a BGR frame into the persistent PhotoImage without allocating new images or canvas items"""
+        metrics = self.metrics
+        size = (frame.shape[1], frame.shape[0])
+        try:
+            if self._frame_image is None or self._frame_image.size != size:
+                with metrics.stage("canvas"):
+                    self._frame_image = Image.new("RGB", size)
+                    self.photo = ImageTk.PhotoImage(self._frame_image)
+                    if self.canvas_image is None:
+                        self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+                    else:
+                        self.canvas.itemconfig(self.canvas_image, image=self.photo)
+                    self._place_image()
+            with metrics.stage("convert"):
+                self._frame_image.frombytes(frame, "raw", "BGR")
+            with metrics.stage("photo"):
+                self.photo.paste(self._frame_image)
+        except tk.TclError:
+            # Happens if window is closed
+            return False
+        return True
+
+    def set_viewport(self, viewport):
+        self.viewport = viewport
+        if self.canvas_image is not None:
+            self._place_image()
+
+    def _place_image(self):
+        """Centre the frame in the viewport; the black canvas background is the letterbox"""
+        inset = int(self.canvas.cget("highlightthickness"))
+        width, height = self._frame_image.size
+        self.canvas.coords(self.canvas_image, inset + (self.viewport[0] - width) // 2,
+                           inset + (self.viewport[1] - height) // 2)
+
+    def overlay(self, text):
+        if text is None:
+            if self._hud_item is not None:
+                self.canvas.delete(self._hud_item)
+                self._hud_item = None
+            return
+        if self._hud_item is None:
+            inset = int(self.canvas.cget("highlightthickness"))
+            self._hud_item = self.canvas.create_text(inset + 8, inset + 8, anchor=tk.NW, fill="#00FF00",
+                                                     font=("Courier", 10))
+        self.canvas.itemconfig(self._hud_item, text=text)
+        self.canvas.tag_raise(self._hud_item)
+
+
+class LabelSubtitleSink(SubtitleSink):
+    def __init__(self, label):
+        self.label = label
+
+    def show(self, text, time_s):
+        self.label.config(text=text)
@@ -35,6 +35,8 @@ class VideoPlayer:
         self.player = None
         self.paused = False
         self.current_time = 0  # Track playback time
+        self.resume_event = threading.Event()
+        self.resume_event.set()
 
         # Create Video Display Canvas
         self.canvas = tk.Canvas(root, width=800, height=500, bg="black", highlightthickness=5, highlightbackground="#FF5733")  # Glowing border effect
@@ -103,6 +105,7 @@ class VideoPlayer:
         self.cap = cv2.VideoCapture(self.video_path)
         self.player = MediaPlayer(self.video_path)
         self.paused = False
+        self.resume_event.set()
 
         if resume_time > 0:
             self.cap.set(cv2.CAP_PROP_POS_MSEC, resume_time * 1000)  # Seek to timestamp
@@ -110,6 +113,8 @@ class VideoPlayer:
         def update_frame():
             while self.cap.isOpened():
                 if self.paused:
+                    # Block until resume()/stop_video() instead of spinning
+                    self.resume_event.wait()
                     continue
                 ret, frame = self.cap.read()
                 audio_frame, val = self.player.get_frame()
@@ -135,6 +140,7 @@ class VideoPlayer:
 
     def stop_video(self):
         """Stops the video"""
+        self.resume_event.set()
         if self.cap:
             self.cap.release()
             self.cap = None
@@ -147,6 +153,7 @@ class VideoPlayer:
         if self.player:
             self.player.set_pause(True)
             self.paused = True
+            self.resume_event.clear()
             print("Video Paused")
 
     def resume(self):
@@ -154,6 +161,7 @@ class VideoPlayer:
         if self.player:
             self.player.set_pause(False)
             self.paused = False
+            self.resume_event.set()
             print("Video Resumed")
 
 